@@ -1,33 +1,185 @@
-from fastapi import FastAPI, File, UploadFile
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
+import asyncio
+import os
+import tarfile
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 import numpy as np
 from io import BytesIO
-from PIL import Image
 from fastapi.responses import JSONResponse
 
+from common.model_registry import sha256_file
+from common.result_cache import bytes_key, from_env
+
+from inference_server import BatchedInferenceServer
+from preprocessing import prepare_batch, prepare_into
+
 app = FastAPI()
 
-# Load model (ensure the model is in the same directory or provide the correct path)
-fashion_model = load_model("cifar_model.h5")
+# CIFAR_RUNTIME=keras (default) serves cifar_model.h5 with TensorFlow;
+# CIFAR_RUNTIME=numpy serves the bundle written by `numpy_runtime.py export`
+# (CIFAR_NUMPY_MODEL, default "cifar_numpy") without importing TensorFlow at all.
+CIFAR_RUNTIME = os.environ.get("CIFAR_RUNTIME", "keras")
+
+if CIFAR_RUNTIME == "numpy":
+    from numpy_runtime import NumpyModel
+    model_dir = os.environ.get("CIFAR_NUMPY_MODEL", "cifar_numpy")
+    fashion_model = NumpyModel.load(model_dir)
+    forward = fashion_model.predict
+    MODEL_VERSION = "numpy-" + sha256_file(Path(model_dir) / "manifest.json")[:16]
+else:
+    from tensorflow.keras.models import load_model
+    # Load model (ensure the model is in the same directory or provide the correct path)
+    fashion_model = load_model("cifar_model.h5")
+    forward = None  # direct tf.function call, see inference_server.py
+    MODEL_VERSION = "keras-" + sha256_file("cifar_model.h5")[:16]
+
+# Scores of recently seen images, keyed by the upload's SHA-256 and MODEL_VERSION
+# (CIFAR_CACHE_SIZE entries, CIFAR_CACHE_TTL seconds, optional CIFAR_CACHE_DB on disk)
+result_cache = from_env("CIFAR")
+
+# All predictions go through one batching worker: CIFAR_MAX_BATCH_SIZE images
+# per forward pass at most, waiting up to CIFAR_MAX_WAIT_MS for a batch to fill
+inference = BatchedInferenceServer(
+    fashion_model,
+    forward=forward,
+    max_batch_size=int(os.environ.get("CIFAR_MAX_BATCH_SIZE", "64")),
+    max_wait_ms=float(os.environ.get("CIFAR_MAX_WAIT_MS", "5")),
+)
 
 class_names = [
     "Airplane", "Automobile", "Bird", "Cat", "Deer", "Dog", "Frog", "Horse", "Ship", "Truck"
 ]
 
 def prepare_image(img):
-    img = img.resize((32, 32))
-    img_array = np.array(img)
-    img_array = img_array / 255.0
-    img_array = np.expand_dims(img_array, axis=0)
-    return img_array
+    """A PIL image (any mode) or encoded bytes as a (1, 32, 32, 3) float32 batch; see preprocessing.py."""
+    return prepare_batch([img])
+
+# ---------- Bulk uploads ----------
+
+# PIL releases the GIL while decoding and resizing, so a thread pool scales with cores
+decode_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("CIFAR_DECODE_THREADS", os.cpu_count() or 4)))
+MAX_BULK_IMAGES = int(os.environ.get("CIFAR_MAX_BULK_IMAGES", "10000"))
+# Zip-bomb limits: files per archive, and bytes unpacked from all archives of one request
+MAX_ARCHIVE_MEMBERS = int(os.environ.get("CIFAR_MAX_ARCHIVE_MEMBERS", str(MAX_BULK_IMAGES)))
+MAX_UNPACKED_BYTES = int(os.environ.get("CIFAR_MAX_UNPACKED_MB", "512")) * 1024 * 1024
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+# What zipfile / tarfile raise on truncated or corrupt archives and members
+ARCHIVE_ERRORS = (zipfile.BadZipFile, tarfile.TarError, zlib.error, EOFError, OSError)
+
+def bad_upload(message):
+    return HTTPException(status_code=400, detail=message)
+
+def archive_members(name, data, budget):
+    """
+    (member name, bytes) for every regular file in a zip or tar archive.
+    `budget` is a one-element list of bytes still allowed to be unpacked; each
+    member's size is checked against it (and the member count against
+    MAX_ARCHIVE_MEMBERS) before the member is read.
+    """
+    count = 0
+
+    def claim(member, size):
+        nonlocal count
+        count += 1
+        if count > MAX_ARCHIVE_MEMBERS:
+            raise HTTPException(status_code=413, detail=f"{name}: more than {MAX_ARCHIVE_MEMBERS} files in the archive")
+        if size > budget[0]:
+            raise HTTPException(status_code=413, detail=f"{name}/{member}: archives unpack to more than {MAX_UNPACKED_BYTES} bytes")
+        budget[0] -= size
+
+    try:
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(BytesIO(data)) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        # ZipExtFile stops at file_size, so the declared size bounds the read
+                        claim(info.filename, info.file_size)
+                        try:
+                            yield info.filename, archive.read(info)
+                        except ARCHIVE_ERRORS as e:
+                            raise bad_upload(f"{name}/{info.filename}: corrupt archive member ({e})")
+        else:
+            with tarfile.open(fileobj=BytesIO(data), mode="r:*") as archive:
+                for member in archive:
+                    if member.isfile():
+                        claim(member.name, member.size)
+                        try:
+                            yield member.name, archive.extractfile(member).read()
+                        except ARCHIVE_ERRORS as e:
+                            raise bad_upload(f"{name}/{member.name}: corrupt archive member ({e})")
+    except ARCHIVE_ERRORS as e:
+        raise bad_upload(f"{name}: not a readable archive ({e})")
+
+def is_hidden(name):
+    return any(part.startswith((".", "__MACOSX")) for part in name.split("/"))
+
+def npy_batch(name, data):
+    """An (n, 32, 32, 3) .npy tensor as a float32 batch: uint8 is scaled to [0, 1], float is used as is."""
+    try:
+        array = np.load(BytesIO(data), allow_pickle=False)
+    except (ValueError, EOFError, OSError) as e:
+        raise bad_upload(f"{name}: not a valid .npy file ({e})")
+    if array.ndim != 4 or array.shape[1:] != (32, 32, 3):
+        raise bad_upload(f"{name}: expected an Nx32x32x3 tensor, got shape {array.shape}")
+    if array.dtype == np.uint8:
+        return np.multiply(array, np.float32(1 / 255.0), dtype=np.float32)
+    if array.dtype.kind not in "biuf":
+        raise bad_upload(f"{name}: expected numeric pixels, got {array.dtype}")
+    return np.ascontiguousarray(array, dtype=np.float32)
+
+def unpack_uploads(uploads):
+    """
+    Split (file name, bytes) uploads into encoded images (names, bytes) and
+    .npy tensors, expanding zip / tar archives member by member. `order` lists
+    ("image", i) / ("tensor", j) in upload order, for putting the results back
+    together. Unreadable uploads are rejected with a 400 naming the file (or
+    archive member).
+    """
+    names, encoded, tensors, order = [], [], [], []
+    budget = [MAX_UNPACKED_BYTES]
+
+    def check_size():
+        if len(encoded) + sum(len(t) for _, t in tensors) > MAX_BULK_IMAGES:
+            raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_IMAGES} images per request")
+
+    for name, data in uploads:
+        if name.endswith(".npy") or data[:6] == b"\x93NUMPY":
+            order.append(("tensor", len(tensors)))
+            tensors.append((name, npy_batch(name, data)))
+        elif name.lower().endswith(ARCHIVE_SUFFIXES):
+            for member, member_data in archive_members(name, data, budget):
+                if not is_hidden(member):
+                    order.append(("image", len(encoded)))
+                    names.append(f"{name}/{member}")
+                    encoded.append(member_data)
+                    check_size()
+        else:
+            order.append(("image", len(encoded)))
+            names.append(name)
+            encoded.append(data)
+        check_size()
+    return names, encoded, tensors, order
+
+def top_k(scores, k):
+    order = np.argsort(scores)[::-1][:k]
+    return [{"class": class_names[i], "confidence": float(scores[i])} for i in order]
 
 @app.post("/predict/")
 async def predict(file: UploadFile = File(...)):
-    img = Image.open(BytesIO(await file.read()))
-    img_array = prepare_image(img)
-
-    prediction = fashion_model.predict(img_array)
+    data = await file.read()
+    key = bytes_key(data, MODEL_VERSION)
+    prediction = result_cache.get(key)
+    if prediction is None:
+        # Decode off the event loop, then wait for the batch this image lands in
+        img_array = await run_in_threadpool(prepare_image, data)
+        scores = (await asyncio.wrap_future(inference.submit(img_array)))[0]
+        prediction = result_cache.put(key, scores.tolist())
     predicted_class = np.argmax(prediction)
 
     return JSONResponse(content={
@@ -35,5 +187,63 @@ async def predict(file: UploadFile = File(...)):
         'confidence': float(np.max(prediction))
     })
 
+@app.post("/predict/batch/")
+async def predict_batch(files: List[UploadFile] = File(...), k: int = 3):
+    """
+    Classify many images in one request: any number of image files, zip / tar
+    archives of images, or .npy tensors of shape Nx32x32x3. Returns the top `k`
+    classes per image, in upload (and archive) order.
+    """
+    k = max(1, min(k, len(class_names)))
+    uploads = [(upload.filename or "", await upload.read()) for upload in files]
+    names, encoded, tensors, order = await run_in_threadpool(unpack_uploads, uploads)
+
+    # Images seen before are answered from the cache; only the rest are decoded
+    keys = [bytes_key(data, MODEL_VERSION) for data in encoded]
+    cached = [result_cache.get(key) for key in keys]
+    misses = [i for i, scores in enumerate(cached) if scores is None]
+
+    # Encoded images are decoded in parallel straight into one contiguous batch
+    batch = np.zeros((len(misses), 32, 32, 3), dtype=np.float32)
+    loop = asyncio.get_running_loop()
+    decoded = await asyncio.gather(
+        *(loop.run_in_executor(decode_pool, prepare_into, encoded[i], batch[row]) for row, i in enumerate(misses)),
+        return_exceptions=True,
+    )
+
+    # Submitted together, so small uploads share forward passes with other requests
+    batch_future = inference.submit(batch) if len(batch) else None
+    tensor_futures = [inference.submit(t) for _, t in tensors]
+    batch_scores = await asyncio.wrap_future(batch_future) if batch_future else None
+    tensor_scores = [await asyncio.wrap_future(f) for f in tensor_futures]
+
+    errors = {}
+    for row, (i, outcome) in enumerate(zip(misses, decoded)):
+        if isinstance(outcome, Exception):
+            errors[i] = outcome
+        else:
+            cached[i] = result_cache.put(keys[i], batch_scores[row].tolist())
+
+    results = []
+    for kind, i in order:
+        if kind == "tensor":
+            name = tensors[i][0]
+            results += [{"name": f"{name}[{j}]", "top_k": top_k(row, k)} for j, row in enumerate(tensor_scores[i])]
+        elif i in errors:
+            results.append({"name": names[i], "error": f"Could not decode image: {errors[i]}"})
+        else:
+            results.append({"name": names[i], "top_k": top_k(np.asarray(cached[i]), k)})
+    return JSONResponse(content={"count": len(results), "results": results})
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "runtime": CIFAR_RUNTIME,
+        "model_version": MODEL_VERSION,
+        **inference.stats(),
+        "result_cache": result_cache.stats(),
+    }
+
 if __name__=="__main__":
-    app.run(debug=True)
+    import uvicorn
+    uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -0,0 +1,148 @@
+"""
+Dynamic batching for the CIFAR model.
+
+Request handlers submit decoded images and await a Future instead of calling
+the model themselves. A single worker thread drains the queue: it waits at
+most `max_wait_ms` after the first queued image for more to arrive, packs
+up to `max_batch_size` images into one preallocated float32 buffer and runs
+one forward pass for all of them. It calls the model directly (through a
+tf.function traced once for any batch size) rather than Keras' predict(),
+which builds a new data pipeline on every call.
+
+    server = BatchedInferenceServer(load_model("cifar_model.h5"), max_batch_size=64, max_wait_ms=5)
+    probs = await asyncio.wrap_future(server.submit(images))   # images: (n, 32, 32, 3)
+
+Submissions larger than `max_batch_size` are run in consecutive chunks.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from common.process_local import ProcessLocal
+
+
+class InferenceMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.images = 0
+        self.wait_seconds_total = 0.0
+        self.model_seconds_total = 0.0
+
+    def record(self, images, wait_seconds, model_seconds):
+        with self._lock:
+            self.batches += 1
+            self.images += images
+            self.wait_seconds_total += wait_seconds
+            self.model_seconds_total += model_seconds
+
+    def snapshot(self, queue_depth):
+        with self._lock:
+            return {
+                "queue_depth": queue_depth,
+                "batches": self.batches,
+                "images": self.images,
+                "mean_batch_size": (self.images / self.batches) if self.batches else 0.0,
+                "mean_queue_wait_ms": (self.wait_seconds_total / self.batches * 1000) if self.batches else 0.0,
+                "mean_forward_ms": (self.model_seconds_total / self.batches * 1000) if self.batches else 0.0,
+                "images_per_second_in_model": (self.images / self.model_seconds_total) if self.model_seconds_total else 0.0,
+            }
+
+
+def direct_call(model, input_shape):
+    """model(x, training=False) as a tf.function with a batch-size-agnostic signature."""
+    import tensorflow as tf
+
+    @tf.function(input_signature=[tf.TensorSpec([None, *input_shape], tf.float32)])
+    def forward(x):
+        return model(x, training=False)
+
+    return lambda batch: forward(batch).numpy()
+
+
+class BatchedInferenceServer:
+    def __init__(self, model, max_batch_size=32, max_wait_ms=5.0, input_shape=(32, 32, 3), forward=None):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.input_shape = tuple(input_shape)
+        self.forward = forward or direct_call(model, self.input_shape)
+        self.metrics = InferenceMetrics()
+        self._queue = ProcessLocal(self._start_worker)
+
+    def _start_worker(self):
+        q = queue.Queue()
+        self.metrics = InferenceMetrics()
+        threading.Thread(target=self._run, args=(q,), name="cifar-inference", daemon=True).start()
+        return q
+
+    def submit(self, images):
+        """Queue an (n, *input_shape) array (or one image); the Future resolves to (n, classes) scores."""
+        images = np.asarray(images, dtype=np.float32)
+        if images.shape == self.input_shape:
+            images = images[np.newaxis]
+        if images.shape[1:] != self.input_shape:
+            raise ValueError(f"Expected images of shape (n, {', '.join(map(str, self.input_shape))}), got {images.shape}")
+        future = Future()
+        self._queue.get().put((images, future, time.perf_counter()))
+        return future
+
+    def stats(self):
+        return self.metrics.snapshot(self._queue.get().qsize())
+
+    def _collect(self, q, carry):
+        """Items for one forward pass: up to max_batch_size images, waiting at most max_wait for them."""
+        batch = [carry] if carry is not None else [q.get()]
+        rows = len(batch[0][0])
+        deadline = batch[0][2] + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = q.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if rows + len(item[0]) > self.max_batch_size:
+                return batch, item  # starts the next batch
+            batch.append(item)
+            rows += len(item[0])
+        return batch, None
+
+    def _run(self, q):
+        buffer = np.empty((self.max_batch_size, *self.input_shape), dtype=np.float32)
+        carry = None
+        while True:
+            batch, carry = self._collect(q, carry)
+            # Drop requests whose caller gave up (e.g. a client disconnect cancelled the
+            # wrapping asyncio future); the rest can no longer be cancelled, so setting
+            # their result below cannot raise and kill this thread
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                if len(batch) == 1 and len(batch[0][0]) > self.max_batch_size:
+                    images = batch[0][0]
+                    scores = np.concatenate([
+                        self.forward(images[i:i + self.max_batch_size])
+                        for i in range(0, len(images), self.max_batch_size)
+                    ])
+                else:
+                    n = 0
+                    for images, _, _ in batch:
+                        buffer[n:n + len(images)] = images
+                        n += len(images)
+                    scores = self.forward(buffer[:n])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            done = time.perf_counter()
+            self.metrics.record(len(scores), started - batch[0][2], done - started)
+            offset = 0
+            for images, future, _ in batch:
+                future.set_result(scores[offset:offset + len(images)])
+                offset += len(images)
@@ -0,0 +1,324 @@
+"""
+Pure-NumPy inference runtime for the CIFAR Keras model.
+
+`export` writes the model's weights as a memory-mappable .npy bundle (see
+common/mmap_artifacts.py) and adds the layer graph to the bundle's
+manifest.json. It then checks the NumPy forward pass against Keras (top-1
+agreement, largest score difference, and accuracy when labelled data is
+available) and records the result in the manifest. NumpyModel.load refuses a
+bundle whose parity check did not pass.
+
+Serving from the bundle needs only NumPy: no TensorFlow import, and the
+weights are shared between processes through the page cache. The backend
+uses it with CIFAR_RUNTIME=numpy.
+
+Convolutions use im2col: the receptive fields become rows of a matrix, so
+each Conv2D layer is a single float32 matrix multiply.
+
+Supported layers: InputLayer, Conv2D, MaxPooling2D, AveragePooling2D,
+Flatten, Dense, Dropout, Activation, BatchNormalization (channels_last,
+activations linear / relu / sigmoid / tanh / softmax). `export` stops with
+TypeError on any other layer and ValueError on an unsupported setting.
+
+Usage:
+    python numpy_runtime.py export cifar_model.h5 cifar_numpy [--parity-samples 1000]
+    python numpy_runtime.py check cifar_numpy cifar_model.h5
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from common.mmap_artifacts import export_keras_weights, load_npy_bundle
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_LAYERS = {
+    "InputLayer", "Conv2D", "MaxPooling2D", "AveragePooling2D", "Flatten",
+    "Dense", "Dropout", "Activation", "BatchNormalization",
+}
+
+
+# ---------- Operations ----------
+
+def softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "tanh": np.tanh,
+    "softmax": softmax,
+}
+
+
+def same_padding(size, kernel, stride):
+    total = max((-(-size // stride) - 1) * stride + kernel - size, 0)
+    return total // 2, total - total // 2
+
+
+def windows(x, kernel, strides, padding, pad_value=0.0):
+    """(N, H', W', C, kh, kw) strided view of the receptive fields of an NHWC batch."""
+    if padding == "same":
+        pads = [same_padding(x.shape[1 + i], kernel[i], strides[i]) for i in range(2)]
+        x = np.pad(x, [(0, 0), pads[0], pads[1], (0, 0)], constant_values=pad_value)
+    view = sliding_window_view(x, kernel, axis=(1, 2))
+    return view[:, ::strides[0], ::strides[1]]
+
+
+class Conv2D:
+    def __init__(self, config, kernel, bias=None):
+        kh, kw, cin, cout = kernel.shape
+        self.kernel_size = (kh, kw)
+        self.strides = tuple(config["strides"])
+        self.padding = config["padding"]
+        # (kh, kw, cin, cout) -> rows ordered like the (C, kh, kw) window axes
+        self.weights = np.ascontiguousarray(kernel.transpose(2, 0, 1, 3).reshape(cin * kh * kw, cout), dtype=np.float32)
+        self.bias = None if bias is None else np.asarray(bias, dtype=np.float32)
+        self.activation = ACTIVATIONS[config["activation"]]
+
+    def __call__(self, x):
+        cols = windows(x, self.kernel_size, self.strides, self.padding)
+        n, h, w = cols.shape[:3]
+        out = cols.reshape(n * h * w, -1) @ self.weights  # the reshape is the im2col copy
+        if self.bias is not None:
+            out += self.bias
+        return self.activation(out.reshape(n, h, w, -1))
+
+
+class Pool2D:
+    def __init__(self, config, reduce):
+        self.pool_size = tuple(config["pool_size"])
+        self.strides = tuple(config.get("strides") or self.pool_size)
+        self.padding = config["padding"]
+        self.reduce = reduce
+
+    def __call__(self, x):
+        pad_value = -np.inf if self.reduce is np.max else 0.0
+        return self.reduce(windows(x, self.pool_size, self.strides, self.padding, pad_value), axis=(-2, -1))
+
+
+class Dense:
+    def __init__(self, config, kernel, bias=None):
+        self.kernel = np.asarray(kernel, dtype=np.float32)
+        self.bias = None if bias is None else np.asarray(bias, dtype=np.float32)
+        self.activation = ACTIVATIONS[config["activation"]]
+
+    def __call__(self, x):
+        out = x @ self.kernel
+        if self.bias is not None:
+            out += self.bias
+        return self.activation(out)
+
+
+class BatchNormalization:
+    def __init__(self, config, *weights):
+        weights = list(weights)
+        gamma = weights.pop(0) if config.get("scale", True) else 1.0
+        beta = weights.pop(0) if config.get("center", True) else 0.0
+        mean, var = weights
+        # Folded into one multiply-add
+        self.scale = (gamma / np.sqrt(var + config["epsilon"])).astype(np.float32)
+        self.shift = (beta - mean * self.scale).astype(np.float32)
+
+    def __call__(self, x):
+        return x * self.scale + self.shift
+
+
+def build_layer(spec, weights):
+    kind, config = spec["class"], spec["config"]
+    if kind == "Conv2D":
+        return Conv2D(config, *weights)
+    if kind == "Dense":
+        return Dense(config, *weights)
+    if kind == "MaxPooling2D":
+        return Pool2D(config, np.max)
+    if kind == "AveragePooling2D":
+        return Pool2D(config, np.mean)
+    if kind == "Flatten":
+        return lambda x: x.reshape(len(x), -1)
+    if kind == "Activation":
+        return ACTIVATIONS[config["activation"]]
+    if kind == "BatchNormalization":
+        return BatchNormalization(config, *weights)
+    return None  # InputLayer, Dropout: identity at inference
+
+
+class NumpyModel:
+    def __init__(self, layers, input_shape, manifest=None):
+        self.layers = layers
+        self.input_shape = tuple(input_shape)
+        self.manifest = manifest or {}
+
+    @classmethod
+    def load(cls, bundle_dir, allow_unverified=False):
+        bundle_dir = Path(bundle_dir)
+        with open(bundle_dir / "manifest.json") as f:
+            manifest = json.load(f)
+        if "layers" not in manifest:
+            raise ValueError(f"{bundle_dir} is a plain weights bundle; run `numpy_runtime.py export` to add the layer graph")
+        if not manifest.get("parity", {}).get("passed") and not allow_unverified:
+            raise ValueError(f"{bundle_dir} has not passed its parity check against the Keras model")
+        return cls.from_manifest(bundle_dir, manifest)
+
+    @classmethod
+    def from_manifest(cls, bundle_dir, manifest):
+        arrays = [array for _, array in load_npy_bundle(bundle_dir)]
+        layers = []
+        for spec in manifest["layers"]:
+            layer = build_layer(spec, [arrays[i] for i in spec["weights"]])
+            if layer is not None:
+                layers.append(layer)
+        return cls(layers, manifest["input_shape"], manifest)
+
+    def predict(self, x):
+        x = np.asarray(x, dtype=np.float32)
+        for layer in self.layers:
+            x = layer(x)
+        return x
+
+    __call__ = predict
+
+
+# ---------- Export and parity ----------
+
+def layer_spec(layer, first_weight):
+    kind = type(layer).__name__
+    if kind not in SUPPORTED_LAYERS:
+        raise TypeError(f"Layer {layer.name} ({kind}) is not supported by the NumPy runtime")
+    config = layer.get_config()
+    if config.get("data_format", "channels_last") != "channels_last":
+        raise ValueError(f"Layer {layer.name}: only channels_last is supported")
+    if tuple(config.get("dilation_rate", (1, 1))) != (1, 1):
+        raise ValueError(f"Layer {layer.name}: dilated convolutions are not supported")
+    if config.get("groups", 1) != 1:
+        raise ValueError(f"Layer {layer.name}: grouped convolutions are not supported")
+    if kind == "AveragePooling2D" and config["padding"] == "same":
+        raise ValueError(f"Layer {layer.name}: padded average pooling is not supported")
+    activation = config.get("activation")
+    if activation is not None and activation not in ACTIVATIONS:
+        raise ValueError(f"Layer {layer.name}: activation {activation!r} is not supported")
+    keep = ["activation", "strides", "padding", "pool_size", "epsilon", "center", "scale"]
+    return {
+        "name": layer.name,
+        "class": kind,
+        "config": {k: config[k] for k in keep if k in config},
+        "weights": list(range(first_weight, first_weight + len(layer.weights))),
+    }
+
+
+def parity_data(samples):
+    """(images, labels) from the CIFAR-10 test set when Keras can provide it, else uniform noise without labels."""
+    try:
+        from tensorflow.keras.datasets import cifar10
+        (_, _), (x_test, y_test) = cifar10.load_data()
+        return x_test[:samples].astype(np.float32) / 255.0, y_test[:samples].ravel()
+    except Exception as e:
+        logger.warning("CIFAR-10 test set unavailable (%s); checking parity on random inputs", e)
+        return np.random.default_rng(0).random((samples, 32, 32, 3), dtype=np.float32), None
+
+
+def check_parity(keras_model, numpy_model, images, labels=None, batch_size=256, atol=1e-4, min_agreement=1.0):
+    keras_scores = np.concatenate([
+        keras_model(images[i:i + batch_size], training=False).numpy() for i in range(0, len(images), batch_size)
+    ])
+    numpy_scores = np.concatenate([numpy_model.predict(images[i:i + batch_size]) for i in range(0, len(images), batch_size)])
+    keras_top1, numpy_top1 = keras_scores.argmax(axis=1), numpy_scores.argmax(axis=1)
+    report = {
+        "samples": len(images),
+        "max_abs_diff": float(np.abs(keras_scores - numpy_scores).max()),
+        "top1_agreement": float((keras_top1 == numpy_top1).mean()),
+        "atol": atol,
+        "min_agreement": min_agreement,
+    }
+    if labels is not None:
+        report["keras_accuracy"] = float((keras_top1 == labels).mean())
+        report["numpy_accuracy"] = float((numpy_top1 == labels).mean())
+    report["passed"] = report["max_abs_diff"] <= atol and report["top1_agreement"] >= min_agreement
+    return report
+
+
+def export(h5_path, bundle_dir, parity_samples=1000, atol=1e-4, min_agreement=1.0):
+    from tensorflow.keras.models import load_model
+
+    keras_model = load_model(h5_path)
+    export_keras_weights(h5_path, bundle_dir)
+
+    specs, first_weight = [], 0
+    for layer in keras_model.layers:
+        specs.append(layer_spec(layer, first_weight))
+        first_weight += len(layer.weights)
+
+    manifest_path = Path(bundle_dir) / "manifest.json"
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    layer_shapes = [list(w.shape) for layer in keras_model.layers for w in layer.weights]
+    if layer_shapes != [w["shape"] for w in manifest["weights"]]:
+        raise ValueError("Layer weights do not line up with the exported weight files")
+    manifest["input_shape"] = list(keras_model.input_shape[1:])
+    manifest["layers"] = specs
+
+    images, labels = parity_data(parity_samples)
+    numpy_model = NumpyModel.from_manifest(bundle_dir, manifest)
+    manifest["parity"] = check_parity(keras_model, numpy_model, images, labels, atol=atol, min_agreement=min_agreement)
+
+    tmp = manifest_path.with_suffix(".json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    tmp.replace(manifest_path)
+    return manifest["parity"]
+
+
+def _main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Export / check the pure-NumPy CIFAR runtime.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="Write the weights bundle and layer graph, then run the parity check.")
+    exp.add_argument("h5_path")
+    exp.add_argument("bundle_dir")
+    chk = sub.add_parser("check", help="Re-run the parity check and time both runtimes.")
+    chk.add_argument("bundle_dir")
+    chk.add_argument("h5_path")
+    for p in (exp, chk):
+        p.add_argument("--parity-samples", type=int, default=1000)
+        p.add_argument("--atol", type=float, default=1e-4, help="Largest allowed difference between output scores.")
+        p.add_argument("--min-agreement", type=float, default=1.0, help="Required top-1 agreement with Keras.")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        try:
+            report = export(args.h5_path, args.bundle_dir, args.parity_samples, args.atol, args.min_agreement)
+        except (TypeError, ValueError) as e:
+            # The model cannot run on the NumPy runtime; keep serving it with CIFAR_RUNTIME=keras
+            raise SystemExit(f"numpy_runtime: {e}")
+        print(json.dumps(report, indent=2))
+        sys.exit(0 if report["passed"] else 1)
+
+    from tensorflow.keras.models import load_model
+
+    keras_model = load_model(args.h5_path)
+    numpy_model = NumpyModel.load(args.bundle_dir, allow_unverified=True)
+    images, labels = parity_data(args.parity_samples)
+    report = check_parity(keras_model, numpy_model, images, labels, atol=args.atol, min_agreement=args.min_agreement)
+    print(json.dumps(report, indent=2))
+    for batch_size in (1, 32, 256):
+        batch = images[:batch_size]
+        for name, run in [("keras", lambda: keras_model(batch, training=False).numpy()), ("numpy", lambda: numpy_model.predict(batch))]:
+            run()
+            start = time.perf_counter()
+            for _ in range(20):
+                run()
+            print(f"batch {batch_size:>4} {name}: {(time.perf_counter() - start) / 20 * 1000:8.2f} ms")
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,102 @@
+"""
+Image preprocessing for the CIFAR model: encoded bytes -> (32, 32, 3) float32 in [0, 1].
+
+- JPEGs are decoded with PIL's draft mode, so the decoder scales by 1/2, 1/4
+  or 1/8 itself (DCT scaling). A 4000x3000 photo never fully decodes.
+- Every mode (RGBA, greyscale, palette, CMYK) is converted to RGB, so the
+  tensor always has 3 channels.
+- Normalisation is a 256-entry float32 lookup table written straight into the
+  caller's row of a preallocated batch. There is no float64 intermediate and
+  no expand_dims copy.
+
+The table holds float32(i / 255.0), the value the model saw from the old
+float64 path after its cast to float32. Outputs therefore match the old path
+exactly for every non-JPEG input. For JPEGs, draft decoding changes pixels
+slightly before the resize.
+
+Usage (benchmark against the old prepare_image):
+    python preprocessing.py [image files or directories ...]
+"""
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+SIZE = (32, 32)
+SCALE_LUT = (np.arange(256) / 255.0).astype(np.float32)
+
+
+def open_rgb(data, size=SIZE):
+    """Decode `data` (bytes or an open PIL image) at roughly `size` and return a `size` RGB image."""
+    img = data if isinstance(data, Image.Image) else Image.open(BytesIO(data))
+    img.draft("RGB", size)  # no-op for formats without reduced decoding
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    return img.resize(size)
+
+
+def prepare_into(data, out):
+    """Preprocess one image into `out`, a (32, 32, 3) float32 array (e.g. a row of a batch)."""
+    # mode="clip" lets take() write into `out` directly (indices are uint8, always in range)
+    np.take(SCALE_LUT, np.asarray(open_rgb(data)), out=out, mode="clip")
+    return out
+
+
+def prepare_batch(items, out=None):
+    """Preprocess a sequence of images into one (n, 32, 32, 3) float32 batch (allocated if not given)."""
+    if out is None:
+        out = np.empty((len(items), *SIZE, 3), dtype=np.float32)
+    for i, data in enumerate(items):
+        prepare_into(data, out[i])
+    return out
+
+
+def legacy_prepare(img):
+    """The previous backend.prepare_image, kept for the benchmark."""
+    img = img.resize(SIZE)
+    img_array = np.array(img)
+    img_array = img_array / 255.0
+    img_array = np.expand_dims(img_array, axis=0)
+    return img_array
+
+
+def _sample_images():
+    """A few synthetic JPEG / PNG inputs of typical upload sizes."""
+    rng = np.random.default_rng(0)
+    samples = {}
+    for width, height in [(32, 32), (640, 480), (1920, 1080), (4000, 3000)]:
+        pixels = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        for fmt in ["JPEG", "PNG"]:
+            buf = BytesIO()
+            Image.fromarray(pixels).save(buf, format=fmt, quality=90)
+            samples[f"{width}x{height}.{fmt.lower()}"] = buf.getvalue()
+    return samples
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+    from pathlib import Path
+
+    if len(sys.argv) > 1:
+        paths = []
+        for arg in map(Path, sys.argv[1:]):
+            paths += sorted(p for p in arg.rglob("*") if p.is_file()) if arg.is_dir() else [arg]
+        samples = {p.name: p.read_bytes() for p in paths}
+    else:
+        samples = _sample_images()
+
+    out = np.empty((*SIZE, 3), dtype=np.float32)
+    for name, data in samples.items():
+        legacy = legacy_prepare(Image.open(BytesIO(data)).convert("RGB"))[0]
+        diff = float(np.abs(prepare_into(data, out) - legacy).max())
+        runs = max(3, int(2e6 // len(data)))
+        start = time.perf_counter()
+        for _ in range(runs):
+            legacy_prepare(Image.open(BytesIO(data)))
+        legacy_us = (time.perf_counter() - start) / runs * 1e6
+        start = time.perf_counter()
+        for _ in range(runs):
+            prepare_into(data, out)
+        new_us = (time.perf_counter() - start) / runs * 1e6
+        print(f"{name:>20}: old {legacy_us:10.1f} us  new {new_us:10.1f} us  ({legacy_us / new_us:5.1f}x)  max |diff| {diff:.4f}")
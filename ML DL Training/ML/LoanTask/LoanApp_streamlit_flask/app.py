@@ -1,32 +1,91 @@
-from flask import Flask, request, jsonify, g
+from flask import Flask, request, jsonify, g, Response, stream_with_context, make_response
+import functools
+import json
+import math
+import os
+import queue
 import sqlite3
 from typing import Dict, Any
+
+import click
+
+from common.process_local import ProcessLocal
  
 
  
 DATABASE = "loan_applicants.db"
+
+# "normal": WAL journal + synchronous=NORMAL (fast, may lose the last commits on power loss)
+# "full":   rollback journal + synchronous=FULL (every commit is fsynced)
+DB_DURABILITY = os.environ.get("LOAN_DB_DURABILITY", "normal")
+DB_POOL_SIZE = int(os.environ.get("LOAN_DB_POOL_SIZE", "8"))
+# Prepared statements kept per connection by the sqlite3 module
+STATEMENT_CACHE_SIZE = 256
+# INSERT/UPDATE ... RETURNING needs SQLite 3.35+
+SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
  
 app = Flask(__name__)
  
  
 # ---------- DB Utilities ----------
  
+class ConnectionPool:
+    """
+    Keeps up to `size` warm connections so requests don't pay for
+    connect + PRAGMA setup each time. Connections are created lazily and
+    the pool is rebuilt after a fork (SQLite handles must not cross processes).
+    """
+
+    def __init__(self, database: str, size: int):
+        self.database = database
+        self.size = size
+        self._idle = ProcessLocal(queue.LifoQueue)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.database, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout = 5000")
+        if DB_DURABILITY == "full":
+            conn.execute("PRAGMA journal_mode = DELETE")
+            conn.execute("PRAGMA synchronous = FULL")
+        else:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get().get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        idle = self._idle.get()
+        if idle.qsize() < self.size:
+            idle.put(conn)
+        else:
+            conn.close()
+
+
+pool = ConnectionPool(DATABASE, DB_POOL_SIZE)
+
+
 def get_db():
     """
-    Get a per-request DB connection stored in Flask's 'g'.
+    Get a per-request DB connection stored in Flask's 'g', checked out of the pool.
     Sets row_factory to sqlite3.Row so rows behave like dicts.
     """
     if "db" not in g:
-        conn = sqlite3.connect(DATABASE)
-        conn.row_factory = sqlite3.Row
-        g.db = conn
+        g.db = pool.acquire()
     return g.db
  
 @app.teardown_appcontext
 def close_db(exception=None):
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        pool.release(db)
  
 def init_db():
     with sqlite3.connect(DATABASE) as conn:
@@ -44,16 +103,138 @@ def init_db():
                 Loan_Amount_Term INTEGER,
                 Credit_History INTEGER,
                 Property_Area TEXT,
-                Prediction INTEGER
+                Prediction INTEGER,
+                Idempotency_Key TEXT
             )
             """
         )
+        # Databases created before bulk import existed lack the idempotency column
+        columns = {r[1] for r in c.execute("PRAGMA table_info(applicants)")}
+        if "Idempotency_Key" not in columns:
+            c.execute("ALTER TABLE applicants ADD COLUMN Idempotency_Key TEXT")
         # Optional: useful indexes for filtering/sorting (adjust as needed)
         c.execute("CREATE INDEX IF NOT EXISTS idx_prediction ON applicants(Prediction)")
         c.execute("CREATE INDEX IF NOT EXISTS idx_property_area ON applicants(Property_Area)")
+        # NULL keys never conflict, so rows without a key are always inserted
+        c.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_idempotency_key ON applicants(Idempotency_Key)")
+        init_rollups(conn)
+        init_table_versions(conn)
         conn.commit()
  
-# Initialize DB on import
+# ---------- KPI rollups ----------
+# applicant_rollup holds one row per (Property_Area, Credit_History, Prediction)
+# group with its applicant count. Triggers keep it in step with every insert,
+# update and delete, so dashboard KPIs read O(groups) rows instead of scanning
+# applicants. Keys may be NULL, hence the null-safe "IS" comparisons.
+ 
+ROLLUP_KEYS = ["Property_Area", "Credit_History", "Prediction"]
+ 
+def _rollup_match(prefix: str) -> str:
+    return " AND ".join(f"{k} IS {prefix}.{k}" for k in ROLLUP_KEYS)
+ 
+def _rollup_bump(prefix: str, delta: str) -> str:
+    if delta == "+ 1":
+        return (
+            f"INSERT INTO applicant_rollup ({', '.join(ROLLUP_KEYS)}, n) "
+            f"SELECT {', '.join(f'{prefix}.{k}' for k in ROLLUP_KEYS)}, 0 "
+            f"WHERE NOT EXISTS (SELECT 1 FROM applicant_rollup WHERE {_rollup_match(prefix)}); "
+            f"UPDATE applicant_rollup SET n = n + 1 WHERE {_rollup_match(prefix)};"
+        )
+    return (
+        f"UPDATE applicant_rollup SET n = n - 1 WHERE {_rollup_match(prefix)}; "
+        f"DELETE FROM applicant_rollup WHERE n <= 0 AND {_rollup_match(prefix)};"
+    )
+ 
+def init_rollups(conn: sqlite3.Connection):
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'applicant_rollup'"
+    ).fetchone()
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS applicant_rollup (
+            Property_Area TEXT,
+            Credit_History INTEGER,
+            Prediction INTEGER,
+            n INTEGER NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_applicant_rollup ON applicant_rollup(" + ", ".join(ROLLUP_KEYS) + ")"
+    )
+    conn.executescript(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_insert AFTER INSERT ON applicants BEGIN
+            {_rollup_bump("NEW", "+ 1")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_delete AFTER DELETE ON applicants BEGIN
+            {_rollup_bump("OLD", "- 1")}
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_update AFTER UPDATE OF {", ".join(ROLLUP_KEYS)} ON applicants BEGIN
+            {_rollup_bump("OLD", "- 1")}
+            {_rollup_bump("NEW", "+ 1")}
+        END;
+        """
+    )
+    if not exists:
+        rebuild_rollups(conn)
+ 
+def rebuild_rollups(conn: sqlite3.Connection):
+    """Recompute applicant_rollup from scratch (run inside one transaction)."""
+    with conn:
+        conn.execute("DELETE FROM applicant_rollup")
+        conn.execute(
+            f"INSERT INTO applicant_rollup ({', '.join(ROLLUP_KEYS)}, n) "
+            f"SELECT {', '.join(ROLLUP_KEYS)}, COUNT(*) FROM applicants GROUP BY {', '.join(ROLLUP_KEYS)}"
+        )
+ 
+def check_rollups(conn: sqlite3.Connection):
+    """Return the groups whose rollup count differs from a full recount (empty list = consistent)."""
+    keys = ", ".join(ROLLUP_KEYS)
+    actual = {tuple(r[:-1]): r[-1] for r in conn.execute(f"SELECT {keys}, COUNT(*) FROM applicants GROUP BY {keys}")}
+    stored = {tuple(r[:-1]): r[-1] for r in conn.execute(f"SELECT {keys}, n FROM applicant_rollup")}
+    return [
+        {**dict(zip(ROLLUP_KEYS, group)), "expected": actual.get(group, 0), "stored": stored.get(group, 0)}
+        for group in sorted(set(actual) | set(stored), key=repr)
+        if actual.get(group, 0) != stored.get(group, 0)
+    ]
+ 
+# ---------- Table version (ETags) ----------
+# table_versions.version is bumped by triggers on every change to applicants,
+# so read endpoints can answer If-None-Match with 304 without running their query.
+ 
+def init_table_versions(conn: sqlite3.Connection):
+    conn.execute("CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+    conn.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES ('applicants', 0)")
+    bump = "UPDATE table_versions SET version = version + 1 WHERE name = 'applicants';"
+    conn.executescript(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_version_insert AFTER INSERT ON applicants BEGIN {bump} END;
+        CREATE TRIGGER IF NOT EXISTS trg_version_update AFTER UPDATE ON applicants BEGIN {bump} END;
+        CREATE TRIGGER IF NOT EXISTS trg_version_delete AFTER DELETE ON applicants BEGIN {bump} END;
+        """
+    )
+ 
+def table_version(db: sqlite3.Connection, name: str = "applicants") -> int:
+    row = db.execute("SELECT version FROM table_versions WHERE name = ?", (name,)).fetchone()
+    return row["version"] if row else 0
+ 
+def etag_by_table_version(view):
+    """Tag successful GET responses with the applicants table version and honour If-None-Match."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = f"applicants-v{table_version(get_db())}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.is_streamed:
+            response.set_etag(etag)
+        return response
+    return wrapper
+ 
+# Initialize DB on import (after every helper init_db relies on is defined)
 init_db()
  
  
@@ -86,6 +267,46 @@ UPDATABLE_COLUMNS = {
     "Prediction",
 }
  
+INSERT_APPLICANT_SQL = (
+    "INSERT INTO applicants (" + ", ".join(REQUIRED_FIELDS) + ") "
+    "VALUES (" + ", ".join("?" * len(REQUIRED_FIELDS)) + ")"
+)
+ 
+BULK_COLUMNS = REQUIRED_FIELDS + ["Idempotency_Key"]
+BULK_CHUNK_SIZE = 1000
+BULK_INSERT_SQL = (
+    "INSERT INTO applicants (" + ", ".join(BULK_COLUMNS) + ") "
+    "VALUES (" + ", ".join("?" * len(BULK_COLUMNS)) + ") "
+    "ON CONFLICT(Idempotency_Key) DO NOTHING"
+)
+BULK_UPSERT_SQL = (
+    "INSERT INTO applicants (" + ", ".join(BULK_COLUMNS) + ") "
+    "VALUES (" + ", ".join("?" * len(BULK_COLUMNS)) + ") "
+    "ON CONFLICT(Idempotency_Key) DO UPDATE SET "
+    + ", ".join(f"{f} = excluded.{f}" for f in REQUIRED_FIELDS)
+)
+ 
+def read_json_records():
+    """Parse the request body as a JSON array or NDJSON (one object per line)."""
+    body = request.get_data(as_text=True).strip()
+    if not body:
+        return []
+    if request.mimetype in ("application/x-ndjson", "application/jsonl") or not body.startswith("["):
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    return json.loads(body)
+ 
+def update_and_fetch(db: sqlite3.Connection, sql: str, values, applicant_id: int):
+    """Run an UPDATE ... WHERE id = ? and return the updated row (None if no such id)."""
+    if SUPPORTS_RETURNING:
+        row = db.execute(sql + " RETURNING *", values).fetchone()
+        db.commit()
+        return row
+    cur = db.execute(sql, values)
+    db.commit()
+    if cur.rowcount == 0:
+        return None
+    return db.execute("SELECT * FROM applicants WHERE id = ?", (applicant_id,)).fetchone()
+ 
 def row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
     return {k: row[k] for k in row.keys()}
  
@@ -119,40 +340,250 @@ def health():
     return jsonify({"status": "ok"}), 200
  
  
+def applicant_filters():
+    """
+    WHERE clauses and params for the shared prediction/property_area query filters.
+    Each filter may be repeated (?property_area=Urban&property_area=Rural) to match any value.
+    """
+    predictions = request.args.getlist("prediction", type=int)
+    property_areas = [a for a in request.args.getlist("property_area") if a]
+    clauses = []
+    params = []
+ 
+    if predictions:
+        clauses.append(f"Prediction IN ({', '.join('?' * len(predictions))})")
+        params.extend(predictions)
+    if property_areas:
+        clauses.append(f"Property_Area IN ({', '.join('?' * len(property_areas))})")
+        params.extend(property_areas)
+    return clauses, params
+ 
+ 
+def where_sql(clauses, *extra) -> str:
+    clauses = list(clauses) + list(extra)
+    return " WHERE " + " AND ".join(clauses) if clauses else ""
+ 
+ 
+def stream_rows(cursor, fmt: str):
+    """Yield rows straight from the cursor as NDJSON lines or as one chunked JSON array."""
+    if fmt == "ndjson":
+        for row in cursor:
+            yield json.dumps(row_to_dict(row)) + "\n"
+        return
+    yield "["
+    first = True
+    for row in cursor:
+        yield ("" if first else ",") + json.dumps(row_to_dict(row))
+        first = False
+    yield "]"
+ 
+ 
 @app.route("/applicants", methods=["GET"])
+@etag_by_table_version
 def get_applicants():
     """
     Optional query params: limit, offset, prediction, property_area
     e.g., /applicants?limit=50&offset=0&prediction=1&property_area=Urban
+
+    Keyset pagination (preferred over offset, cost does not grow with depth):
+      before_id=N  -> the next `limit` rows with id < N (older rows)
+      after_id=N   -> the `limit` rows with id > N closest to N (newer rows)
+    Results are always newest first; X-Next-Before-Id / X-Prev-After-Id
+    response headers carry the cursors for the following/previous page.
+
+    format=ndjson or format=json_stream streams rows from the cursor instead of
+    building the whole list; with streaming, limit is optional (all rows).
     """
     db = get_db()
-    limit = request.args.get("limit", type=int) or 100
+    fmt = request.args.get("format", "json")
+    streaming = fmt in ("ndjson", "json_stream")
+    limit = request.args.get("limit", type=int) or (None if streaming else 100)
     offset = request.args.get("offset", type=int) or 0
-    prediction = request.args.get("prediction", type=int)
-    property_area = request.args.get("property_area", type=str)
+    before_id = request.args.get("before_id", type=int)
+    after_id = request.args.get("after_id", type=int)
  
     sql = "SELECT * FROM applicants"
-    clauses = []
-    params = []
- 
-    if prediction is not None:
-        clauses.append("Prediction = ?")
-        params.append(prediction)
-    if property_area:
-        clauses.append("Property_Area = ?")
-        params.append(property_area)
+    clauses, params = applicant_filters()
+    if before_id is not None:
+        clauses.append("id < ?")
+        params.append(before_id)
+    if after_id is not None:
+        clauses.append("id > ?")
+        params.append(after_id)
  
     if clauses:
         sql += " WHERE " + " AND ".join(clauses)
  
-    sql += " ORDER BY id DESC LIMIT ? OFFSET ?"
-    params.extend([limit, offset])
+    # Paging towards newer rows has to walk the index upwards from after_id
+    ascending = after_id is not None and before_id is None
+    sql += " ORDER BY id ASC" if ascending else " ORDER BY id DESC"
+    use_offset = offset and before_id is None and after_id is None
+    if limit is not None or use_offset:
+        sql += " LIMIT ?"
+        params.append(limit if limit is not None else -1)
+    if use_offset:
+        sql += " OFFSET ?"
+        params.append(offset)
+ 
+    if streaming and not ascending:
+        mimetype = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+        cursor = db.execute(sql, params)
+        return Response(stream_with_context(stream_rows(cursor, fmt)), mimetype=mimetype)
  
     rows = db.execute(sql, params).fetchall()
-    return jsonify([row_to_dict(r) for r in rows]), 200
+    if ascending:
+        rows.reverse()
+    if streaming:
+        mimetype = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+        return Response(stream_rows(rows, fmt), mimetype=mimetype)
+ 
+    response = jsonify([row_to_dict(r) for r in rows])
+    if rows:
+        response.headers["X-Next-Before-Id"] = str(rows[-1]["id"])
+        response.headers["X-Prev-After-Id"] = str(rows[0]["id"])
+    return response, 200
+ 
+ 
+# ---------- Aggregates for the dashboard ----------
+# Summary, Property_Area and Credit_History stats read the trigger-maintained
+# applicant_rollup table; only the income histogram still scans applicants.
+ 
+INCOME_COLUMNS = ["ApplicantIncome", "CoapplicantIncome"]
+ 
+def nice_bin_step(span: float, maxbins: int) -> float:
+    """Pick a 1/2/5 x 10^k bin width giving at most `maxbins` bins (same rule as Vega-Lite's bin)."""
+    if span <= 0:
+        return 1.0
+    level = math.ceil(math.log10(maxbins))
+    step = 10 ** (round(math.log10(span)) - level)
+    while math.ceil(span / step) > maxbins:
+        step *= 10
+    for div in (5, 2):
+        if span / (step / div) <= maxbins:
+            step /= div
+            break
+    return step
+ 
+def stats_summary(db, clauses, params) -> Dict[str, Any]:
+    row = db.execute(
+        "SELECT COALESCE(SUM(n), 0) AS total, COALESCE(SUM(CASE WHEN Prediction = 1 THEN n END), 0) AS approved"
+        " FROM applicant_rollup" + where_sql(clauses, "Prediction IS NOT NULL"),
+        params,
+    ).fetchone()
+    total, approved = row["total"], row["approved"]
+    return {
+        "approved": approved,
+        "total": total,
+        "approval_rate": (approved / total * 100) if total > 0 else 0,
+    }
+ 
+def stats_property_area(db, clauses, params):
+    rows = db.execute(
+        "SELECT Property_Area, SUM(n) AS Count FROM applicant_rollup"
+        + where_sql(clauses, "Property_Area IS NOT NULL")
+        + " GROUP BY Property_Area ORDER BY Count DESC",
+        params,
+    ).fetchall()
+    return [row_to_dict(r) for r in rows]
+ 
+def stats_credit_history(db, clauses, params):
+    rows = db.execute(
+        "SELECT Credit_History, COALESCE(SUM(CASE WHEN Prediction IS NOT NULL THEN n END), 0) AS total,"
+        " COALESCE(SUM(CASE WHEN Prediction = 1 THEN n END), 0) AS approved"
+        " FROM applicant_rollup" + where_sql(clauses, "Credit_History IS NOT NULL")
+        + " GROUP BY Credit_History ORDER BY Credit_History",
+        params,
+    ).fetchall()
+    result = []
+    for r in rows:
+        item = row_to_dict(r)
+        item["ApprovalRate%"] = (item["approved"] / item["total"] * 100) if item["total"] > 0 else 0
+        result.append(item)
+    return result
+ 
+MAX_HISTOGRAM_BINS = 1000
+ 
+def requested_maxbins():
+    """The maxbins query parameter (default 30), or None unless it is between 1 and MAX_HISTOGRAM_BINS."""
+    maxbins = request.args.get("maxbins", 30, type=int)
+    return maxbins if 1 <= maxbins <= MAX_HISTOGRAM_BINS else None
+ 
+def maxbins_error():
+    return jsonify({"error": f"maxbins must be an integer between 1 and {MAX_HISTOGRAM_BINS}."}), 400
+ 
+def stats_income_histogram(db, clauses, params, maxbins: int) -> Dict[str, Any]:
+    """Counts per income bin, with one shared set of bins for applicant and coapplicant income."""
+    bounds = db.execute(
+        "SELECT " + ", ".join(f"MIN({c}), MAX({c})" for c in INCOME_COLUMNS) + " FROM applicants" + where_sql(clauses),
+        params,
+    ).fetchone()
+    values = [v for v in bounds if v is not None]
+    if not values:
+        return {"step": None, "bins": []}
+    low, high = min(values), max(values)
+    step = nice_bin_step(high - low, maxbins)
+    start = math.floor(low / step) * step
+ 
+    bins = []
+    for column in INCOME_COLUMNS:
+        rows = db.execute(
+            f"SELECT CAST(({column} - ?) / ? AS INTEGER) AS bin, COUNT(*) AS count FROM applicants"
+            + where_sql(clauses, f"{column} IS NOT NULL")
+            + " GROUP BY bin ORDER BY bin",
+            [start, step] + params,
+        ).fetchall()
+        for r in rows:
+            bins.append({
+                "Type": column,
+                "bin_start": start + r["bin"] * step,
+                "bin_end": start + (r["bin"] + 1) * step,
+                "count": r["count"],
+            })
+    return {"step": step, "bins": bins}
+ 
+ 
+@app.route("/applicants/stats", methods=["GET"])
+@etag_by_table_version
+def applicant_stats():
+    """
+    Every dashboard aggregate in one round trip.
+    Accepts the same prediction/property_area filters as GET /applicants, plus maxbins (default 30).
+    """
+    db = get_db()
+    clauses, params = applicant_filters()
+    maxbins = requested_maxbins()
+    if maxbins is None:
+        return maxbins_error()
+    return jsonify({
+        "summary": stats_summary(db, clauses, params),
+        "property_area": stats_property_area(db, clauses, params),
+        "credit_history": stats_credit_history(db, clauses, params),
+        "income_histogram": stats_income_histogram(db, clauses, params, maxbins),
+    }), 200
+ 
+ 
+@app.route("/applicants/stats/<string:name>", methods=["GET"])
+@etag_by_table_version
+def applicant_stat(name: str):
+    """Single aggregate: summary, property_area, credit_history or income_histogram."""
+    db = get_db()
+    clauses, params = applicant_filters()
+    if name == "summary":
+        return jsonify(stats_summary(db, clauses, params)), 200
+    if name == "property_area":
+        return jsonify(stats_property_area(db, clauses, params)), 200
+    if name == "credit_history":
+        return jsonify(stats_credit_history(db, clauses, params)), 200
+    if name == "income_histogram":
+        maxbins = requested_maxbins()
+        if maxbins is None:
+            return maxbins_error()
+        return jsonify(stats_income_histogram(db, clauses, params, maxbins)), 200
+    return jsonify({"error": f"Unknown stat '{name}'."}), 404
  
  
 @app.route("/applicants/<int:applicant_id>", methods=["GET"])
+@etag_by_table_version
 def get_applicant(applicant_id: int):
     db = get_db()
     row = db.execute("SELECT * FROM applicants WHERE id = ?", (applicant_id,)).fetchone()
@@ -169,34 +600,83 @@ def add_applicant():
         return jsonify({"error": err}), 400
  
     db = get_db()
-    cur = db.cursor()
-    cur.execute(
-        """
-        INSERT INTO applicants
-        (Married, Education, Self_Employed, ApplicantIncome, CoapplicantIncome,
-         LoanAmount, Loan_Amount_Term, Credit_History, Property_Area, Prediction)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            payload["Married"],
-            payload["Education"],
-            payload["Self_Employed"],
-            payload["ApplicantIncome"],
-            payload["CoapplicantIncome"],
-            payload["LoanAmount"],
-            payload["Loan_Amount_Term"],
-            payload["Credit_History"],
-            payload["Property_Area"],
-            payload["Prediction"],
-        ),
-    )
-    db.commit()
-    new_id = cur.lastrowid
- 
-    row = db.execute("SELECT * FROM applicants WHERE id = ?", (new_id,)).fetchone()
+    values = tuple(payload[f] for f in REQUIRED_FIELDS)
+    if SUPPORTS_RETURNING:
+        row = db.execute(INSERT_APPLICANT_SQL + " RETURNING *", values).fetchone()
+        db.commit()
+    else:
+        cur = db.execute(INSERT_APPLICANT_SQL, values)
+        db.commit()
+        row = db.execute("SELECT * FROM applicants WHERE id = ?", (cur.lastrowid,)).fetchone()
     return jsonify(row_to_dict(row)), 201
  
  
+@app.route("/applicants/bulk", methods=["POST"])
+def bulk_add_applicants():
+    """
+    Insert many applicants from a JSON array or NDJSON body.
+    Query params: mode=insert|upsert (default insert), chunk_size (default 1000).
+
+    Each row is validated with the same rules as POST /applicants; invalid rows
+    are reported in "errors" and do not abort the batch. Valid rows are written
+    with executemany, one transaction per chunk. A row may carry an
+    "Idempotency_Key": in insert mode a key that already exists is skipped (safe
+    retries), in upsert mode the existing row is overwritten.
+    """
+    try:
+        records = read_json_records()
+    except ValueError as e:
+        return jsonify({"error": f"Invalid JSON body: {e}"}), 400
+    if not isinstance(records, list):
+        return jsonify({"error": "Body must be a JSON array or NDJSON of applicant objects."}), 400
+
+    mode = request.args.get("mode", "insert")
+    if mode not in ("insert", "upsert"):
+        return jsonify({"error": "mode must be 'insert' or 'upsert'."}), 400
+    sql = BULK_UPSERT_SQL if mode == "upsert" else BULK_INSERT_SQL
+    chunk_size = request.args.get("chunk_size", BULK_CHUNK_SIZE, type=int)
+    if chunk_size < 1:
+        return jsonify({"error": "chunk_size must be a positive integer."}), 400
+
+    errors = []
+    valid = []
+    for index, payload in enumerate(records):
+        ok, err = validate_payload(payload, required=True)
+        if ok and payload.get("Idempotency_Key") is not None and not isinstance(payload["Idempotency_Key"], str):
+            ok, err = False, "Field 'Idempotency_Key' must be a string."
+        if not ok:
+            errors.append({"index": index, "error": err})
+            continue
+        valid.append((index, tuple(payload.get(f) for f in BULK_COLUMNS)))
+
+    db = get_db()
+    written = 0
+    failed = 0
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        try:
+            with db:
+                written += db.executemany(sql, [values for _, values in chunk]).rowcount
+        except sqlite3.Error:
+            # Isolate the offending rows instead of failing the whole chunk
+            with db:
+                for index, values in chunk:
+                    try:
+                        written += db.execute(sql, values).rowcount
+                    except sqlite3.Error as e:
+                        failed += 1
+                        errors.append({"index": index, "error": str(e)})
+
+    result = {
+        "received": len(records),
+        "written": written,
+        "errors": sorted(errors, key=lambda e: e["index"]),
+    }
+    if mode == "insert":
+        result["skipped_duplicates"] = len(valid) - written - failed
+    return jsonify(result), 200
+ 
+ 
 @app.route("/applicants/<int:applicant_id>", methods=["PUT"])
 def update_applicant(applicant_id: int):
     """
@@ -225,11 +705,9 @@ def update_applicant(applicant_id: int):
                 return jsonify({"error": f"Field '{column}' must be an integer."}), 400
  
         sql = f"UPDATE applicants SET {column} = ? WHERE id = ?"
-        cur = db.execute(sql, (payload["new_value"], applicant_id))
-        db.commit()
-        if cur.rowcount == 0:
+        row = update_and_fetch(db, sql, (payload["new_value"], applicant_id), applicant_id)
+        if row is None:
             return jsonify({"error": "Applicant not found"}), 404
-        row = db.execute("SELECT * FROM applicants WHERE id = ?", (applicant_id,)).fetchone()
         return jsonify(row_to_dict(row)), 200
  
     # Support multi-field update
@@ -251,11 +729,9 @@ def update_applicant(applicant_id: int):
  
         values.append(applicant_id)
         sql = f"UPDATE applicants SET {', '.join(updates)} WHERE id = ?"
-        cur = db.execute(sql, values)
-        db.commit()
-        if cur.rowcount == 0:
+        row = update_and_fetch(db, sql, values, applicant_id)
+        if row is None:
             return jsonify({"error": "Applicant not found"}), 404
-        row = db.execute("SELECT * FROM applicants WHERE id = ?", (applicant_id,)).fetchone()
         return jsonify(row_to_dict(row)), 200
  
     return jsonify({"error": "Provide either 'column' and 'new_value', or 'data' object."}), 400
@@ -271,6 +747,29 @@ def delete_applicant(applicant_id: int):
     return jsonify({"status": "deleted", "id": applicant_id}), 200
  
  
+# ---------- CLI ----------
+ 
+@app.cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    """Recompute the KPI rollup table from the applicants table."""
+    with sqlite3.connect(DATABASE) as conn:
+        rebuild_rollups(conn)
+    click.echo("applicant_rollup rebuilt.")
+ 
+ 
+@app.cli.command("check-rollups")
+def check_rollups_command():
+    """Compare the KPI rollup table against a full recount."""
+    with sqlite3.connect(DATABASE) as conn:
+        mismatches = check_rollups(conn)
+    if not mismatches:
+        click.echo("applicant_rollup is consistent.")
+        return
+    for m in mismatches:
+        click.echo(m, err=True)
+    raise SystemExit(1)
+ 
+ 
 # ---------- Entrypoint ----------
  
 if __name__ == "__main__":
@@ -1,9 +1,10 @@
 import streamlit as st
 import joblib
 import pandas as pd
-import requests
 import altair as alt
 
+from common.api_client import ApiClient
+
 st.set_page_config(page_title="Loan Prediction App", page_icon="📊", layout="wide")
 st.title("📊 Loan Prediction App (Frontend via Streamlit)")
 
@@ -14,6 +15,12 @@ def load_model():
 
 model = load_model()
 
+@st.cache_resource
+def get_client():
+    return ApiClient("http://localhost:5000")
+
+client = get_client()
+
 # ---------- Sidebar inputs ----------
 st.sidebar.header("Enter Applicant Details")
 married = st.sidebar.selectbox("Married", ["Yes", "No"])
@@ -46,7 +53,7 @@ if st.button("Predict and Save"):
     try:
         prediction = int(model.predict(pd.DataFrame([input_data]))[0])
         input_data["Prediction"] = prediction
-        res = requests.post("http://localhost:5000/applicants", json=input_data)
+        res = client.post("/applicants", json=input_data)
         if res.status_code in (200, 201):
             if prediction == 1:
                 st.success("🎉 Loan Approved and Saved!")
@@ -60,9 +67,9 @@ if st.button("Predict and Save"):
 # ---------- Fetch applicants ----------
 st.subheader("📂 Saved Applicants")
 
-def fetch_applicants(limit=1000):
+def fetch_applicants(limit=1000, filters=None):
     try:
-        res = requests.get(f"http://localhost:5000/applicants?limit={limit}")
+        res = client.get("/applicants", params={"limit": limit, **(filters or {})})
         if res.status_code == 200:
             return pd.DataFrame(res.json())
         else:
@@ -72,38 +79,47 @@ def fetch_applicants(limit=1000):
         st.error(f"API error: {e}")
         return pd.DataFrame()
 
-applicants_df = fetch_applicants()
+# Aggregates are computed in SQL by the backend; only the small results come over the wire
+def fetch_stats(filters=None, maxbins=30):
+    try:
+        res = client.get("/applicants/stats", params={"maxbins": maxbins, **(filters or {})})
+        if res.status_code == 200:
+            return res.json()
+        st.error(f"Could not fetch stats: {res.status_code}")
+    except Exception as e:
+        st.error(f"API error: {e}")
+    return None
+
+all_stats = fetch_stats()
 
-if applicants_df.empty:
+if not all_stats or all_stats["summary"]["total"] == 0:
     st.info("No applicants found yet. Create one using the sidebar!")
 else:
-    # Ensure correct dtypes for charts
-    int_cols = ["ApplicantIncome", "CoapplicantIncome", "LoanAmount", "Loan_Amount_Term", "Credit_History", "Prediction", "id"]
-    for c in int_cols:
-        if c in applicants_df.columns:
-            applicants_df[c] = pd.to_numeric(applicants_df[c], errors="coerce").astype("Int64")
-
     # ---------- Filters for analytics ----------
     with st.expander("🔍 Filter Data"):
         col1, col2 = st.columns(2)
         with col1:
-            area_filter = st.multiselect("Filter by Property Area", options=sorted(applicants_df["Property_Area"].dropna().unique().tolist()))
+            area_filter = st.multiselect("Filter by Property Area", options=sorted(a["Property_Area"] for a in all_stats["property_area"]))
         with col2:
             prediction_filter = st.multiselect("Filter by Prediction (0 = Not Approved, 1 = Approved)", options=[0, 1])
 
-    filtered_df = applicants_df.copy()
-    if area_filter:
-        filtered_df = filtered_df[filtered_df["Property_Area"].isin(area_filter)]
-    if prediction_filter:
-        filtered_df = filtered_df[filtered_df["Prediction"].isin(prediction_filter)]
+    filters = {"property_area": area_filter, "prediction": prediction_filter}
+    stats = fetch_stats(filters) if (area_filter or prediction_filter) else all_stats
+    filtered_df = fetch_applicants(filters=filters)
+
+    # Ensure correct dtypes for charts
+    int_cols = ["ApplicantIncome", "CoapplicantIncome", "LoanAmount", "Loan_Amount_Term", "Credit_History", "Prediction", "id"]
+    for c in int_cols:
+        if c in filtered_df.columns:
+            filtered_df[c] = pd.to_numeric(filtered_df[c], errors="coerce").astype("Int64")
 
     st.write("🗃️ Current filtered dataset:")
     st.dataframe(filtered_df, use_container_width=True)
 
     # ---------- KPI: Approval Rate ----------
-    approved = int((filtered_df["Prediction"] == 1).sum())
-    total = int(filtered_df["Prediction"].count())
-    approval_rate = (approved / total * 100) if total > 0 else 0
+    approved = stats["summary"]["approved"]
+    total = stats["summary"]["total"]
+    approval_rate = stats["summary"]["approval_rate"]
 
     kpi_col1, kpi_col2, kpi_col3 = st.columns(3)
     with kpi_col1:
@@ -119,12 +135,12 @@ else:
 
     # ---------- Chart 1: Income distribution ----------
     st.markdown("### 💸 Income Distribution (Applicant & Coapplicant)")
-    income_cols = ["ApplicantIncome", "CoapplicantIncome"]
-    long_income = filtered_df[income_cols].melt(value_name="Income", var_name="Type").dropna()
+    income_bins = pd.DataFrame(stats["income_histogram"]["bins"], columns=["Type", "bin_start", "bin_end", "count"])
 
-    income_hist = alt.Chart(long_income).mark_bar(opacity=0.7).encode(
-        x=alt.X("Income:Q", bin=alt.Bin(maxbins=30), title="Income"),
-        y=alt.Y("count():Q", title="Number of Applicants"),
+    income_hist = alt.Chart(income_bins).mark_bar(opacity=0.7).encode(
+        x=alt.X("bin_start:Q", bin="binned", title="Income"),
+        x2="bin_end:Q",
+        y=alt.Y("count:Q", title="Number of Applicants"),
         color=alt.Color("Type:N", title="Income Type")
     ).properties(height=300)
 
@@ -133,8 +149,7 @@ else:
 
     # ---------- Chart 2: Property area breakdown ----------
     st.markdown("### 🌍 Property Area Breakdown")
-    area_counts = filtered_df["Property_Area"].value_counts(dropna=True).reset_index()
-    area_counts.columns = ["Property_Area", "Count"]
+    area_counts = pd.DataFrame(stats["property_area"], columns=["Property_Area", "Count"])
 
     pie = alt.Chart(area_counts).mark_arc(innerRadius=60).encode(
         theta=alt.Theta("Count:Q"),
@@ -147,15 +162,8 @@ else:
 
     # ---------- Chart 3: Credit history vs approval rate ----------
     st.markdown("### 🧠 Credit History vs Approval Rate")
-    if "Credit_History" in filtered_df.columns and "Prediction" in filtered_df.columns:
-        group = (
-            filtered_df.groupby("Credit_History")["Prediction"]
-            .agg(total="count", approved=lambda s: int((s == 1).sum()))
-            .reset_index()
-        )
-        group["ApprovalRate%"] = group.apply(
-            lambda r: (r["approved"] / r["total"] * 100) if r["total"] > 0 else 0, axis=1
-        )
+    if stats["credit_history"]:
+        group = pd.DataFrame(stats["credit_history"])
 
         bar = alt.Chart(group).mark_bar().encode(
             x=alt.X("Credit_History:O", title="Credit History (higher is better)"),
@@ -203,8 +211,8 @@ if st.button("Update Record"):
         casted_value = cast_value(column_to_edit, new_value)
         if casted_value is not None:
             try:
-                res = requests.put(
-                    f"http://localhost:5000/applicants/{applicant_id}",
+                res = client.put(
+                    f"/applicants/{applicant_id}",
                     json={"column": column_to_edit, "new_value": casted_value}
                 )
                 if res.status_code == 200:
@@ -1,10 +1,81 @@
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, jsonify, request, render_template, Response, stream_with_context
 import pandas as pd
-import joblib
+import json
+import os
+import time
+from micro_batcher import MicroBatcher
+
+from common.mmap_artifacts import load_artifact
+from common.model_registry import HotModel
+from common.result_cache import from_env, json_key
 
 app = Flask(__name__)
 
-model_pipeline_loaded = joblib.load("loan_pretrained.pkl")
+MODEL_PATH = os.environ.get("LOAN_MODEL_PATH", "loan_pretrained.pkl")
+
+class LoanModel:
+    """The fitted sklearn pipeline plus, when it verified, its compiled fast path."""
+
+    def __init__(self, pipeline, compiled=None):
+        self.pipeline = pipeline
+        self.compiled = compiled
+
+    def predict(self, records):
+        if self.compiled is not None:
+            return self.compiled.predict(records)
+        return self.pipeline.predict(pd.DataFrame.from_records(records))
+
+def build_model(paths):
+    """
+    Load the pickled pipeline and, when possible, its pure-NumPy fast path
+    (see compiled_pipeline.py). The compiled scorer is only used when it
+    reproduces the sklearn pipeline bit for bit on the training rows.
+    """
+    pipeline = load_artifact(paths["model"])
+    compiled = None
+    try:
+        from compiled_pipeline import compile_pipeline, verify
+        candidate = compile_pipeline(pipeline)
+        sample = pd.read_csv("final_to_train.csv")[candidate.numeric_columns + candidate.categorical_columns]
+        if verify(pipeline, candidate, sample):
+            compiled = candidate
+        else:
+            app.logger.warning("Compiled pipeline does not match sklearn output, using sklearn.")
+    except Exception as e:
+        app.logger.warning("Compiled pipeline unavailable, using sklearn: %s", e)
+    return LoanModel(pipeline, compiled)
+
+# Active "loan" version from the model registry (falls back to MODEL_PATH),
+# hot-swapped between requests; see common/model_registry.py
+models = HotModel(
+    "loan",
+    build_model,
+    {"model": MODEL_PATH},
+    poll_interval=float(os.environ.get("LOAN_MODEL_POLL_SECONDS", "2")),
+)
+
+# Rows scored per pipeline call on /predict/batch (override with ?chunk_size=)
+BATCH_CHUNK_SIZE = 5000
+
+# Opt-in request coalescing for /predict: LOAN_MICRO_BATCH=1 enables it,
+# LOAN_BATCH_WAIT_MS / LOAN_BATCH_MAX_ROWS tune the window.
+MICRO_BATCH_ENABLED = os.environ.get("LOAN_MICRO_BATCH", "0") == "1"
+
+def score_records(records):
+    return models.get().value.predict(records)
+
+# Results of recently seen applicants, keyed by their canonical JSON and the model
+# version (LOAN_CACHE_SIZE entries, LOAN_CACHE_TTL seconds, optional LOAN_CACHE_DB)
+result_cache = from_env("LOAN")
+
+batcher = None
+if MICRO_BATCH_ENABLED:
+    batcher = MicroBatcher(
+        score_records,
+        max_wait_ms=float(os.environ.get("LOAN_BATCH_WAIT_MS", "2")),
+        max_batch_size=int(os.environ.get("LOAN_BATCH_MAX_ROWS", "64")),
+    )
+
 @app.route('/')
 def home():
     return render_template('form.html')
@@ -13,13 +84,95 @@ def home():
 def predict():
 
     data = request.get_json()
-    df= pd.DataFrame(data, index=[0])
-    prediction = model_pipeline_loaded.predict(df)
-    print(prediction)
-    return jsonify({       
-        "predicted_output": int(prediction[0])
+    current = models.get()
+    key = json_key(data, current.version)
+    predicted = result_cache.get(key)
+    if predicted is not None:
+        return jsonify({"predicted_output": predicted})
+
+    if batcher is not None:
+        predicted = int(batcher.predict(data))
+    else:
+        prediction = current.value.predict([data])
+        app.logger.debug("Prediction: %s", prediction)
+        predicted = int(prediction[0])
+    result_cache.put(key, predicted)
+    return jsonify({
+        "predicted_output": predicted
     })
-app.run(port=5000, debug=False, use_reloader=False)
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    model = models.get()
+    info = {
+        "model_version": model.version,
+        "compiled": model.value.compiled is not None,
+        "result_cache": result_cache.stats(),
+    }
+    if batcher is None:
+        return jsonify({**info, "micro_batching": False})
+    return jsonify({**info, "micro_batching": True, **batcher.stats()})
+
+def read_batch_records():
+    """
+    Parse the request body as either a JSON array of applicants or
+    NDJSON (one applicant object per line).
+    """
+    body = request.get_data(as_text=True).strip()
+    if not body:
+        return []
+    if request.mimetype in ("application/x-ndjson", "application/jsonl") or not body.startswith("["):
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    return json.loads(body)
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    Score many applicants in one call.
+
+    Body: JSON array or NDJSON. Query param: chunk_size (default BATCH_CHUNK_SIZE).
+    Response is streamed as NDJSON: one {"index", "predicted_output"} line per
+    applicant, followed by one {"chunk", "rows", "seconds"} timing line per chunk.
+    If a chunk cannot be scored, the stream ends with one {"error", "chunk",
+    "index"} line naming the first row of that chunk.
+    """
+    try:
+        records = read_batch_records()
+    except ValueError as e:
+        return jsonify({"error": f"Invalid JSON body: {e}"}), 400
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        return jsonify({"error": "Body must be a JSON array or NDJSON of applicant objects."}), 400
+
+    chunk_size = request.args.get("chunk_size", BATCH_CHUNK_SIZE, type=int)
+    if chunk_size < 1:
+        return jsonify({"error": "chunk_size must be a positive integer."}), 400
+
+    # The whole batch is scored by one model version, even if a swap happens mid-stream
+    model = models.get().value
+
+    def generate():
+        for chunk_no, start in enumerate(range(0, len(records), chunk_size)):
+            chunk = records[start:start + chunk_size]
+            started = time.perf_counter()
+            try:
+                predictions = model.predict(chunk)
+            except Exception as e:
+                # Headers are already sent, so the failure is reported in-band
+                app.logger.exception("Scoring chunk %d of /predict/batch failed", chunk_no)
+                yield json.dumps({"error": f"Could not score rows: {e}", "chunk": chunk_no, "index": start}) + "\n"
+                return
+            elapsed = time.perf_counter() - started
+
+            lines = [
+                json.dumps({"index": start + i, "predicted_output": int(p)})
+                for i, p in enumerate(predictions)
+            ]
+            lines.append(json.dumps({"chunk": chunk_no, "rows": len(chunk), "seconds": round(elapsed, 6)}))
+            yield "\n".join(lines) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    # Single-process dev server; use serve.py for multi-worker serving
+    app.run(port=5000, debug=False, use_reloader=False)
+
@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from common.process_local import ProcessLocal
+
+
+class BatcherMetrics:
+    """
+    Counters for the micro-batcher: batch size histogram (power-of-two buckets)
+    and the latency each request spends waiting for its batch to start.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.batch_size_histogram = {}
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, batch_size, waits):
+        bucket = 1
+        while bucket < batch_size:
+            bucket *= 2
+        with self._lock:
+            self.batches += 1
+            self.requests += batch_size
+            self.batch_size_histogram[bucket] = self.batch_size_histogram.get(bucket, 0) + 1
+            self.wait_seconds_total += sum(waits)
+            self.wait_seconds_max = max(self.wait_seconds_max, max(waits))
+
+    def snapshot(self, queue_depth):
+        with self._lock:
+            return {
+                "queue_depth": queue_depth,
+                "batches": self.batches,
+                "requests": self.requests,
+                "mean_batch_size": (self.requests / self.batches) if self.batches else 0.0,
+                "batch_size_histogram": {f"<={k}": v for k, v in sorted(self.batch_size_histogram.items())},
+                "added_latency_ms_mean": (self.wait_seconds_total / self.requests * 1000) if self.requests else 0.0,
+                "added_latency_ms_max": self.wait_seconds_max * 1000,
+            }
+
+
+class MicroBatcher:
+    """
+    Coalesce single-row predictions arriving within `max_wait_ms` (or until
+    `max_batch_size` rows are queued) into one call to `score_batch`.
+
+    `score_batch` receives a list of records and must return one result per
+    record, in order. Each caller blocks on its own Future until its row is scored.
+    The worker thread is started lazily per process, so the batcher survives
+    being created in a parent that later forks (see serve.py).
+    """
+
+    def __init__(self, score_batch, max_wait_ms=2.0, max_batch_size=64):
+        self.score_batch = score_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self.metrics = BatcherMetrics()
+        self._queue = ProcessLocal(self._start_worker)
+
+    def _start_worker(self):
+        q = queue.Queue()
+        self.metrics = BatcherMetrics()
+        threading.Thread(target=self._run, args=(q,), name="micro-batcher", daemon=True).start()
+        return q
+
+    def submit(self, record):
+        future = Future()
+        self._queue.get().put((record, future, time.perf_counter()))
+        return future
+
+    def predict(self, record, timeout=None):
+        return self.submit(record).result(timeout=timeout)
+
+    def stats(self):
+        return self.metrics.snapshot(self._queue.get().qsize())
+
+    def _collect(self, q):
+        batch = [q.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self, q):
+        while True:
+            batch = self._collect(q)
+            # Skip callers that cancelled their Future; the rest can no longer be
+            # cancelled, so setting their result below cannot raise and kill this thread
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            self.metrics.record(len(batch), [started - enqueued for _, _, enqueued in batch])
+            try:
+                results = self.score_batch([record for record, _, _ in batch])
+            except Exception:
+                # One bad row should not fail its neighbours: retry row by row
+                for record, future, _ in batch:
+                    try:
+                        future.set_result(self.score_batch([record])[0])
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,87 @@
+"""
+Production entry point for the loan prediction API.
+
+The parent (gunicorn master) imports app.py once, so `loan_pretrained.pkl` is
+loaded a single time and then forked into N workers that share the model
+pages copy-on-write. `gc.freeze()` keeps the garbage collector from touching
+(and therefore copying) those pages inside the workers. For workers that load
+the model themselves (HotModel swaps, other servers), export it once with
+`python -m common.mmap_artifacts export loan_pretrained.pkl` so its arrays are
+memory-mapped and shared through the page cache instead.
+
+Graceful reload of a new pickle:
+    python -m common.model_registry register loan --file model=new_model.pkl   (or overwrite loan_pretrained.pkl)
+    kill -HUP <master pid>
+The master reloads the model, forks fresh workers from it, and lets the old
+workers finish their in-flight requests (up to --graceful-timeout) before exiting.
+Without a HUP, each worker's HotModel watcher also picks the new version up on
+its own, but then every worker holds a private copy instead of shared pages.
+
+Usage (needs gunicorn, see requirements.txt):
+    python serve.py --workers 8 --bind 0.0.0.0:5000
+"""
+import argparse
+import gc
+import logging
+import multiprocessing
+
+from gunicorn.app.base import BaseApplication
+
+import app as loan_app
+
+# Gunicorn's error log (stderr), so reload messages sit next to the worker lifecycle ones
+logger = logging.getLogger("gunicorn.error")
+
+
+class LoanServer(BaseApplication):
+    def __init__(self, options):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return loan_app.app
+
+    def reload(self):
+        # Called in the master on SIGHUP, before new workers are forked
+        super().reload()
+        try:
+            loan_app.models.refresh()
+        except Exception:
+            # Keep serving the previous model rather than taking the master down
+            logger.exception("Model reload failed, keeping current model")
+            return
+        gc.collect()
+        gc.freeze()
+        # Not models.get(): that would start the watcher thread in the master, and
+        # forking while it holds the refresh lock can deadlock the new workers
+        logger.info("Serving loan model version %s", loan_app.models.current.version)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the loan model from a pre-forked worker pool.")
+    parser.add_argument("--bind", default="0.0.0.0:5000")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--threads", type=int, default=1, help="Threads per worker (useful with LOAN_MICRO_BATCH=1).")
+    parser.add_argument("--graceful-timeout", type=int, default=30)
+    args = parser.parse_args()
+
+    # Move everything loaded so far out of the GC's generations so workers do
+    # not dirty the shared model pages when they collect
+    gc.collect()
+    gc.freeze()
+
+    LoanServer({
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        "graceful_timeout": args.graceful_timeout,
+        "preload_app": True,
+    }).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,63 @@
-from flask import Flask, request, jsonify
-import joblib
+from flask import Flask, request, jsonify, Response
+import os
+import signal
 import sqlite3
+import sys
 import pandas as pd
 
+from common.mmap_artifacts import load_artifact
+from common.model_registry import HotModel
+from common.result_cache import from_env, json_key
+from write_behind import WriteBehindQueue
+import dashboard_queries as dq
+
 app = Flask(__name__)
 
-# Load trained models
-linreg_model = joblib.load("price_predicter.pkl")
-logreg_model = joblib.load("sales_predicter.pkl")
+class HouseModels:
+    """Price and sales pipelines plus, when it verified, their shared-preprocessing scorer."""
+
+    def __init__(self, price, sales, scorer=None):
+        self.price = price
+        self.sales = sales
+        self.scorer = scorer
+
+    def predict(self, df):
+        """(prices, sold_within_week) for every row of `df`."""
+        if self.scorer is not None:
+            return self.scorer.predict(df)
+        return self.price.predict(df), self.sales.predict(df)
+
+# Load trained models: the active "house" registry version (falls back to the
+# pickles next to this file), hot-swapped between requests
+def build_models(paths):
+    """
+    Load both pipelines and, when possible, a DualScorer that runs their common
+    ColumnTransformer once (see dual_scorer.py). It is only used when it gives
+    the same predictions as the two pipelines on the training rows.
+    """
+    price, sales = load_artifact(paths["price"]), load_artifact(paths["sales"])
+    scorer = None
+    try:
+        from dual_scorer import DualScorer, load_sample, verify
+        candidate = DualScorer(price, sales)
+        if verify(price, sales, candidate, load_sample()):
+            scorer = candidate
+        else:
+            app.logger.warning("Price and sales preprocessing differ, scoring the pipelines separately.")
+    except Exception as e:
+        app.logger.warning("Shared-preprocessing scorer unavailable, scoring the pipelines separately: %s", e)
+    return HouseModels(price, sales, scorer)
+
+models = HotModel(
+    "house",
+    build_models,
+    {"price": "price_predicter.pkl", "sales": "sales_predicter.pkl"},
+    poll_interval=float(os.environ.get("HOUSE_MODEL_POLL_SECONDS", "2")),
+)
+
+# Scores of recently seen houses, keyed by their canonical JSON and the model
+# version (HOUSE_CACHE_SIZE entries, HOUSE_CACHE_TTL seconds, optional HOUSE_CACHE_DB)
+result_cache = from_env("HOUSE")
 
 # Initialize DB with correct schema
 def init_db():
@@ -35,41 +85,232 @@ def init_db():
             Sold_Within_Week INTEGER
         )
     """)
+    # Dashboard scans read alongside the write-behind flushes. The pragma returns
+    # the new mode as a row; read it so no statement is left open for the commit
+    cursor.execute("PRAGMA journal_mode=WAL").fetchone()
+    init_table_versions(conn)
     conn.commit()
     conn.close()
 
+# --- Table version (ETags) ---
+def init_table_versions(conn):
+    """Triggers bump table_versions.version on every change to predictions, for ETag revalidation."""
+    conn.execute("CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+    conn.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES ('predictions', 0)")
+    bump = "UPDATE table_versions SET version = version + 1 WHERE name = 'predictions';"
+    conn.executescript(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_predictions_version_insert AFTER INSERT ON predictions BEGIN {bump} END;
+    CREATE TRIGGER IF NOT EXISTS trg_predictions_version_update AFTER UPDATE ON predictions BEGIN {bump} END;
+    CREATE TRIGGER IF NOT EXISTS trg_predictions_version_delete AFTER DELETE ON predictions BEGIN {bump} END;
+    """)
+
+def predictions_etag(conn):
+    row = conn.execute("SELECT version FROM table_versions WHERE name = 'predictions'").fetchone()
+    return f"predictions-v{row[0] if row else 0}"
+
 init_db()
 
-@app.route("/predict", methods=["POST"])
-def predict():
-    data = request.json
-    df = pd.DataFrame([data])  # Convert input to DataFrame
-    
-    # Predictions
-    price_pred = linreg_model.predict(df)[0]
-    sold_pred = logreg_model.predict(df)[0]
-    
-    # Save to DB with explicit casting
-    conn = sqlite3.connect("housing.db")
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO predictions (
-            Square_Footage, Bedrooms, Bathrooms, Age, Garage_Spaces, Lot_Size, Floors,
-            Neighborhood_Rating, Condition, School_Rating, Has_Pool, Renovated,
-            Location_Type, Distance_To_Center_KM, Days_On_Market, Predicted_Price, Sold_Within_Week
-        ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-    """, (
+INSERT_PREDICTION_SQL = """
+    INSERT INTO predictions (
+        Square_Footage, Bedrooms, Bathrooms, Age, Garage_Spaces, Lot_Size, Floors,
+        Neighborhood_Rating, Condition, School_Rating, Has_Pool, Renovated,
+        Location_Type, Distance_To_Center_KM, Days_On_Market, Predicted_Price, Sold_Within_Week
+    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+def prediction_row(data, price_pred, sold_pred):
+    """INSERT_PREDICTION_SQL parameters, with explicit casting."""
+    return (
         float(data["Square_Footage"]), int(data["Bedrooms"]), float(data["Bathrooms"]), int(data["Age"]),
         float(data["Garage_Spaces"]), float(data["Lot_Size"]), int(data["Floors"]),
         int(data["Neighborhood_Rating"]), int(data["Condition"]), float(data["School_Rating"]),
         int(data["Has_Pool"]), int(data["Renovated"]), str(data["Location_Type"]),
         float(data["Distance_To_Center_KM"]), float(data["Days_On_Market"]),
         float(price_pred), int(sold_pred)
-    ))
-    conn.commit()
-    conn.close()
+    )
+
+def write_predictions(rows):
+    """Insert a batch of prediction rows in one transaction."""
+    conn = sqlite3.connect("housing.db")
+    try:
+        with conn:
+            conn.executemany(INSERT_PREDICTION_SQL, rows)
+    finally:
+        conn.close()
+
+# Predictions are stored write-behind: /predict returns right after scoring and
+# a background thread inserts them in batches (HOUSE_WRITE_BATCH_ROWS rows or
+# HOUSE_WRITE_MAX_DELAY_MS, whichever comes first). Rows still queued at exit
+# are spilled to HOUSE_WRITE_SPILL and written back on the next start.
+# HOUSE_WRITE_BEHIND=0 stores every prediction before responding instead, and
+# ?sync=1 does so for one request (e.g. a form that shows the saved row next).
+WRITE_BEHIND_ENABLED = os.environ.get("HOUSE_WRITE_BEHIND", "1") == "1"
+
+writer = WriteBehindQueue(
+    write_predictions,
+    max_rows=int(os.environ.get("HOUSE_WRITE_BATCH_ROWS", "500")),
+    max_delay_ms=float(os.environ.get("HOUSE_WRITE_MAX_DELAY_MS", "200")),
+    spill_path=os.environ.get("HOUSE_WRITE_SPILL", "housing_pending.jsonl"),
+)
+replayed = writer.replay_spill()
+if replayed:
+    app.logger.warning("Stored %d predictions spilled by the previous run", replayed)
+
+# How long a ?sync=1 request waits for its rows to be written
+SYNC_WRITE_TIMEOUT = float(os.environ.get("HOUSE_SYNC_WRITE_TIMEOUT", "5"))
+
+def save_predictions(rows, sync=False):
+    """Store `rows`; with `sync`, wait until they are written. Returns whether they are."""
+    if not WRITE_BEHIND_ENABLED:
+        write_predictions(rows)
+        return True
+    writer.put_many(rows)
+    # Through the queue rather than around it, so ids keep the order predictions were made in
+    return writer.flush(SYNC_WRITE_TIMEOUT) if sync else False
+
+@app.route("/predict", methods=["POST"])
+def predict():
+    data = request.json
+    current = models.get()
+    key = json_key(data, current.version)
+    cached = result_cache.get(key)
+    if cached is not None:
+        price_pred, sold_pred = cached
+    else:
+        df = pd.DataFrame([data])  # Convert input to DataFrame
+        # Predictions (both from the same model version, even if a swap happens meanwhile)
+        prices, sold = current.value.predict(df)
+        price_pred, sold_pred = result_cache.put(key, [float(prices[0]), int(sold[0])])
+    
+    # Every request is still saved, cached or not (queued, see save_predictions)
+    sync = request.args.get("sync") == "1"
+    stored = save_predictions([prediction_row(data, price_pred, sold_pred)], sync=sync)
     
-    return jsonify({"Predicted_Price": price_pred, "Sold_Within_Week": int(sold_pred)})
+    result = {"Predicted_Price": price_pred, "Sold_Within_Week": int(sold_pred)}
+    if sync:
+        result["stored"] = stored
+    return jsonify(result)
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    Score a JSON array of houses (or {"records": [...]}) in one pass and store
+    every prediction. Returns the predictions in input order.
+    """
+    payload = request.get_json(silent=True)
+    records = payload.get("records") if isinstance(payload, dict) else payload
+    if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+        return jsonify({"error": "Expected a non-empty JSON array of objects"}), 400
+
+    try:
+        prices, sold = models.get().value.predict(pd.DataFrame.from_records(records))
+        rows = [prediction_row(data, p, s) for data, p, s in zip(records, prices, sold)]
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({"error": f"Invalid records: {e}"}), 400
+
+    save_predictions(rows)
+
+    return jsonify([
+        {"Predicted_Price": float(p), "Sold_Within_Week": int(s)} for p, s in zip(prices, sold)
+    ])
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    current = models.get()
+    return jsonify({
+        "model_version": current.version,
+        "shared_preprocessing": current.value.scorer is not None,
+        "write_behind": writer.stats() if WRITE_BEHIND_ENABLED else None,
+        "result_cache": result_cache.stats(),
+    })
+
+# --- Columnar dashboard queries (see dashboard_queries.py) ---
+def columnar_response(query):
+    """
+    Run query(conn) -> {column: array} and send it as an .npz archive (or, with
+    ?format=json, as {column: [values]}), tagged with the predictions table version.
+    """
+    conn = sqlite3.connect("housing.db")
+    try:
+        etag = predictions_etag(conn)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+        arrays = query(conn)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    finally:
+        conn.close()
+
+    if request.args.get("format") == "json":
+        response = jsonify({name: values.tolist() for name, values in arrays.items()})
+    else:
+        response = Response(dq.encode_npz(arrays), mimetype="application/x-npz")
+    response.set_etag(etag)
+    return response
+
+MAX_DASHBOARD_POINTS = 50_000
+
+def point_limit(default):
+    value = request.args.get("max_points", default=default, type=int)
+    if value < 3:
+        raise ValueError("max_points must be at least 3")
+    return min(value, MAX_DASHBOARD_POINTS)
+
+@app.route("/predictions/columns", methods=["GET"])
+def prediction_columns():
+    """?columns=a,b,c (default: all), ?limit=N, ?order=newest"""
+    return columnar_response(lambda conn: dq.fetch_columns(
+        conn,
+        dq.parse_columns(request.args.get("columns")),
+        limit=request.args.get("limit", type=int),
+        newest_first=request.args.get("order") == "newest",
+    ))
+
+@app.route("/predictions/summary", methods=["GET"])
+def prediction_summary():
+    return columnar_response(dq.summary)
+
+@app.route("/predictions/sample", methods=["GET"])
+def prediction_sample():
+    """Scatter data: ?x=&y=&hue= for about ?max_points= rows, stratified on hue."""
+    return columnar_response(lambda conn: dq.stratified_sample(
+        conn,
+        [dq.check_column(request.args.get("x", "Square_Footage"), dq.NUMERIC_COLUMNS),
+         dq.check_column(request.args.get("y", "Predicted_Price"), dq.NUMERIC_COLUMNS)],
+        dq.check_column(request.args.get("hue", "Sold_Within_Week")),
+        point_limit(5000),
+    ))
+
+@app.route("/predictions/trend", methods=["GET"])
+def prediction_trend():
+    """Line data: mean ?y= per distinct ?x=, LTTB-reduced to ?max_points=."""
+    return columnar_response(lambda conn: dq.trend(
+        conn,
+        dq.check_column(request.args.get("x", "Distance_To_Center_KM"), dq.NUMERIC_COLUMNS),
+        dq.check_column(request.args.get("y", "Predicted_Price"), dq.NUMERIC_COLUMNS),
+        point_limit(1000),
+    ))
+
+@app.route("/predictions/boxplot", methods=["GET"])
+def prediction_boxplot():
+    """Box plot statistics of ?y= per ?by= group."""
+    return columnar_response(lambda conn: dq.boxplot_stats(
+        conn,
+        dq.check_column(request.args.get("by", "Neighborhood_Rating"), dq.NUMERIC_COLUMNS),
+        dq.check_column(request.args.get("y", "Days_On_Market"), dq.NUMERIC_COLUMNS),
+        point_limit(20_000),
+    ))
+
+@app.route("/predictions/counts", methods=["GET"])
+def prediction_counts():
+    """Count plot data: rows per (?x=, ?hue=) pair."""
+    return columnar_response(lambda conn: dq.counts(
+        conn,
+        dq.check_column(request.args.get("x", "Condition")),
+        dq.check_column(request.args.get("hue", "Sold_Within_Week")),
+    ))
 
 @app.route("/update/<int:record_id>", methods=["PUT"])
 def update(record_id):
@@ -103,4 +344,6 @@ def delete(record_id):
     return jsonify({"message": "Record deleted successfully!"})
 
 if __name__ == "__main__":
+    # Exit normally on SIGTERM so the write-behind queue gets flushed / spilled
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,191 @@
+"""
+Column-oriented queries behind the real-estate dashboard (frontend.py).
+
+Every query returns a dict of equal-length NumPy arrays (one per column) that
+backend.py sends as an .npz archive, so the dashboard only downloads the columns
+a chart draws and never re-parses numbers. Point-heavy charts are reduced in SQLite
+before anything reaches Python:
+
+- scatter plots: a stratified sample of about `max_points` rows, in one
+  table scan. Each stratum (hue value) gets a share proportional to its size
+  but at least `MIN_PER_STRATUM` rows. Rows are picked by a hash of their id,
+  so the same table always gives the same sample.
+- line plots: the mean of y for each distinct x (GROUP BY), reduced to
+  `max_points` with Largest-Triangle-Three-Buckets (LTTB), which keeps the
+  visual peaks and troughs.
+- box plots: quartiles and 1.5 IQR whiskers per group, computed on a
+  stratified sample.
+- count plots: a GROUP BY count.
+"""
+import io
+
+import numpy as np
+
+NUMERIC_COLUMNS = [
+    "Square_Footage", "Bedrooms", "Bathrooms", "Age", "Garage_Spaces", "Lot_Size",
+    "Floors", "Neighborhood_Rating", "Condition", "School_Rating", "Has_Pool",
+    "Renovated", "Distance_To_Center_KM", "Days_On_Market", "Predicted_Price", "Sold_Within_Week",
+]
+INTEGER_COLUMNS = [
+    "Bedrooms", "Age", "Floors", "Neighborhood_Rating", "Condition", "Has_Pool", "Renovated", "Sold_Within_Week",
+]
+TEXT_COLUMNS = ["Location_Type"]
+COLUMNS = ["id"] + NUMERIC_COLUMNS + TEXT_COLUMNS
+
+MIN_PER_STRATUM = 50
+# Multiplicative hash of the row id, uniform over [0, 2**32), for repeatable sampling
+HASH_SQL = "((id * 2654435761) % 4294967296)"
+
+
+def check_column(name, allowed=COLUMNS):
+    if name not in allowed:
+        raise ValueError(f"Unknown column {name!r}")
+    return name
+
+
+def parse_columns(value, default=COLUMNS):
+    """Comma-separated column names, validated against the predictions schema."""
+    if not value:
+        return list(default)
+    return [check_column(c.strip()) for c in value.split(",") if c.strip()]
+
+
+def to_arrays(columns, rows):
+    """Column name -> NumPy array: int64 for ids and NULL-free INTEGER columns, else float64 (NULL -> NaN)."""
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    arrays = {}
+    for name, column in zip(columns, values):
+        if name == "id" or (name in INTEGER_COLUMNS and None not in column):
+            arrays[name] = np.array(column, dtype=np.int64)
+        elif name in TEXT_COLUMNS:
+            arrays[name] = np.array(["" if v is None else str(v) for v in column], dtype=str)
+        else:
+            arrays[name] = np.array(column, dtype=np.float64)
+    return arrays
+
+
+def encode_npz(arrays):
+    buf = io.BytesIO()
+    np.savez(buf, **arrays)
+    return buf.getvalue()
+
+
+def not_null(*columns):
+    return " AND ".join(f"{c} IS NOT NULL" for c in columns)
+
+
+# ---------- Plain columns ----------
+
+def fetch_columns(conn, columns, limit=None, newest_first=False):
+    order = "DESC" if newest_first else "ASC"
+    sql = f"SELECT {', '.join(columns)} FROM predictions ORDER BY id {order}"
+    params = []
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return to_arrays(columns, conn.execute(sql, params).fetchall())
+
+
+def summary(conn):
+    row = conn.execute("""
+        SELECT COUNT(*), AVG(Predicted_Price), AVG(Days_On_Market), AVG(Sold_Within_Week), AVG(Square_Footage)
+        FROM predictions
+    """).fetchone()
+    names = ["rows", "avg_price", "avg_days_on_market", "sold_within_week_rate", "avg_square_footage"]
+    return {name: np.array([np.nan if v is None else v], dtype=np.float64) for name, v in zip(names, row)}
+
+
+# ---------- Downsampling ----------
+
+def stratum_counts(conn, by, *columns):
+    rows = conn.execute(
+        f"SELECT {by}, COUNT(*) FROM predictions WHERE {not_null(*columns)} GROUP BY {by}"
+    ).fetchall()
+    return dict(rows)
+
+
+def allocate(counts, max_points, min_per_stratum=MIN_PER_STRATUM):
+    """Rows to draw per stratum: proportional to its size, at least min_per_stratum, never more than it has."""
+    total = sum(counts.values())
+    if total <= max_points:
+        return dict(counts)
+    return {
+        key: min(count, max(min_per_stratum, int(round(max_points * count / total))))
+        for key, count in counts.items()
+    }
+
+
+def stratified_sample(conn, columns, by, max_points):
+    """`columns` for about max_points rows, stratified on `by` (which is returned too)."""
+    selected = list(dict.fromkeys(columns + [by]))
+    counts = stratum_counts(conn, by, *selected)
+    quotas = allocate(counts, max_points)
+    # One scan: each stratum keeps the rows whose id hash falls under its own sampling rate
+    cases, params = [], []
+    for key, quota in quotas.items():
+        cases.append("WHEN ? THEN ?")
+        params += [key, min(2**32, int(quota / counts[key] * 2**32))]
+    if not cases:
+        return to_arrays(selected, [])
+    rows = conn.execute(
+        f"SELECT {', '.join(selected)} FROM predictions "
+        f"WHERE {not_null(*selected)} AND {HASH_SQL} < (CASE {by} {' '.join(cases)} ELSE 0 END)",
+        params,
+    ).fetchall()
+    return to_arrays(selected, rows)
+
+
+def lttb(x, y, threshold):
+    """Indices of the `threshold` points Largest-Triangle-Three-Buckets keeps from (x, y) sorted by x."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def trend(conn, x, y, max_points):
+    """Mean of y per distinct x (with the row count behind each point), LTTB-reduced to max_points."""
+    rows = conn.execute(
+        f"SELECT {x}, AVG({y}), COUNT(*) FROM predictions WHERE {not_null(x, y)} GROUP BY {x} ORDER BY {x}"
+    ).fetchall()
+    arrays = to_arrays([x, y, "count"], rows)
+    keep = lttb(arrays[x], arrays[y], max_points)
+    return {name: values[keep] for name, values in arrays.items()}
+
+
+def boxplot_stats(conn, by, y, max_points):
+    """Per group of `by`: quartiles, whiskers (furthest points within 1.5 IQR) and sampled / total rows."""
+    sample = stratified_sample(conn, [y], by, max_points)
+    totals = stratum_counts(conn, by, by, y)
+    stats = {name: [] for name in [by, "q1", "median", "q3", "whislo", "whishi", "sampled", "rows"]}
+    for group in np.unique(sample[by]):
+        values = sample[y][sample[by] == group]
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+        iqr = q3 - q1
+        stats[by].append(group)
+        stats["q1"].append(q1)
+        stats["median"].append(median)
+        stats["q3"].append(q3)
+        stats["whislo"].append(values[values >= q1 - 1.5 * iqr].min())
+        stats["whishi"].append(values[values <= q3 + 1.5 * iqr].max())
+        stats["sampled"].append(len(values))
+        stats["rows"].append(totals.get(float(group), len(values)))
+    return {name: np.array(values, dtype=np.float64) for name, values in stats.items()}
+
+
+def counts(conn, x, hue):
+    rows = conn.execute(
+        f"SELECT {x}, {hue}, COUNT(*) FROM predictions WHERE {not_null(x, hue)} GROUP BY {x}, {hue} ORDER BY {x}, {hue}"
+    ).fetchall()
+    return to_arrays([x, hue, "count"], rows)
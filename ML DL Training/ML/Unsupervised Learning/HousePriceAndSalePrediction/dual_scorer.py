@@ -0,0 +1,83 @@
+"""
+Score the price and sales pipelines off a single preprocessing pass.
+
+price_predicter.pkl (LinearRegression) and sales_predicter.pkl
+(LogisticRegression) were trained by dataset_trainer.ipynb behind the same
+ColumnTransformer (StandardScaler over the numericals, OneHotEncoder on
+Location_Type) fitted on the same split. DualScorer transforms the input once
+and feeds the result to both final estimators. `verify` checks that it matches
+the two pipelines exactly before the backend switches over.
+
+Usage:
+    python dual_scorer.py [price_predicter.pkl] [sales_predicter.pkl] [house_sales_data.csv]
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+from sklearn.pipeline import Pipeline
+
+TARGETS = ["Price", "Sold_Within_Week"]
+
+
+class DualScorer:
+    def __init__(self, price_pipeline: Pipeline, sales_pipeline: Pipeline):
+        self.preprocess = price_pipeline[:-1]
+        self.price_head = price_pipeline[-1]
+        self.sales_head = sales_pipeline[-1]
+        columns = getattr(price_pipeline, "feature_names_in_", None)
+        self.columns = list(columns) if columns is not None else None
+
+    def predict(self, df):
+        """(prices, sold_within_week) for every row of `df`."""
+        if self.columns is not None:
+            df = df[self.columns]
+        features = self.preprocess.transform(df)
+        return self.price_head.predict(features), self.sales_head.predict(features)
+
+    def predict_records(self, records):
+        return self.predict(pd.DataFrame.from_records(records))
+
+
+def load_sample(data_path="house_sales_data.csv"):
+    """Training rows without targets or missing values, for parity checks."""
+    return pd.read_csv(data_path).drop(columns=TARGETS).dropna()
+
+
+def verify(price_pipeline: Pipeline, sales_pipeline: Pipeline, scorer: DualScorer, df) -> bool:
+    """True when both heads reproduce their original pipeline exactly on every row of `df`."""
+    prices, sold = scorer.predict(df)
+    return bool(
+        np.array_equal(prices, price_pipeline.predict(df))
+        and np.array_equal(sold, sales_pipeline.predict(df))
+    )
+
+
+if __name__ == "__main__":
+    import time
+
+    import joblib
+
+    price_path = sys.argv[1] if len(sys.argv) > 1 else "price_predicter.pkl"
+    sales_path = sys.argv[2] if len(sys.argv) > 2 else "sales_predicter.pkl"
+    data_path = sys.argv[3] if len(sys.argv) > 3 else "house_sales_data.csv"
+
+    price_pipeline, sales_pipeline = joblib.load(price_path), joblib.load(sales_path)
+    scorer = DualScorer(price_pipeline, sales_pipeline)
+    df = load_sample(data_path)
+
+    print("Parity with both pipelines:", verify(price_pipeline, sales_pipeline, scorer, df))
+
+    for rows in (1, 100, len(df)):
+        batch = df.iloc[:rows]
+        n = max(20, 2000 // rows)
+        start = time.perf_counter()
+        for _ in range(n):
+            price_pipeline.predict(batch)
+            sales_pipeline.predict(batch)
+        separate_us = (time.perf_counter() - start) / n * 1e6
+        start = time.perf_counter()
+        for _ in range(n):
+            scorer.predict(batch)
+        shared_us = (time.perf_counter() - start) / n * 1e6
+        print(f"{rows:>6} rows: two pipelines {separate_us:10.1f} us, shared preprocessing {shared_us:10.1f} us")
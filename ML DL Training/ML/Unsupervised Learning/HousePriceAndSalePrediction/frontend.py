@@ -1,25 +1,38 @@
+import io
+
+import numpy as np
 import streamlit as st
-import requests
-import sqlite3
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+from common.api_client import ApiClient
+
+@st.cache_resource
+def get_client():
+    return ApiClient("http://127.0.0.1:5000")
+
+client = get_client()
+
 st.title("🏡 Real Estate Agent Dashboard")
 
-# Load DB
-def load_data():
-    conn = sqlite3.connect("housing.db")
-    df = pd.read_sql_query("SELECT * FROM predictions", conn)
-    conn.close()
-    # Ensure numeric columns are properly typed
-    numeric_cols = ["Square_Footage","Bedrooms","Bathrooms","Age","Garage_Spaces","Lot_Size",
-                    "Floors","Neighborhood_Rating","Condition","School_Rating","Has_Pool",
-                    "Renovated","Distance_To_Center_KM","Days_On_Market","Predicted_Price","Sold_Within_Week"]
-    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors="coerce")
-    return df
+# Columnar queries: the backend sends only the columns a chart needs, already
+# downsampled, as an .npz archive (see dashboard_queries.py)
+RECORDS_LIMIT = 1000
+
+def fetch_columns(path, **params):
+    res = client.get(path, params=params)
+    if res.status_code != 200:
+        st.error(f"Could not load {path}: {res.status_code} {res.text}")
+        st.stop()
+    with np.load(io.BytesIO(res.content), allow_pickle=False) as archive:
+        return pd.DataFrame({name: archive[name] for name in archive.files})
+
+def load_records():
+    """The newest RECORDS_LIMIT predictions, all columns."""
+    return fetch_columns("/predictions/columns", limit=RECORDS_LIMIT, order="newest")
 
-df = load_data()
+summary = fetch_columns("/predictions/summary").iloc[0]
 
 # Tabs
 tab1, tab2, tab3, tab4, tab5 = st.tabs(["Overview", "Comparisons", "Trends", "Records", "New Entry"])
@@ -30,33 +43,46 @@ tab1, tab2, tab3, tab4, tab5 = st.tabs(["Overview", "Comparisons", "Trends", "Re
 with tab1:
     st.subheader("📌 Key Metrics")
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Avg Price", f"${df['Predicted_Price'].mean():,.0f}")
-    col2.metric("Avg Days on Market", f"{df['Days_On_Market'].mean():.1f}")
-    col3.metric("% Sold in Week", f"{(df['Sold_Within_Week'].mean()*100):.1f}%")
-    col4.metric("Avg Sq Ft", f"{df['Square_Footage'].mean():.0f}")
+    col1.metric("Avg Price", f"${summary['avg_price']:,.0f}")
+    col2.metric("Avg Days on Market", f"{summary['avg_days_on_market']:.1f}")
+    col3.metric("% Sold in Week", f"{(summary['sold_within_week_rate']*100):.1f}%")
+    col4.metric("Avg Sq Ft", f"{summary['avg_square_footage']:.0f}")
+    st.caption(f"{int(summary['rows']):,} saved predictions")
 
 # -------------------------------
 # Tab 2: Comparisons
 # -------------------------------
 with tab2:
     st.subheader("📊 Price vs Square Footage")
+    sample = fetch_columns("/predictions/sample", x="Square_Footage", y="Predicted_Price", hue="Sold_Within_Week")
     fig, ax = plt.subplots()
-    sns.scatterplot(x="Square_Footage", y="Predicted_Price", hue="Sold_Within_Week", data=df, ax=ax)
+    sns.scatterplot(x="Square_Footage", y="Predicted_Price", hue="Sold_Within_Week", data=sample, ax=ax)
     st.pyplot(fig)
+    st.caption(f"Stratified sample of {len(sample):,} records")
 
     st.subheader("📊 Price vs Lot Size")
+    sample = fetch_columns("/predictions/sample", x="Lot_Size", y="Predicted_Price", hue="Neighborhood_Rating")
     fig, ax = plt.subplots()
-    sns.scatterplot(x="Lot_Size", y="Predicted_Price", hue="Neighborhood_Rating", data=df, ax=ax)
+    sns.scatterplot(x="Lot_Size", y="Predicted_Price", hue="Neighborhood_Rating", data=sample, ax=ax)
     st.pyplot(fig)
+    st.caption(f"Stratified sample of {len(sample):,} records")
 
     st.subheader("📊 Days on Market vs Neighborhood Rating")
+    boxes = fetch_columns("/predictions/boxplot", by="Neighborhood_Rating", y="Days_On_Market")
     fig, ax = plt.subplots()
-    sns.boxplot(x="Neighborhood_Rating", y="Days_On_Market", data=df, ax=ax)
+    ax.bxp([
+        {"label": f"{b.Neighborhood_Rating:g}", "q1": b.q1, "med": b.median, "q3": b.q3,
+         "whislo": b.whislo, "whishi": b.whishi}
+        for b in boxes.itertuples()
+    ], showfliers=False)
+    ax.set_xlabel("Neighborhood_Rating")
+    ax.set_ylabel("Days_On_Market")
     st.pyplot(fig)
 
     st.subheader("📊 Condition vs Sold Within Week")
+    counts = fetch_columns("/predictions/counts", x="Condition", hue="Sold_Within_Week")
     fig, ax = plt.subplots()
-    sns.countplot(x="Condition", hue="Sold_Within_Week", data=df, ax=ax)
+    sns.barplot(x="Condition", y="count", hue="Sold_Within_Week", data=counts, ax=ax)
     st.pyplot(fig)
 
 # -------------------------------
@@ -64,13 +90,15 @@ with tab2:
 # -------------------------------
 with tab3:
     st.subheader("📈 Price vs Distance to Center")
+    line = fetch_columns("/predictions/trend", x="Distance_To_Center_KM", y="Predicted_Price")
     fig, ax = plt.subplots()
-    sns.lineplot(x="Distance_To_Center_KM", y="Predicted_Price", data=df, ax=ax)
+    sns.lineplot(x="Distance_To_Center_KM", y="Predicted_Price", data=line, ax=ax)
     st.pyplot(fig)
 
     st.subheader("📈 Days on Market vs Age of House")
+    line = fetch_columns("/predictions/trend", x="Age", y="Days_On_Market")
     fig, ax = plt.subplots()
-    sns.lineplot(x="Age", y="Days_On_Market", data=df, ax=ax)
+    sns.lineplot(x="Age", y="Days_On_Market", data=line, ax=ax)
     st.pyplot(fig)
 
 # -------------------------------
@@ -78,6 +106,8 @@ with tab3:
 # -------------------------------
 with tab4:
     st.subheader("📋 Saved Predictions")
+    df = load_records()
+    st.caption(f"Newest {len(df):,} of {int(summary['rows']):,} records")
     st.dataframe(df)
 
     record_id = st.selectbox("Select Record ID to Update/Delete", df["id"].unique())
@@ -90,11 +120,11 @@ with tab4:
             updated_entry[col] = st.text_input(col, value=record[col])
 
         if st.button("Update Record"):
-            response = requests.put(f"http://127.0.0.1:5000/update/{record_id}", json=updated_entry)
+            response = client.put(f"/update/{record_id}", json=updated_entry)
             st.success(response.json()["message"])
 
         if st.button("Delete Record"):
-            response = requests.delete(f"http://127.0.0.1:5000/delete/{record_id}")
+            response = client.delete(f"/delete/{record_id}")
             st.success(response.json()["message"])
 
 # -------------------------------
@@ -115,11 +145,12 @@ with tab5:
             new_entry[col] = st.number_input(col)
 
     if st.button("Predict & Save"):
-        response = requests.post("http://127.0.0.1:5000/predict", json=new_entry)
+        # sync=1: the backend writes this prediction before answering, so the refresh below shows it
+        response = client.post("/predict", params={"sync": 1}, json=new_entry)
         result = response.json()
         st.success(f"Predicted Price: ${result['Predicted_Price']:.2f}")
         st.info(f"Sold Within Week: {'Yes' if result['Sold_Within_Week']==1 else 'No'}")
 
-        # Refresh data after saving
-        df = load_data()
-        st.dataframe(df)
+        if not result.get("stored", True):
+            st.warning("The prediction is still being saved and may not appear in the table yet.")
+        st.dataframe(load_records())
@@ -0,0 +1,273 @@
+import atexit
+import collections
+import json
+import logging
+import os
+import threading
+import time
+
+from common.process_local import ProcessLocal
+
+try:
+    import fcntl
+except ImportError:  # Windows: the spill file is claimed by rename only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindMetrics:
+    """
+    Counters for the write-behind queue: flushed batches and rows, failures,
+    and the flush lag (time from put() to the row's transaction committing).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.flushes = 0
+        self.rows = 0
+        self.failures = 0
+        self.spilled = 0
+        self.lag_seconds_total = 0.0
+        self.lag_seconds_max = 0.0
+        self.last_flush = None
+
+    def record(self, lags):
+        with self._lock:
+            self.flushes += 1
+            self.rows += len(lags)
+            self.lag_seconds_total += sum(lags)
+            self.lag_seconds_max = max(self.lag_seconds_max, max(lags))
+            self.last_flush = time.time()
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def record_spill(self, rows):
+        with self._lock:
+            self.spilled += rows
+
+    def snapshot(self, queue_depth, oldest_age):
+        with self._lock:
+            return {
+                "queue_depth": queue_depth,
+                "oldest_pending_ms": oldest_age * 1000,
+                "flushes": self.flushes,
+                "rows_flushed": self.rows,
+                "mean_flush_size": (self.rows / self.flushes) if self.flushes else 0.0,
+                "flush_failures": self.failures,
+                "rows_spilled": self.spilled,
+                "flush_lag_ms_mean": (self.lag_seconds_total / self.rows * 1000) if self.rows else 0.0,
+                "flush_lag_ms_max": self.lag_seconds_max * 1000,
+                "last_flush": self.last_flush,
+            }
+
+
+class WriteBehindQueue:
+    """
+    Buffer rows in memory and persist them from a background thread.
+
+    `write_rows(rows)` receives a list of rows and must store them in one
+    transaction (raising leaves nothing written). A flush starts once
+    `max_rows` rows are pending or the oldest one has waited `max_delay_ms`;
+    failed flushes are retried with the rows kept in order.
+
+    On interpreter exit the queue is flushed one last time; whatever cannot be
+    written within `shutdown_timeout` seconds is appended to `spill_path` as
+    JSON lines and fsync'd. `replay_spill()` writes those rows back on the next
+    start; it first renames the spill file to a name private to the process,
+    so when several workers start at once exactly one of them replays it.
+    Rows still only in memory when the process is killed outright are lost, at
+    most `max_delay_ms` (or `max_rows`) worth. `flush()` writes everything
+    queued so far right away and waits for it, for callers that must read
+    their own write.
+
+    Rows must be JSON-serialisable sequences (they are spilled as lists and
+    handed back to `write_rows` as tuples). The writer thread is started lazily
+    per process, like MicroBatcher in LoanTask.
+    """
+
+    def __init__(self, write_rows, max_rows=500, max_delay_ms=200.0, spill_path=None, shutdown_timeout=5.0):
+        self.write_rows = write_rows
+        self.max_rows = max_rows
+        self.max_delay = max_delay_ms / 1000.0
+        self.spill_path = spill_path
+        self.shutdown_timeout = shutdown_timeout
+        self.metrics = WriteBehindMetrics()
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._queued = 0  # rows ever queued / written, for flush()
+        self._written = 0
+        self._flush_upto = 0
+        self._thread = ProcessLocal(self._start_worker)
+
+    def _start_worker(self):
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+        self.metrics = WriteBehindMetrics()
+        self._closed = False
+        self._queued = self._written = self._flush_upto = 0
+        thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        thread.start()
+        atexit.register(self.close)
+        return thread
+
+    def put(self, row):
+        self.put_many([row])
+
+    def put_many(self, rows):
+        self._thread.get()
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-behind queue is closed")
+            self._pending.extend((tuple(row), now) for row in rows)
+            self._queued += len(rows)
+            if len(self._pending) >= self.max_rows:
+                self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Write every row queued so far without waiting for the flush thresholds.
+        Returns True once they are stored, False if that takes over `timeout`
+        seconds (they stay queued and are retried as usual).
+        """
+        if not self._thread.created():
+            return True
+        with self._cond:
+            target = self._queued
+            self._flush_upto = max(self._flush_upto, target)
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def stats(self):
+        with self._cond:
+            depth = len(self._pending)
+            oldest_age = time.monotonic() - self._pending[0][1] if depth else 0.0
+        return self.metrics.snapshot(depth, oldest_age)
+
+    # ---------- Writer ----------
+
+    def _take_batch(self):
+        """Wait for a flush threshold, then pop up to max_rows rows (oldest first)."""
+        with self._cond:
+            while not self._closed:
+                if len(self._pending) >= self.max_rows:
+                    break
+                if self._pending and self._flush_upto > self._written:
+                    break  # flush() is waiting
+                if self._pending:
+                    remaining = self._pending[0][1] + self.max_delay - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                else:
+                    self._cond.wait()
+            n = min(len(self._pending), self.max_rows)
+            return [self._pending.popleft() for _ in range(n)]
+
+    def _flush(self, batch):
+        try:
+            self.write_rows([row for row, _ in batch])
+        except Exception as e:
+            self.metrics.record_failure()
+            logger.warning("Write-behind flush of %d rows failed, will retry: %s", len(batch), e)
+            with self._cond:
+                self._pending.extendleft(reversed(batch))
+            return False
+        now = time.monotonic()
+        self.metrics.record([now - enqueued for _, enqueued in batch])
+        with self._cond:
+            self._written += len(batch)
+            self._cond.notify_all()
+        return True
+
+    def _run(self):
+        backoff = 0.05
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return  # closed and drained
+            if self._flush(batch):
+                backoff = 0.05
+            elif self._closed:
+                return  # leave the rows for close() to spill
+            else:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+
+    # ---------- Shutdown and spill ----------
+
+    def close(self):
+        """Stop accepting rows, flush what is pending and spill the rest to disk."""
+        if not self._thread.created():
+            return
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        # The writer drains the queue without waiting for thresholds once closed
+        self._thread.get().join(self.shutdown_timeout)
+        with self._cond:
+            leftover = [row for row, _ in self._pending]
+            self._pending.clear()
+        if leftover:
+            self._spill(leftover)
+
+    def _spill(self, rows):
+        if not self.spill_path:
+            logger.error("Write-behind queue dropped %d unflushed rows (no spill file configured)", len(rows))
+            return
+        self._append_spill(rows)
+        self.metrics.record_spill(len(rows))
+        logger.warning("Write-behind queue spilled %d rows to %s", len(rows), self.spill_path)
+
+    def _append_spill(self, rows):
+        while True:
+            with open(self.spill_path, "a") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                    # A replay may have claimed (renamed) the file between our open
+                    # and the lock; rows appended to it now would never be read
+                    try:
+                        if os.stat(self.spill_path).st_ino != os.fstat(f.fileno()).st_ino:
+                            continue
+                    except FileNotFoundError:
+                        continue
+                for row in rows:
+                    f.write(json.dumps(list(row)) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+                return
+
+    def replay_spill(self):
+        """
+        Write rows spilled by a previous shutdown, then remove the spill file.
+        Returns the row count (0 when there is nothing to replay or another
+        process claimed the file first). If writing fails, the rows go back
+        into the spill file and the error is raised.
+        """
+        if not self.spill_path:
+            return 0
+        claimed = f"{self.spill_path}.replay-{os.getpid()}"
+        try:
+            os.rename(self.spill_path, claimed)
+        except FileNotFoundError:
+            return 0
+        with open(claimed) as f:
+            if fcntl is not None:
+                # Wait for a process that opened the file before the rename to finish its spill
+                fcntl.flock(f, fcntl.LOCK_EX)
+            rows = [tuple(json.loads(line)) for line in f if line.strip()]
+        try:
+            if rows:
+                self.write_rows(rows)
+        except Exception:
+            self._append_spill(rows)
+            os.remove(claimed)
+            raise
+        os.remove(claimed)
+        return len(rows)
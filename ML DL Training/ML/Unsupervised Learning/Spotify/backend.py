@@ -1,14 +1,35 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
+import io
+import logging
+import os
 import sqlite3
-import joblib
 import numpy as np
 import pandas as pd
+from cluster_index import ClusterIndex
+from model_files import KMEANS_PATH, SCALER_PATH, file_sha256, model_version
+from neighbor_index import NEIGHBOR_INDEX_PATH, NeighborIndex
+from common.mmap_artifacts import load_artifact
+from common.model_registry import HotModel
 
 app = Flask(__name__)
 
-# Load model and scaler
-kmeans = joblib.load("spotify_predictor.pkl")
-scaler = joblib.load("scaler.pkl")
+class SpotifyModel:
+    """A kmeans/scaler pair, its fingerprint and the neighbour index built for it (if any)."""
+
+    def __init__(self, kmeans, scaler, fingerprint, neighbors_path=NEIGHBOR_INDEX_PATH):
+        self.kmeans = kmeans
+        self.scaler = scaler
+        self.fingerprint = fingerprint
+        self.neighbors = load_neighbor_index(fingerprint, neighbors_path)
+
+def build_model(paths):
+    # Pairs published by recluster.py carry their own neighbour index
+    return SpotifyModel(
+        load_artifact(paths["kmeans"]),
+        load_artifact(paths["scaler"]),
+        model_version((paths["kmeans"], paths["scaler"])),
+        paths.get("neighbors", NEIGHBOR_INDEX_PATH),
+    )
 
 features = ["danceability", "energy", "valence", "tempo", "duration_ms", "popularity"]
 
@@ -17,9 +38,41 @@ def get_db_connection():
     conn.row_factory = sqlite3.Row
     return conn
 
+# --- Table version (ETags) ---
+def init_table_versions(conn):
+    """Triggers bump table_versions.version on every change to tracks, for ETag revalidation."""
+    conn.execute("CREATE TABLE IF NOT EXISTS table_versions (name TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+    conn.execute("INSERT OR IGNORE INTO table_versions (name, version) VALUES ('tracks', 0)")
+    bump = "UPDATE table_versions SET version = version + 1 WHERE name = 'tracks';"
+    conn.executescript(f"""
+    CREATE TRIGGER IF NOT EXISTS trg_tracks_version_insert AFTER INSERT ON tracks BEGIN {bump} END;
+    CREATE TRIGGER IF NOT EXISTS trg_tracks_version_update AFTER UPDATE ON tracks BEGIN {bump} END;
+    CREATE TRIGGER IF NOT EXISTS trg_tracks_version_delete AFTER DELETE ON tracks BEGIN {bump} END;
+    """)
+
+def tracks_version(conn):
+    row = conn.execute("SELECT version FROM table_versions WHERE name = 'tracks'").fetchone()
+    return row["version"] if row else 0
+
+def tracks_etag(conn):
+    return f"tracks-v{tracks_version(conn)}"
+
 # --- NEW: Initialize DB ---
-def init_db(csv_file="spotify_tracks_with_metadata_10000.csv"):
-    """Initialize the SQLite database with clustered tracks."""
+LOAD_CHUNK_ROWS = 100_000
+
+def init_db(csv_file="spotify_tracks_with_metadata_10000.csv", chunk_rows=LOAD_CHUNK_ROWS):
+    """
+    Initialize the SQLite database with clustered tracks.
+
+    Idempotent: the (CSV hash, model version) of the last successful load is
+    kept in load_state, and nothing is done when both are unchanged and the
+    model has its neighbour index. Otherwise
+    the table is replaced in a single transaction by streaming the CSV in
+    chunks, clustering each chunk with one scaler/kmeans call and inserting
+    it with executemany. The scaled features are kept to build the
+    nearest-neighbour index saved to NEIGHBOR_INDEX_PATH.
+    """
+    model = models.get().value
     conn = get_db_connection()
     cursor = conn.cursor()
 
@@ -32,64 +85,235 @@ def init_db(csv_file="spotify_tracks_with_metadata_10000.csv"):
         cluster INTEGER
     )
     """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS load_state (
+        name TEXT PRIMARY KEY,
+        source_hash TEXT,
+        model_version TEXT
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_cluster ON tracks(cluster, id)")
+    init_table_versions(conn)
+
+    source_hash = file_sha256(csv_file)
+    version = model.fingerprint
+    state = cursor.execute("SELECT source_hash, model_version FROM load_state WHERE name = 'tracks'").fetchone()
+    if state is not None and tuple(state) == (source_hash, version) and model.neighbors is not None:
+        conn.close()
+        app.logger.info("Database already up to date with this CSV and model, skipping load.")
+        return
 
-    # Load data
-    df = pd.read_csv(csv_file)
+    total = 0
+    all_ids, all_clusters, all_scaled = [], [], []
+    with conn:
+        # Explicit BEGIN so the trigger drops below roll back with the load on failure
+        cursor.execute("BEGIN")
+        # Per-row version triggers would fire once per inserted track; drop them
+        # for the load and bump the version once (DDL is transactional in SQLite)
+        for trigger in ("insert", "update", "delete"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS trg_tracks_version_{trigger}")
+        cursor.execute("DELETE FROM tracks")
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'tracks'")
 
-    # Extract features and predict clusters
-    X = df[features]
-    X_scaled = scaler.transform(X)
-    df["cluster"] = kmeans.predict(X_scaled)
+        for chunk in pd.read_csv(csv_file, chunksize=chunk_rows):
+            # Extract features and predict clusters
+            X_scaled = model.scaler.transform(chunk[features])
+            clusters = model.kmeans.predict(X_scaled)
+            # Explicit ids (the table was just emptied) so the neighbour index can refer to them
+            ids = np.arange(total + 1, total + len(chunk) + 1)
+            if "artist_name" in chunk.columns:
+                artists = chunk["artist_name"]
+            elif "artist" in chunk.columns:
+                artists = chunk["artist"]
+            else:
+                artists = pd.Series("Unknown", index=chunk.index)
+
+            cursor.executemany(
+                "INSERT INTO tracks (id, track_name, artist_name, cluster) VALUES (?, ?, ?, ?)",
+                zip(ids.tolist(), chunk["track_name"].tolist(), artists.tolist(), clusters.tolist()),
+            )
+            all_ids.append(ids)
+            all_clusters.append(clusters)
+            all_scaled.append(X_scaled)
+            total += len(chunk)
 
-    # Insert into DB
-    for _, row in df.iterrows():
         cursor.execute(
-            "INSERT INTO tracks (track_name, artist_name, cluster) VALUES (?, ?, ?)",
-            (row["track_name"], row.get("artist_name", "Unknown"), int(row["cluster"]))
+            "INSERT OR REPLACE INTO load_state (name, source_hash, model_version) VALUES ('tracks', ?, ?)",
+            (source_hash, version),
         )
-
-    conn.commit()
+        cursor.execute("UPDATE table_versions SET version = version + 1 WHERE name = 'tracks'")
+    init_table_versions(conn)
     conn.close()
-    print("Database initialized with clustered tracks.")
+
+    if total:
+        index = NeighborIndex.build(np.concatenate(all_ids), np.concatenate(all_clusters), np.vstack(all_scaled), version)
+        index.save(NEIGHBOR_INDEX_PATH + ".tmp")
+        os.replace(NEIGHBOR_INDEX_PATH + ".tmp", NEIGHBOR_INDEX_PATH)
+        model.neighbors = index
+    app.logger.info("Database initialized with %d clustered tracks.", total)
+
+def load_neighbor_index(fingerprint, path=NEIGHBOR_INDEX_PATH):
+    """The neighbour index saved at `path`, or None if missing or built for a different model."""
+    if not os.path.exists(path):
+        return None
+    index = NeighborIndex.load(path)
+    return index if index.model_version == fingerprint else None
+
+# Active "spotify" version from the model registry (falls back to the pickles
+# next to this file), hot-swapped between requests; see common/model_registry.py
+models = HotModel(
+    "spotify",
+    build_model,
+    {"kmeans": KMEANS_PATH, "scaler": SCALER_PATH},
+    poll_interval=float(os.environ.get("SPOTIFY_MODEL_POLL_SECONDS", "2")),
+)
 
 # --- Existing routes ---
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500  # stays under SQLite's 999 bound-parameter limit on older builds
+
+cluster_index = ClusterIndex()
+
 @app.route("/predict", methods=["POST"])
 def predict():
+    """
+    Predict the cluster of one track and return a page of the tracks in it.
+    Query params: limit (default 100, max 500), cursor (track id to continue after).
+    The response carries "total" and "next_cursor" (null on the last page).
+
+    mode=nearest&k=10 instead returns the k tracks of the predicted cluster
+    closest to the query in scaled feature space, each with its "distance".
+    """
     data = request.json
     try:
         X = np.array([data[f] for f in features]).reshape(1, -1)
-        X_scaled = scaler.transform(X)
-        cluster = int(kmeans.predict(X_scaled)[0])
+        model = models.get().value
+        X_scaled = model.scaler.transform(X)
+        cluster = int(model.kmeans.predict(X_scaled)[0])
+
+        if request.args.get("mode") == "nearest":
+            return recommend_nearest(model, cluster, X_scaled[0], request.args.get("k", type=int) or 10)
+
+        limit = min(request.args.get("limit", type=int) or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+        cursor = request.args.get("cursor", type=int)
 
         conn = get_db_connection()
-        rows = conn.execute("SELECT * FROM tracks WHERE cluster=?", (cluster,)).fetchall()
+        cluster_index.ensure_fresh(conn)
+        ids, total, has_more = cluster_index.page(cluster, after_id=cursor, limit=limit)
+        rows = []
+        if len(ids):
+            placeholders = ", ".join("?" * len(ids))
+            rows = conn.execute(f"SELECT * FROM tracks WHERE id IN ({placeholders}) ORDER BY id", ids.tolist()).fetchall()
         conn.close()
 
+        next_cursor = int(ids[-1]) if has_more else None
         return jsonify({
             "predicted_cluster": cluster,
-            "tracks": [dict(r) for r in rows]
+            "tracks": [dict(r) for r in rows],
+            "total": total,
+            "next_cursor": next_cursor,
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
-@app.route("/update/<int:track_id>", methods=["POST"])
+def read_feature_matrix():
+    """
+    Decode the batch body into an (n, len(features)) float64 matrix:
+      application/octet-stream -> raw little-endian float64, row-major (no copy)
+      application/x-npy        -> a .npy array of shape (n, 6)
+      JSON                     -> list of {feature: value} objects or list of 6-value lists
+    Raises ValueError for any other shape and for NaN or infinite values.
+    """
+    if request.mimetype == "application/octet-stream":
+        X = np.frombuffer(request.get_data(), dtype="<f8")
+        if X.size % len(features):
+            raise ValueError(f"Buffer length is not a multiple of {len(features)} float64 values.")
+        X = X.reshape(-1, len(features))
+    elif request.mimetype == "application/x-npy":
+        X = np.asarray(np.load(io.BytesIO(request.get_data()), allow_pickle=False), dtype=np.float64)
+    else:
+        data = request.get_json()
+        if isinstance(data, list) and not data:
+            X = np.empty((0, len(features)))
+        elif isinstance(data, list) and isinstance(data[0], dict):
+            X = np.array([[row[f] for f in features] for row in data], dtype=np.float64)
+        else:
+            X = np.asarray(data, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != len(features):
+        raise ValueError(f"Expected an (n, {len(features)}) feature matrix, got shape {X.shape}.")
+    if not np.isfinite(X).all():
+        raise ValueError("Features must be finite numbers (no NaN or infinity).")
+    return X
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """
+    Assign clusters to many tracks with one scaler.transform + kmeans.predict call.
+    Feature order for array/binary input: danceability, energy, valence, tempo, duration_ms, popularity.
+    Returns {"clusters": [...]} or, with Accept: application/octet-stream, raw little-endian int32 ids.
+    """
+    try:
+        X = read_feature_matrix()
+    except (ValueError, KeyError, TypeError, IndexError, EOFError) as e:
+        return jsonify({"error": str(e)}), 400
+    model = models.get().value
+    clusters = model.kmeans.predict(model.scaler.transform(X)).astype("<i4") if len(X) else np.empty(0, dtype="<i4")
+
+    if request.accept_mimetypes.best == "application/octet-stream":
+        return Response(clusters.tobytes(), mimetype="application/octet-stream")
+    return jsonify({"clusters": clusters.tolist()})
+
+def recommend_nearest(model, cluster, x_scaled, k):
+    if model.neighbors is None:
+        return jsonify({"error": "Neighbour index not built for this model; run init_db first."}), 503
+    ids, distances = model.neighbors.query(cluster, x_scaled, k=min(k, MAX_PAGE_SIZE))
+    conn = get_db_connection()
+    rows = {}
+    if len(ids):
+        placeholders = ", ".join("?" * len(ids))
+        rows = {r["id"]: dict(r) for r in conn.execute(f"SELECT * FROM tracks WHERE id IN ({placeholders})", ids.tolist())}
+    conn.close()
+    tracks = [{**rows[i], "distance": float(d)} for i, d in zip(ids.tolist(), distances) if i in rows]
+    return jsonify({"predicted_cluster": cluster, "tracks": tracks})
+
+@app.route("/update/<int:track_id>", methods=["POST", "PUT"])
 def update(track_id):
     data = request.json
     conn = get_db_connection()
+    old = conn.execute("SELECT cluster FROM tracks WHERE id=?", (track_id,)).fetchone()
+    version_before = tracks_version(conn)
     conn.execute("UPDATE tracks SET track_name=?, artist_name=?, cluster=? WHERE id=?",
                  (data["track_name"], data["artist_name"], data["cluster"], track_id))
     conn.commit()
+    if old is not None:
+        cluster_index.move(conn, track_id, old["cluster"], int(data["cluster"]), version_before)
     conn.close()
     return jsonify({"status": "updated"})
 
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """Check the registry / pickles now instead of waiting for the next poll."""
+    models.refresh()
+    cluster_index.version = None
+    return jsonify({"status": "reloaded", "model_version": models.get().version})
+
 @app.route("/analysis")
 def analysis():
     conn = get_db_connection()
+    etag = tracks_etag(conn)
+    if request.if_none_match.contains(etag):
+        conn.close()
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
     rows = conn.execute("SELECT cluster, COUNT(*) as count FROM tracks GROUP BY cluster").fetchall()
     conn.close()
-    return jsonify([dict(r) for r in rows])
+    response = jsonify([dict(r) for r in rows])
+    response.set_etag(etag)
+    return response
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     # Run init once before starting server
     init_db()
     app.run(debug=True)
@@ -0,0 +1,64 @@
+import threading
+
+import numpy as np
+
+
+class ClusterIndex:
+    """
+    In-memory map from cluster id to the sorted array of track ids in it.
+
+    Built from one `SELECT id, cluster` scan and kept in step with the tracks
+    table's version counter (table_versions, bumped by triggers): a request that
+    sees a newer version than the index was built at triggers a rebuild, while
+    this process's own /update calls move single ids between clusters in place.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.members = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _table_version(conn):
+        row = conn.execute("SELECT version FROM table_versions WHERE name = 'tracks'").fetchone()
+        return row[0] if row else 0
+
+    def rebuild(self, conn):
+        version = self._table_version(conn)
+        rows = np.array(conn.execute("SELECT cluster, id FROM tracks ORDER BY cluster, id").fetchall(), dtype=np.int64)
+        members = {}
+        if len(rows):
+            clusters, starts = np.unique(rows[:, 0], return_index=True)
+            bounds = list(starts) + [len(rows)]
+            for i, cluster in enumerate(clusters):
+                members[int(cluster)] = rows[bounds[i]:bounds[i + 1], 1].copy()
+        with self._lock:
+            self.members = members
+            self.version = version
+
+    def ensure_fresh(self, conn):
+        if self.version is None or self.version != self._table_version(conn):
+            self.rebuild(conn)
+
+    def page(self, cluster, after_id=None, limit=100):
+        """
+        Return (ids, total, has_more): up to `limit` track ids in `cluster` with
+        id > after_id, the cluster size, and whether more ids follow this page.
+        """
+        with self._lock:
+            ids = self.members.get(cluster, np.empty(0, dtype=np.int64))
+        start = 0 if after_id is None else int(np.searchsorted(ids, after_id, side="right"))
+        return ids[start:start + limit], len(ids), start + limit < len(ids)
+
+    def move(self, conn, track_id, old_cluster, new_cluster, version_before):
+        """Apply one committed cluster change; fall back to a rebuild if other writers interleaved."""
+        with self._lock:
+            if old_cluster is not None and old_cluster in self.members:
+                ids = self.members[old_cluster]
+                self.members[old_cluster] = ids[ids != track_id]
+            if new_cluster is not None:
+                ids = self.members.get(new_cluster, np.empty(0, dtype=np.int64))
+                if not np.isin(track_id, ids):
+                    self.members[new_cluster] = np.insert(ids, np.searchsorted(ids, track_id), track_id)
+            version_after = self._table_version(conn)
+            self.version = version_after if version_before == self.version and version_after == version_before + 1 else None
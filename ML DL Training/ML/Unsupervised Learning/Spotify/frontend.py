@@ -1,8 +1,15 @@
 import streamlit as st
-import requests
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from common.api_client import ApiClient
+
+@st.cache_resource
+def get_client():
+    return ApiClient("http://127.0.0.1:5000")
+
+client = get_client()
+
 st.title("Spotify Cluster Explorer")
 
 # Input form for prediction
@@ -23,7 +30,7 @@ if st.button("Predict"):
         "duration_ms": duration_ms,
         "popularity": popularity
     }
-    response = requests.post("http://127.0.0.1:5000/predict", json=payload)
+    response = client.post("/predict", json=payload)
     if response.status_code == 200:
         result = response.json()
         st.write("Predicted Cluster:", result.get("predicted_cluster"))
@@ -41,12 +48,12 @@ new_cluster = st.number_input("New Cluster", min_value=0, max_value=4)
 
 if st.button("Update Track"):
     payload = {"track_name": new_name, "artist_name": new_artist, "cluster": new_cluster}
-    response = requests.put(f"http://127.0.0.1:5000/update/{track_id}", json=payload)
+    response = client.put(f"/update/{track_id}", json=payload)
     st.write(response.json())
 
 # Analysis chart
 st.subheader("Cluster Analysis")
-response = requests.get("http://127.0.0.1:5000/analysis")
+response = client.get("/analysis")
 
 if response.status_code == 200:
     try:
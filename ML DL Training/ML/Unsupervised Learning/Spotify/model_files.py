@@ -0,0 +1,66 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+import joblib
+
+from common.model_registry import ModelRegistry
+from neighbor_index import NEIGHBOR_INDEX_PATH
+
+KMEANS_PATH = "spotify_predictor.pkl"
+SCALER_PATH = "scaler.pkl"
+MODEL_NAME = "spotify"
+
+
+def file_sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def model_version(paths=(KMEANS_PATH, SCALER_PATH)):
+    """Identify the model/scaler pair by the hash of their pickles."""
+    return hashlib.sha256("".join(file_sha256(p) for p in paths).encode()).hexdigest()
+
+
+def model_paths(registry=None):
+    """Role -> path of the pair the backend serves: the active registry version, else the pickles in the working directory."""
+    meta = (registry or ModelRegistry()).active(MODEL_NAME)
+    if meta is not None:
+        return meta["paths"]
+    return {"kmeans": KMEANS_PATH, "scaler": SCALER_PATH}
+
+
+def load_models(paths=None):
+    """Return (kmeans, scaler) from their pickles (the served pair by default)."""
+    paths = paths or model_paths()
+    return joblib.load(paths["kmeans"]), joblib.load(paths["scaler"])
+
+
+def publish_models(kmeans, scaler, schema=(), neighbors=None, registry=None):
+    """
+    Publish a new model/scaler pair as the active "spotify" version of the model
+    registry and return (registry version, pair fingerprint).
+
+    Both pickles, and the pair's NeighborIndex when given (stamped with the
+    fingerprint), are copied into one immutable version directory before the
+    registry index is switched to it with a single rename, so a backend's
+    HotModel never sees a new kmeans next to an old scaler or a stale index.
+    """
+    staging = tempfile.mkdtemp(prefix="spotify-publish-", dir=".")
+    try:
+        files = {"kmeans": os.path.join(staging, KMEANS_PATH), "scaler": os.path.join(staging, SCALER_PATH)}
+        joblib.dump(kmeans, files["kmeans"])
+        joblib.dump(scaler, files["scaler"])
+        fingerprint = model_version((files["kmeans"], files["scaler"]))
+        if neighbors is not None:
+            neighbors.model_version = fingerprint
+            files["neighbors"] = os.path.join(staging, NEIGHBOR_INDEX_PATH)
+            neighbors.save(files["neighbors"])
+        version = (registry or ModelRegistry()).register(MODEL_NAME, files, schema)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return version, fingerprint
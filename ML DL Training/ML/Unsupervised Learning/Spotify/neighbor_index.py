@@ -0,0 +1,53 @@
+import joblib
+import numpy as np
+from sklearn.neighbors import KDTree
+
+NEIGHBOR_INDEX_PATH = "spotify_neighbors.pkl"
+
+
+class NeighborIndex:
+    """
+    Per-cluster KD-trees over the scaled feature vectors of every track, so
+    "closest tracks to this query" is a tree lookup inside the predicted cluster
+    instead of a scan of SQLite. Built by init_db (saved next to spotify_predictor.pkl)
+    and by recluster.py (published with the model pair it was built for).
+    """
+
+    def __init__(self, trees=None, ids=None, model_version=None):
+        self.trees = trees or {}
+        self.ids = ids or {}
+        self.model_version = model_version
+
+    @classmethod
+    def build(cls, ids, clusters, X_scaled, model_version=None, leaf_size=40):
+        ids = np.asarray(ids, dtype=np.int64)
+        clusters = np.asarray(clusters)
+        X_scaled = np.asarray(X_scaled, dtype=np.float64)
+        members = ((cluster, ids[clusters == cluster], X_scaled[clusters == cluster]) for cluster in np.unique(clusters))
+        return cls.from_clusters(members, model_version, leaf_size)
+
+    @classmethod
+    def from_clusters(cls, members, model_version=None, leaf_size=40):
+        """Build from (cluster, ids, X_scaled) triples, one cluster at a time."""
+        trees, ids = {}, {}
+        for cluster, cluster_ids, X_scaled in members:
+            trees[int(cluster)] = KDTree(np.asarray(X_scaled, dtype=np.float64), leaf_size=leaf_size)
+            ids[int(cluster)] = np.asarray(cluster_ids, dtype=np.int64)
+        return cls(trees, ids, model_version)
+
+    def query(self, cluster, x_scaled, k=10):
+        """Return (track_ids, distances) of the k nearest tracks to `x_scaled` within `cluster`."""
+        tree = self.trees.get(cluster)
+        if tree is None:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        k = min(k, len(self.ids[cluster]))
+        distances, positions = tree.query(np.asarray(x_scaled, dtype=np.float64).reshape(1, -1), k=k)
+        return self.ids[cluster][positions[0]], distances[0]
+
+    def save(self, path=NEIGHBOR_INDEX_PATH):
+        joblib.dump({"trees": self.trees, "ids": self.ids, "model_version": self.model_version}, path)
+
+    @classmethod
+    def load(cls, path=NEIGHBOR_INDEX_PATH):
+        state = joblib.load(path)
+        return cls(state["trees"], state["ids"], state["model_version"])
@@ -0,0 +1,177 @@
+"""
+Incrementally re-fit the Spotify clustering on a streamed catalog CSV.
+
+Memory stays bounded by --chunk-rows whatever the catalog size, plus one
+cluster's rows while its KD-tree is built: the relabelling pass spills each
+chunk's ids and scaled features to per-cluster files in a temporary directory,
+and the neighbour index is built from them one cluster at a time:
+  1. StandardScaler.partial_fit over the chunks (skipped with --keep-scaler)
+  2. MiniBatchKMeans.partial_fit over the chunks for --epochs passes, warm-started
+     from the current centroids (mapped into the new scaled space)
+  3. tracks.cluster relabelled in place chunk by chunk, in one transaction, and
+     the per-cluster KD-trees of neighbor_index.py rebuilt from the same pass
+  4. the new model/scaler pair and its neighbour index published together as
+     the active "spotify" version of the model registry
+     (model_files.publish_models), and load_state stamped with the pair's
+     fingerprint, so init_db does not reload the table for it
+  5. the running backend's HotModel picks the new pair up on its next poll;
+     --notify POSTs <backend>/admin/reload to swap immediately
+
+Track ids follow CSV row order (init_db inserts row i with id i + 1), which is
+how relabelled clusters are matched back to rows. The job therefore refuses a
+CSV other than the one init_db loaded (the source hash in load_state), and the
+relabelling rolls back if the CSV rows and the tracks table do not line up.
+
+Usage:
+    python recluster.py [--csv FILE] [--chunk-rows N] [--epochs N] [--notify http://127.0.0.1:5000]
+"""
+import argparse
+import logging
+import sqlite3
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.preprocessing import StandardScaler
+
+from model_files import file_sha256, load_models, publish_models
+from neighbor_index import NeighborIndex
+
+logger = logging.getLogger(__name__)
+
+features = ["danceability", "energy", "valence", "tempo", "duration_ms", "popularity"]
+
+
+def iter_chunks(csv_file, chunk_rows):
+    for chunk in pd.read_csv(csv_file, usecols=features, chunksize=chunk_rows):
+        yield chunk[features]
+
+
+def fit_scaler(csv_file, chunk_rows):
+    scaler = StandardScaler()
+    for chunk in iter_chunks(csv_file, chunk_rows):
+        scaler.partial_fit(chunk)
+    return scaler
+
+
+def fit_kmeans(csv_file, chunk_rows, scaler, init_centers, epochs, random_state=42):
+    kmeans = MiniBatchKMeans(
+        n_clusters=len(init_centers),
+        init=init_centers,
+        n_init=1,
+        batch_size=chunk_rows,
+        random_state=random_state,
+    )
+    for _ in range(epochs):
+        for chunk in iter_chunks(csv_file, chunk_rows):
+            kmeans.partial_fit(scaler.transform(chunk))
+    return kmeans
+
+
+def check_catalog(db_path, csv_file):
+    """Raise ValueError unless `csv_file` is the catalog init_db loaded into `db_path`."""
+    conn = sqlite3.connect(db_path)
+    try:
+        state = conn.execute("SELECT source_hash FROM load_state WHERE name = 'tracks'").fetchone()
+    except sqlite3.OperationalError:
+        state = None
+    conn.close()
+    if state is None:
+        raise ValueError(f"{db_path} has no loaded catalog; run the backend's init_db first.")
+    if state[0] != file_sha256(csv_file):
+        raise ValueError(f"{csv_file} is not the catalog loaded into {db_path}; track ids would not match its rows.")
+
+
+def spill_by_cluster(spill_dir, ids, labels, X_scaled):
+    """Append one chunk's track ids and scaled features to <spill_dir>/<cluster>.ids / .features."""
+    for cluster in np.unique(labels):
+        mask = labels == cluster
+        with open(spill_dir / f"{cluster}.ids", "ab") as f:
+            ids[mask].astype(np.int64).tofile(f)
+        with open(spill_dir / f"{cluster}.features", "ab") as f:
+            X_scaled[mask].astype(np.float64).tofile(f)
+
+
+def read_spilled_clusters(spill_dir):
+    """Yield (cluster, ids, X_scaled) per spilled cluster, reading one cluster at a time."""
+    for path in sorted(spill_dir.glob("*.ids"), key=lambda p: int(p.stem)):
+        ids = np.fromfile(path, dtype=np.int64)
+        X_scaled = np.fromfile(path.with_suffix(".features"), dtype=np.float64).reshape(len(ids), len(features))
+        yield int(path.stem), ids, X_scaled
+
+
+def relabel_tracks(db_path, csv_file, chunk_rows, scaler, kmeans):
+    """
+    Rewrite tracks.cluster for every CSV row. Returns how many rows changed
+    cluster and the NeighborIndex of the new labels.
+    """
+    conn = sqlite3.connect(db_path)
+    changed = 0
+    start = 0
+    with tempfile.TemporaryDirectory(prefix="recluster-") as spill_dir:
+        spill_dir = Path(spill_dir)
+        try:
+            with conn:
+                for chunk in iter_chunks(csv_file, chunk_rows):
+                    X_scaled = scaler.transform(chunk)
+                    labels = kmeans.predict(X_scaled)
+                    ids = np.arange(start + 1, start + len(chunk) + 1)
+                    changed += conn.executemany(
+                        "UPDATE tracks SET cluster = ? WHERE id = ? AND cluster IS NOT ?",
+                        zip(labels.tolist(), ids.tolist(), labels.tolist()),
+                    ).rowcount
+                    spill_by_cluster(spill_dir, ids, labels, X_scaled)
+                    start += len(chunk)
+                # Rolls the relabelling back unless ids 1..n are exactly the n CSV rows
+                count, low, high = conn.execute("SELECT COUNT(*), MIN(id), MAX(id) FROM tracks").fetchone()
+                if count != start or (start and (low, high) != (1, start)):
+                    raise ValueError(f"{csv_file} has {start} rows but tracks holds {count} (ids {low}..{high}); nothing relabelled.")
+        finally:
+            conn.close()
+        index = NeighborIndex.from_clusters(read_spilled_clusters(spill_dir))
+    return changed, index
+
+
+def stamp_load_state(db_path, fingerprint):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE load_state SET model_version = ? WHERE name = 'tracks'", (fingerprint,))
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mini-batch re-clustering of the Spotify catalog.")
+    parser.add_argument("--csv", default="spotify_tracks_with_metadata_10000.csv")
+    parser.add_argument("--db", default="spotify_clusters.db")
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--keep-scaler", action="store_true", help="Reuse the current scaler instead of refitting it.")
+    parser.add_argument("--notify", help="Backend base URL to POST /admin/reload to after publishing.")
+    args = parser.parse_args()
+
+    try:
+        check_catalog(args.db, args.csv)
+    except ValueError as e:
+        raise SystemExit(f"recluster: {e}")
+    old_kmeans, old_scaler = load_models()
+    scaler = old_scaler if args.keep_scaler else fit_scaler(args.csv, args.chunk_rows)
+    # Warm start: current centroids, moved from the old scaled space into the new one
+    init_centers = scaler.transform(old_scaler.inverse_transform(old_kmeans.cluster_centers_))
+    kmeans = fit_kmeans(args.csv, args.chunk_rows, scaler, init_centers, args.epochs)
+
+    changed, neighbors = relabel_tracks(args.db, args.csv, args.chunk_rows, scaler, kmeans)
+    version, fingerprint = publish_models(kmeans, scaler, features, neighbors)
+    stamp_load_state(args.db, fingerprint)
+    logger.info("Re-clustered catalog: %d tracks changed cluster, spotify model version %s (%s).", changed, version, fingerprint[:12])
+
+    if args.notify:
+        import requests
+        res = requests.post(args.notify.rstrip("/") + "/admin/reload", timeout=30)
+        logger.info("Backend reload: %s %s", res.status_code, res.text.strip())
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    main()
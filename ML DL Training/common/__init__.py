@@ -0,0 +1,6 @@
+"""
+Helpers shared by the backends and frontends under "ML DL Training".
+
+Install once so every app can import them from its own directory:
+    pip install -e "ML DL Training"
+"""
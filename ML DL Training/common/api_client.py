@@ -0,0 +1,127 @@
+"""
+HTTP client shared by the Streamlit frontends that talk to the Flask backends.
+
+- One keep-alive requests.Session with a connection pool, instead of a new
+  TCP connection per requests.get call.
+- GET responses are cached for `ttl` seconds; once stale, they are revalidated
+  with If-None-Match so an unchanged table costs a 304 instead of a download.
+- POST/PUT/DELETE through the client invalidate the cache.
+
+Frontends keep one client per process:
+
+    @st.cache_resource
+    def get_client():
+        return ApiClient("http://localhost:5000")
+"""
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CachedResponse:
+    """The parts of requests.Response the frontends use, safe to keep in a cache."""
+
+    def __init__(self, status_code, body, text, headers, content=b""):
+        self.status_code = status_code
+        self._body = body
+        self.text = text
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return self._body
+
+    @classmethod
+    def from_response(cls, res):
+        content_type = res.headers.get("Content-Type", "")
+        if content_type and not content_type.startswith(("application/json", "text/")):
+            # Binary payloads (e.g. .npz column archives) are kept as raw bytes only
+            return cls(res.status_code, None, "", dict(res.headers), res.content)
+        try:
+            body = res.json()
+        except ValueError:
+            body = None
+        return cls(res.status_code, body, res.text, dict(res.headers), res.content)
+
+
+class ApiClient:
+    def __init__(self, base_url, ttl=30.0, pool_size=10, timeout=10.0):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def _url(self, path):
+        return self.base_url + "/" + path.lstrip("/")
+
+    @staticmethod
+    def _key(path, params):
+        items = []
+        for k, v in sorted((params or {}).items()):
+            for item in (v if isinstance(v, (list, tuple)) else [v]):
+                items.append((k, str(item)))
+        return path, tuple(items)
+
+    def get(self, path, params=None, ttl=None):
+        key = self._key(path, params)
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+
+        headers = {}
+        if entry is not None and entry[1].headers.get("ETag"):
+            headers["If-None-Match"] = entry[1].headers["ETag"]
+        res = self.session.get(self._url(path), params=params, headers=headers, timeout=self.timeout)
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        if res.status_code == 304 and entry is not None:
+            self.revalidated += 1
+            with self._lock:
+                self._cache[key] = (expires, entry[1])
+            return entry[1]
+
+        self.misses += 1
+        cached = CachedResponse.from_response(res)
+        if res.status_code == 200:
+            with self._lock:
+                self._cache[key] = (expires, cached)
+        return cached
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        res = self.session.request(method, self._url(path), **kwargs)
+        self.invalidate()
+        return res
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def invalidate(self, path_prefix=None):
+        """Drop cached GETs (all of them, or those whose path starts with `path_prefix`)."""
+        with self._lock:
+            if path_prefix is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if k[0].startswith(path_prefix)]:
+                    del self._cache[key]
+
+    def stats(self):
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses, "entries": len(self._cache)}
@@ -0,0 +1,122 @@
+"""
+Benchmark worker cold start and memory: plain pickle / Keras .h5 loading versus
+the memory-mapped exports from common/mmap_artifacts.py.
+
+N fresh Python processes load the artifact at the same time, touch every array
+(so mapped pages are really resident), and report load time, RSS and PSS. PSS
+(proportional set size, Linux only) splits shared pages between the processes
+mapping them, so it shows what each extra worker really costs.
+
+Usage (from "ML DL Training"):
+    python -m common.bench_model_startup ML/LoanTask/loan_pretrained.pkl --workers 8
+    python -m common.bench_model_startup DL/Tensorflow/cifar_model.h5 --workers 4
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from common.mmap_artifacts import export_keras_weights, export_pickle, mmap_path
+
+WORKER = r"""
+import json, sys, time
+import numpy as np
+
+def touch(obj, seen=None, depth=0):
+    seen = set() if seen is None else seen
+    if id(obj) in seen or depth > 8:
+        return 0.0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return float(np.asarray(obj, dtype=np.float64).sum()) if obj.dtype.kind in "biuf" and obj.size else 0.0
+    if isinstance(obj, dict):
+        return sum(touch(v, seen, depth + 1) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(touch(v, seen, depth + 1) for v in obj)
+    if hasattr(obj, "__dict__"):
+        return touch(vars(obj), seen, depth + 1)
+    return 0.0
+
+def memory():
+    stats = {{}}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                stats["rss_mb"] = int(line.split()[1]) / 1024
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    stats["pss_mb"] = int(line.split()[1]) / 1024
+    except FileNotFoundError:
+        pass
+    return stats
+
+start = time.perf_counter()
+{load}
+touch(obj)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"load_s": elapsed}}), flush=True)
+sys.stdin.readline()          # wait until every worker has loaded
+print(json.dumps(memory()), flush=True)
+"""
+
+LOADERS = {
+    "pickle": "import joblib; obj = joblib.load({path!r})",
+    "mmap": "import joblib; obj = joblib.load({path!r}, mmap_mode='r')",
+    "h5": "from tensorflow.keras.models import load_model; obj = [w.numpy() for w in load_model({path!r}).weights]",
+    "npy": "from common.mmap_artifacts import load_npy_bundle; obj = load_npy_bundle({path!r})",
+}
+
+
+def run(mode, path, workers):
+    code = WORKER.format(load=LOADERS[mode].format(path=str(path)))
+    procs = [
+        subprocess.Popen([sys.executable, "-c", code], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    results = [json.loads(p.stdout.readline()) for p in procs]
+    for p in procs:
+        p.stdin.write("\n")
+        p.stdin.flush()
+    for p, result in zip(procs, results):
+        result.update(json.loads(p.stdout.readline()))
+        p.wait()
+    return results
+
+
+def summarize(mode, results):
+    def mean(key):
+        values = [r[key] for r in results if key in r]
+        return sum(values) / len(values) if values else float("nan")
+
+    print(f"{mode:>7}: load {mean('load_s') * 1000:8.1f} ms   RSS {mean('rss_mb'):8.1f} MB   PSS {mean('pss_mb'):8.1f} MB  (per worker)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("artifact", help="A joblib .pkl or a Keras .h5 file.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--npy-dir", help="Weights bundle for .h5 models (default: <stem>_npy next to the .h5).")
+    args = parser.parse_args()
+
+    artifact = Path(args.artifact).resolve()
+    if artifact.suffix == ".h5":
+        npy_dir = Path(args.npy_dir) if args.npy_dir else artifact.with_name(artifact.stem + "_npy")
+        if not (npy_dir / "manifest.json").exists():
+            export_keras_weights(artifact, npy_dir)
+        pairs = [("h5", artifact), ("npy", npy_dir)]
+    else:
+        exported = mmap_path(artifact)
+        if not exported.exists():
+            export_pickle(artifact, exported)
+        pairs = [("pickle", artifact), ("mmap", exported)]
+
+    print(f"{args.workers} concurrent workers loading {artifact.name}")
+    for mode, path in pairs:
+        summarize(mode, run(mode, path, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Memory-mappable model artifacts for fast, shared worker startup.
+
+Pickles loaded with plain joblib.load are copied into every worker's private
+memory. An uncompressed joblib dump instead stores each NumPy array as a raw,
+aligned block that joblib.load(..., mmap_mode="r") maps straight from the page
+cache, so N workers share one physical copy and loading is mostly page-table work.
+
+    export_pickle("loan_pretrained.pkl")        -> loan_pretrained.mmap.pkl
+    load_artifact("loan_pretrained.pkl")        -> mmap'd export if it is up to date, else the pickle
+
+Keras models (cifar_model.h5) are exported to a directory of raw .npy files plus
+a manifest.json; load_npy_bundle() maps them back with np.load(mmap_mode="r").
+
+CLI:
+    python -m common.mmap_artifacts export loan_pretrained.pkl
+    python -m common.mmap_artifacts export-keras cifar_model.h5 cifar_weights
+"""
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def mmap_path(path):
+    path = Path(path)
+    return path.with_name(path.stem + ".mmap" + path.suffix)
+
+
+def export_pickle(path, out=None):
+    """Re-dump a (possibly compressed) joblib pickle uncompressed so its arrays can be mmap'd."""
+    out = Path(out) if out else mmap_path(path)
+    tmp = out.with_name(out.name + ".tmp")
+    joblib.dump(joblib.load(path), tmp, compress=0)
+    os.replace(tmp, out)
+    return out
+
+
+def load_artifact(path, mmap_mode="r"):
+    """
+    Load `path`, preferring its memory-mappable export when one exists and is
+    at least as new as the source pickle. Arrays come back as read-only memmaps.
+    """
+    exported = mmap_path(path)
+    if exported.exists() and exported.stat().st_mtime_ns >= Path(path).stat().st_mtime_ns:
+        return joblib.load(exported, mmap_mode=mmap_mode)
+    return joblib.load(path)
+
+
+def export_keras_weights(h5_path, out_dir):
+    """Write every weight tensor of a Keras model as <out_dir>/<i>.npy plus manifest.json."""
+    from tensorflow.keras.models import load_model
+
+    model = load_model(h5_path)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {"source": str(h5_path), "weights": []}
+    for i, weight in enumerate(model.weights):
+        fname = f"{i:03d}.npy"
+        np.save(out_dir / fname, np.ascontiguousarray(weight.numpy()))
+        manifest["weights"].append({"file": fname, "name": weight.name, "shape": list(weight.shape)})
+    with open(out_dir / "manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    return out_dir
+
+
+def load_npy_bundle(out_dir, mmap_mode="r"):
+    """Return [(name, array), ...] from an export_keras_weights directory, memory-mapped."""
+    out_dir = Path(out_dir)
+    with open(out_dir / "manifest.json") as f:
+        manifest = json.load(f)
+    return [(w["name"], np.load(out_dir / w["file"], mmap_mode=mmap_mode)) for w in manifest["weights"]]
+
+
+def _main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Export model artifacts to memory-mappable formats.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="Uncompressed joblib export of a pickle.")
+    exp.add_argument("path")
+    exp.add_argument("--out")
+    keras = sub.add_parser("export-keras", help="Raw .npy bundle of a Keras model's weights.")
+    keras.add_argument("h5_path")
+    keras.add_argument("out_dir")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        logger.info("Wrote %s", export_pickle(args.path, args.out))
+    else:
+        logger.info("Wrote %s", export_keras_weights(args.h5_path, args.out_dir))
+
+
+if __name__ == "__main__":
+    _main()
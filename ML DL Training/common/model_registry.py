@@ -0,0 +1,272 @@
+"""
+Small local model registry plus hot-swapping model holder for the Flask backends.
+
+Layout under the registry root ($MODEL_REGISTRY, default "ML DL Training/model_registry"):
+
+    registry.json                       index of every artifact
+    <name>/<version>/<file>             immutable copies of the registered files
+
+registry.json records, per artifact name, the active version and for every
+version its files (role -> file name), their sha256 checksums, the feature
+schema and the registration time. The index is rewritten with temp-file +
+rename, so readers always see a complete file. register() and activate()
+read-modify-write the index under an exclusive flock on <root>/registry.lock,
+so several processes (gunicorn workers, recluster.py, this CLI) can publish
+at once. Without fcntl (Windows) only threads of one process are serialised.
+
+CLI:
+    python -m common.model_registry register loan --file model=loan_pretrained.pkl --schema Married Education ...
+    python -m common.model_registry activate loan 3
+    python -m common.model_registry list [name]
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from common.process_local import ProcessLocal
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, see the module docstring
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOT = Path(__file__).resolve().parents[1] / "model_registry"
+
+
+def sha256_file(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    def __init__(self, root=None):
+        self.root = Path(root or os.environ.get("MODEL_REGISTRY") or DEFAULT_ROOT)
+        self.index_path = self.root / "registry.json"
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _publishing(self):
+        """Exclusive access to the index for one read-modify-write, across threads and processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / "registry.lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ---------- Index ----------
+
+    def _read(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, index):
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.index_path)
+
+    def index_mtime(self):
+        try:
+            return self.index_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    # ---------- Queries ----------
+
+    def versions(self, name):
+        return self._read().get(name, {}).get("versions", {})
+
+    def active(self, name):
+        """Metadata of the active version of `name` (with absolute "paths"), or None."""
+        entry = self._read().get(name)
+        if not entry or entry.get("active") is None:
+            return None
+        version = str(entry["active"])
+        meta = dict(entry["versions"][version])
+        meta["version"] = version
+        meta["paths"] = {role: str(self.root / name / version / fname) for role, fname in meta["files"].items()}
+        return meta
+
+    # ---------- Changes ----------
+
+    def register(self, name, files, schema=None, activate=True):
+        """Copy `files` (role -> path) into the registry as a new version of `name`."""
+        with self._publishing():
+            index = self._read()
+            entry = index.setdefault(name, {"active": None, "versions": {}})
+            version = str(max((int(v) for v in entry["versions"]), default=0) + 1)
+            target = self.root / name / version
+            target.mkdir(parents=True, exist_ok=False)
+
+            meta = {"files": {}, "sha256": {}, "schema": list(schema or []), "created": time.time()}
+            for role, path in files.items():
+                fname = Path(path).name
+                shutil.copy2(path, target / fname)
+                meta["files"][role] = fname
+                meta["sha256"][role] = sha256_file(target / fname)
+            entry["versions"][version] = meta
+            if activate:
+                entry["active"] = version
+            self._write(index)
+            return version
+
+    def activate(self, name, version):
+        with self._publishing():
+            index = self._read()
+            if str(version) not in index.get(name, {}).get("versions", {}):
+                raise KeyError(f"{name} has no version {version}")
+            index[name]["active"] = str(version)
+            self._write(index)
+
+    def verify(self, meta):
+        for role, path in meta["paths"].items():
+            if sha256_file(path) != meta["sha256"][role]:
+                raise ValueError(f"Checksum mismatch for {path}")
+
+
+class LoadedModel:
+    """One immutable (version, value) pair. Requests keep a reference for their whole duration."""
+
+    def __init__(self, version, value, schema=None):
+        self.version = version
+        self.value = value
+        self.schema = schema or []
+
+
+class HotModel:
+    """
+    Serve the active registry version of `name`, swapping to a new one between requests.
+
+    `build(paths)` turns a role -> file path dict into the object the backend
+    uses (e.g. loads the pickles). When the registry has no active entry for
+    `name`, `fallback_files` (the backend's legacy pickles) are used instead and
+    watched by mtime. A background thread polls every `poll_interval` seconds,
+    builds the new version off the request path, then swaps it in with a single
+    reference assignment. Requests that already called get() finish on the old
+    model, which is also kept as `previous` for quick inspection or rollback.
+    """
+
+    def __init__(self, name, build, fallback_files, registry=None, poll_interval=2.0):
+        self.name = name
+        self.build = build
+        self.fallback_files = fallback_files
+        self.registry = registry or ModelRegistry()
+        self.poll_interval = poll_interval
+        self.previous = None
+        self._source_key = None
+        self._lock = threading.Lock()
+        # Started lazily so it also runs in workers forked after import
+        self._watcher = ProcessLocal(self._start_watcher)
+        self._current = None
+        self.refresh()
+
+    def _source(self):
+        meta = self.registry.active(self.name)
+        if meta is not None:
+            return ("registry", meta["version"]), meta
+        stamp = tuple(os.stat(p).st_mtime_ns for p in self.fallback_files.values())
+        version = "file-" + hashlib.sha256(repr(stamp).encode()).hexdigest()[:12]
+        return ("file", stamp), {"version": version, "paths": dict(self.fallback_files), "schema": []}
+
+    def refresh(self):
+        """Load the active version if it changed; returns True when a swap happened."""
+        with self._lock:
+            key, meta = self._source()
+            if key == self._source_key:
+                return False
+            if key[0] == "registry":
+                self.registry.verify(meta)
+            loaded = LoadedModel(meta["version"], self.build(meta["paths"]), meta.get("schema"))
+            self.previous, self._current = self._current, loaded
+            self._source_key = key
+            return True
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                if self.refresh():
+                    logger.info("[%s] swapped to model version %s", self.name, self._current.version)
+            except Exception:
+                logger.exception("[%s] model reload failed, keeping version %s", self.name, self._current.version)
+
+    def _start_watcher(self):
+        thread = threading.Thread(target=self._watch, name=f"hot-model-{self.name}", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def current(self):
+        """The loaded model without starting the watcher, e.g. in a pre-fork master."""
+        return self._current
+
+    def get(self):
+        if self.poll_interval:
+            self._watcher.get()
+        return self._current
+
+
+def _main():
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Local model registry.")
+    parser.add_argument("--root", help="Registry root (default: $MODEL_REGISTRY or ML DL Training/model_registry).")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    reg = sub.add_parser("register", help="Register files as a new version.")
+    reg.add_argument("name")
+    reg.add_argument("--file", action="append", required=True, metavar="ROLE=PATH")
+    reg.add_argument("--schema", nargs="*", default=[])
+    reg.add_argument("--no-activate", action="store_true")
+
+    act = sub.add_parser("activate", help="Make a registered version active.")
+    act.add_argument("name")
+    act.add_argument("version")
+
+    lst = sub.add_parser("list", help="Show registered artifacts.")
+    lst.add_argument("name", nargs="?")
+
+    args = parser.parse_args()
+    registry = ModelRegistry(args.root)
+    if args.command == "register":
+        files = dict(item.split("=", 1) for item in args.file)
+        version = registry.register(args.name, files, args.schema, activate=not args.no_activate)
+        logger.info("Registered %s version %s", args.name, version)
+    elif args.command == "activate":
+        registry.activate(args.name, args.version)
+        logger.info("%s active version is now %s", args.name, args.version)
+    else:
+        index = registry._read()
+        for name, entry in index.items():
+            if args.name and name != args.name:
+                continue
+            for version, meta in sorted(entry["versions"].items(), key=lambda kv: int(kv[0])):
+                marker = "*" if version == entry["active"] else " "
+                print(f"{marker} {name} v{version}  files={meta['files']}  schema={len(meta['schema'])} cols")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,40 @@
+"""
+Per-process state for objects that are created before a fork.
+
+The backends build their batchers, queues, pools and caches at import time,
+and the pre-forking servers (serve.py, gunicorn --preload) then fork workers
+from that process. Threads do not survive a fork and SQLite handles or queues
+must not be shared across one, so each of those objects keeps its threads
+and handles in a ProcessLocal and rebuilds them on first use in every process:
+
+    self._queue = ProcessLocal(self._start_worker)   # factory returns the queue
+    self._queue.get().put(item)                      # worker started on first use per process
+"""
+import os
+import threading
+
+
+class ProcessLocal:
+    """
+    The value returned by `factory()`, created lazily and again in every
+    process that uses it. The pid is re-checked under a lock, so concurrent
+    first calls in one process run `factory` exactly once.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._pid = None
+        self._value = None
+
+    def get(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._value = self.factory()
+                    self._pid = os.getpid()
+        return self._value
+
+    def created(self):
+        """True once get() has created the value in this process."""
+        return self._pid == os.getpid()
@@ -0,0 +1,194 @@
+"""
+Prediction result cache shared by the backends.
+
+Results are keyed by content, not by request: the SHA-256 of the uploaded bytes
+(images) or of the canonical JSON of the input (tabular rows), plus the model
+version. Re-uploads of the same image or re-submissions of the same form skip
+decoding and inference, and a model swap (new version) never serves a stale result.
+
+- In memory: an LRU of at most `max_entries` results, each valid for `ttl` seconds.
+- On disk (optional, `disk_path`): a SQLite table behind the LRU, so results
+  survive restarts and are shared by the workers on one host. Expired rows
+  are pruned and the table is trimmed to `max_disk_entries` as it grows.
+
+Values must be JSON-serialisable.
+
+    cache = ResultCache(max_entries=10_000, ttl=3600, disk_path="results_cache.db")
+    key = bytes_key(image_bytes, model_version)        # or json_key(record, model_version)
+    result = cache.get(key)
+    if result is None:
+        result = cache.put(key, compute())
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from common.process_local import ProcessLocal
+
+
+def bytes_key(data, version=""):
+    return f"{version}:{hashlib.sha256(data).hexdigest()}"
+
+
+def _canonical(value):
+    # 3 and 3.0 give the same key: every number becomes a float
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return str(value)
+
+
+def canonical_json(obj):
+    """Sorted keys, no whitespace, every number as a float."""
+    return json.dumps(_canonical(obj), sort_keys=True, separators=(",", ":"))
+
+
+def json_key(obj, version=""):
+    return f"{version}:{hashlib.sha256(canonical_json(obj).encode()).hexdigest()}"
+
+
+class ResultCache:
+    def __init__(self, max_entries=10_000, ttl=None, disk_path=None, max_disk_entries=1_000_000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()  # key -> (expires, value)
+        self._lock = threading.Lock()
+        # One connection per process (safe across forks); the lock serialises use between threads
+        self._disk = ProcessLocal(self._connect)
+        self._disk_writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 or bool(self.disk_path)
+
+    def _expires(self):
+        return time.time() + self.ttl if self.ttl else None
+
+    # ---------- Disk layer ----------
+
+    def _connect(self):
+        db = sqlite3.connect(self.disk_path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)")
+        return db
+
+    def _db(self):
+        return self._disk.get()
+
+    def _disk_get(self, key, now):
+        row = self._db().execute("SELECT value, expires FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= now:
+            self._db().execute("DELETE FROM results WHERE key = ?", (key,))
+            self.expired += 1
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _disk_put(self, key, value, expires):
+        db = self._db()
+        db.execute("INSERT OR REPLACE INTO results (key, value, expires) VALUES (?, ?, ?)", (key, json.dumps(value), expires))
+        self._disk_writes += 1
+        if self._disk_writes % 1000 == 0:
+            db.execute("DELETE FROM results WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+            db.execute(
+                "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_entries,),
+            )
+
+    # ---------- Cache API ----------
+
+    def get(self, key):
+        """The cached value for `key`, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] is None or entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expired += 1
+            if self.disk_path:
+                found = self._disk_get(key, now)
+                if found is not None:
+                    value, expires = found
+                    self._remember(key, value, expires)
+                    self.disk_hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Store and return `value`."""
+        expires = self._expires()
+        with self._lock:
+            self._remember(key, value, expires)
+            if self.disk_path:
+                self._disk_put(key, value, expires)
+        return value
+
+    def _remember(self, key, value, expires):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self.disk_path:
+                self._db().execute("DELETE FROM results")
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "disk": self.disk_path,
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expired": self.expired,
+            }
+
+
+def from_env(prefix, default_size=10_000, default_ttl=3600):
+    """
+    ResultCache configured from <prefix>_CACHE_SIZE (0 disables the memory
+    layer), <prefix>_CACHE_TTL (seconds, 0 = no expiry) and <prefix>_CACHE_DB
+    (SQLite path of the disk layer, unset = memory only).
+    """
+    ttl = float(os.environ.get(f"{prefix}_CACHE_TTL", default_ttl))
+    return ResultCache(
+        max_entries=int(os.environ.get(f"{prefix}_CACHE_SIZE", default_size)),
+        ttl=ttl or None,
+        disk_path=os.environ.get(f"{prefix}_CACHE_DB") or None,
+    )
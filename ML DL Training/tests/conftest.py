@@ -0,0 +1,52 @@
+"""
+Shared fixtures for the backend smoke tests.
+
+The backends are standalone scripts that open their pickles, CSVs and SQLite
+databases relative to the working directory, so every test imports a fresh
+copy of the script from inside its own tmp_path.
+"""
+import importlib.util
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def load_script(tmp_path, monkeypatch):
+    """
+    load_script("ML/LoanTask/app.py", copy=["loan_pretrained.pkl"]) copies the
+    listed files from the script's directory into tmp_path, then imports the
+    script as a new module with tmp_path as the working directory.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MODEL_REGISTRY", str(tmp_path / "model_registry"))
+    # No HotModel pollers: tests swap models explicitly with refresh()
+    for prefix in ("LOAN", "SPOTIFY", "HOUSE"):
+        monkeypatch.setenv(f"{prefix}_MODEL_POLL_SECONDS", "0")
+
+    scripts_before = set(sys.modules)
+
+    def load(relative_path, copy=()):
+        path = ROOT / relative_path
+        for name in copy:
+            shutil.copy(path.parent / name, tmp_path / name)
+        monkeypatch.syspath_prepend(str(path.parent))
+        name = f"{path.parent.name}_{path.stem}".replace(" ", "_")
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, name, module)
+        spec.loader.exec_module(module)
+        return module
+
+    yield load
+
+    # Sibling modules the scripts imported (`import app`, `import model_files`)
+    # were loaded relative to this test's working directory; forget them
+    for name in set(sys.modules) - scripts_before:
+        path = getattr(sys.modules[name], "__file__", None) or ""
+        if path.startswith(str(ROOT)) and not path.startswith((str(ROOT / "common"), str(ROOT / "tests"))):
+            del sys.modules[name]
@@ -0,0 +1,63 @@
+from urllib.parse import urlsplit
+
+import pytest
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from common.api_client import ApiClient
+from test_applicants_app import APPLICANT
+
+
+class FlaskAdapter(BaseAdapter):
+    """Send the session's requests to a Flask test client instead of the network."""
+
+    def __init__(self, flask_client):
+        super().__init__()
+        self.flask_client = flask_client
+        self.sent = []
+
+    def send(self, request, **kwargs):
+        url = urlsplit(request.url)
+        self.sent.append((request.method, url.path, request.headers.get("If-None-Match")))
+        result = self.flask_client.open(
+            url.path, method=request.method, query_string=url.query, data=request.body,
+            headers=dict(request.headers),
+        )
+        response = Response()
+        response.status_code = result.status_code
+        response.headers = CaseInsensitiveDict(result.headers)
+        response._content = result.get_data()
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def api(load_script):
+    app = load_script("ML/LoanTask/LoanApp_streamlit_flask/app.py").app
+    client = ApiClient("http://backend", ttl=60)
+    adapter = FlaskAdapter(app.test_client())
+    client.session.mount("http://", adapter)
+    return client, adapter
+
+
+def test_get_is_cached_revalidated_and_invalidated(api):
+    client, adapter = api
+    # Stored already stale: the next GET revalidates with the ETag and gets a 304
+    assert client.get("/applicants", ttl=0).json() == []
+    assert client.get("/applicants").json() == []
+    assert adapter.sent[-1] == ("GET", "/applicants", '"applicants-v0"')
+    assert client.stats()["revalidated"] == 1
+
+    # Fresh: answered from the cache without a request
+    assert client.get("/applicants").json() == []
+    assert client.stats()["hits"] == 1
+    assert len(adapter.sent) == 2
+
+    assert client.post("/applicants", json=APPLICANT).status_code == 201
+    assert client.stats()["entries"] == 0
+    assert len(client.get("/applicants").json()) == 1
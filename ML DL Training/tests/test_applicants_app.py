@@ -0,0 +1,152 @@
+import json
+
+import pytest
+
+APPLICANT = {
+    "Married": "Yes",
+    "Education": "Graduate",
+    "Self_Employed": "No",
+    "ApplicantIncome": 5000,
+    "CoapplicantIncome": 1500,
+    "LoanAmount": 120,
+    "Loan_Amount_Term": 360,
+    "Credit_History": 1,
+    "Property_Area": "Urban",
+    "Prediction": 1,
+}
+
+
+@pytest.fixture
+def app_module(load_script):
+    return load_script("ML/LoanTask/LoanApp_streamlit_flask/app.py")
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+def test_health(client):
+    assert client.get("/health").get_json() == {"status": "ok"}
+
+
+def test_etag_round_trip(client):
+    first = client.get("/applicants")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    unchanged = client.get("/applicants", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+
+    assert client.post("/applicants", json=APPLICANT).status_code == 201
+    changed = client.get("/applicants", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.get_json()) == 1
+
+
+def test_bulk_insert_is_idempotent(client):
+    rows = [{**APPLICANT, "Idempotency_Key": f"k{i}"} for i in range(5)] + [{**APPLICANT, "LoanAmount": "lots"}]
+    first = client.post("/applicants/bulk?chunk_size=2", json=rows).get_json()
+    assert first["received"] == 6
+    assert first["written"] == 5
+    assert [e["index"] for e in first["errors"]] == [5]
+
+    retry = client.post("/applicants/bulk?chunk_size=2", json=rows[:5]).get_json()
+    assert retry["written"] == 0
+    assert retry["skipped_duplicates"] == 5
+
+
+@pytest.mark.parametrize("chunk_size", ["0", "-1"])
+def test_bulk_rejects_non_positive_chunk_size(client, chunk_size):
+    response = client.post(f"/applicants/bulk?chunk_size={chunk_size}", json=[APPLICANT])
+    assert response.status_code == 400
+    assert "chunk_size" in response.get_json()["error"]
+
+
+def test_write_endpoints_return_the_stored_row(app_module, client):
+    created = client.post("/applicants", json=APPLICANT)
+    assert created.status_code == 201
+    row = created.get_json()
+    assert row["id"] == 1
+    assert row["LoanAmount"] == APPLICANT["LoanAmount"]
+
+    updated = client.put(f"/applicants/{row['id']}", json={"data": {"LoanAmount": 150, "Prediction": 0}}).get_json()
+    assert (updated["LoanAmount"], updated["Prediction"]) == (150, 0)
+    assert client.put("/applicants/999", json={"column": "LoanAmount", "new_value": 1}).status_code == 404
+
+    assert client.delete(f"/applicants/{row['id']}").get_json() == {"status": "deleted", "id": row["id"]}
+    assert client.get(f"/applicants/{row['id']}").status_code == 404
+
+    conn = app_module.pool.acquire()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    app_module.pool.release(conn)
+    # Released connections are reused
+    assert app_module.pool.acquire() is conn
+
+
+def seed(client, count, **overrides):
+    rows = [{**APPLICANT, "ApplicantIncome": 1000 * (i + 1), **overrides} for i in range(count)]
+    assert client.post("/applicants/bulk", json=rows).get_json()["written"] == count
+
+
+def test_keyset_pagination(client):
+    seed(client, 7)
+    first = client.get("/applicants?limit=3")
+    assert [r["id"] for r in first.get_json()] == [7, 6, 5]
+    assert first.headers["X-Next-Before-Id"] == "5"
+
+    second = client.get(f"/applicants?limit=3&before_id={first.headers['X-Next-Before-Id']}")
+    assert [r["id"] for r in second.get_json()] == [4, 3, 2]
+
+    back = client.get(f"/applicants?limit=3&after_id={second.headers['X-Prev-After-Id']}")
+    assert [r["id"] for r in back.get_json()] == [7, 6, 5]
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "json_stream"])
+def test_streaming_formats(client, fmt):
+    seed(client, 4)
+    response = client.get(f"/applicants?format={fmt}&before_id=4")
+    assert response.is_streamed
+    body = response.get_data(as_text=True)
+    rows = [json.loads(line) for line in body.splitlines()] if fmt == "ndjson" else json.loads(body)
+    assert [r["id"] for r in rows] == [3, 2, 1]
+
+
+def test_stats_aggregates(client):
+    seed(client, 3)
+    seed(client, 1, Property_Area="Rural", Credit_History=0, Prediction=0)
+    stats = client.get("/applicants/stats?maxbins=10").get_json()
+    assert stats["summary"] == {"approved": 3, "total": 4, "approval_rate": 75.0}
+    assert stats["property_area"] == [{"Property_Area": "Urban", "Count": 3}, {"Property_Area": "Rural", "Count": 1}]
+    assert [(c["Credit_History"], c["ApprovalRate%"]) for c in stats["credit_history"]] == [(0, 0), (1, 100.0)]
+    histogram = stats["income_histogram"]
+    assert sum(b["count"] for b in histogram["bins"] if b["Type"] == "ApplicantIncome") == 4
+
+    assert client.get("/applicants/stats/summary?property_area=Rural").get_json()["total"] == 1
+    assert client.get("/applicants/stats/nope").status_code == 404
+
+
+@pytest.mark.parametrize("path", ["/applicants/stats", "/applicants/stats/income_histogram"])
+@pytest.mark.parametrize("maxbins", ["0", "-5", "100000"])
+def test_stats_rejects_out_of_range_maxbins(client, path, maxbins):
+    seed(client, 2)
+    response = client.get(f"{path}?maxbins={maxbins}")
+    assert response.status_code == 400
+    assert "maxbins" in response.get_json()["error"]
+
+
+def test_rollups_follow_every_write(app_module, client):
+    seed(client, 3)
+    client.put("/applicants/1", json={"column": "Prediction", "new_value": 0})
+    client.put("/applicants/2", json={"data": {"Property_Area": "Rural"}})
+    client.delete("/applicants/3")
+    conn = app_module.pool.acquire()
+    assert app_module.check_rollups(conn) == []
+    rollup = {(r["Property_Area"], r["Prediction"]): r["n"] for r in conn.execute("SELECT * FROM applicant_rollup")}
+    app_module.pool.release(conn)
+    assert rollup == {("Urban", 0): 1, ("Rural", 1): 1}
+
+    runner = app_module.app.test_cli_runner()
+    assert "consistent" in runner.invoke(args=["check-rollups"]).output
+    assert runner.invoke(args=["rebuild-rollups"]).exit_code == 0
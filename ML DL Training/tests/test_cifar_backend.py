@@ -0,0 +1,151 @@
+import io
+import json
+import tarfile
+import zipfile
+
+import numpy as np
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("PIL")
+from fastapi.testclient import TestClient
+from PIL import Image
+
+
+@pytest.fixture
+def backend(load_script, tmp_path, monkeypatch):
+    """The CIFAR backend on CIFAR_RUNTIME=numpy, serving a Flatten + Dense(10) bundle."""
+    bundle = tmp_path / "cifar_numpy"
+    bundle.mkdir()
+    rng = np.random.default_rng(0)
+    np.save(bundle / "000.npy", rng.standard_normal((32 * 32 * 3, 10), dtype=np.float32))
+    np.save(bundle / "001.npy", np.zeros(10, dtype=np.float32))
+    manifest = {
+        "weights": [{"file": "000.npy", "name": "dense/kernel", "shape": [3072, 10]},
+                    {"file": "001.npy", "name": "dense/bias", "shape": [10]}],
+        "input_shape": [32, 32, 3],
+        "layers": [{"name": "flatten", "class": "Flatten", "config": {}, "weights": []},
+                   {"name": "dense", "class": "Dense", "config": {"activation": "softmax"}, "weights": [0, 1]}],
+        "parity": {"passed": True},
+    }
+    (bundle / "manifest.json").write_text(json.dumps(manifest))
+    monkeypatch.setenv("CIFAR_RUNTIME", "numpy")
+    monkeypatch.setenv("CIFAR_NUMPY_MODEL", str(bundle))
+    return load_script("DL/Tensorflow/backend.py")
+
+
+@pytest.fixture
+def client(backend):
+    return TestClient(backend.app)
+
+
+def png(seed):
+    pixels = np.random.default_rng(seed).integers(0, 256, (32, 32, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def zip_of(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buf.getvalue()
+
+
+def tar_of(members):
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buf.getvalue()
+
+
+def npy(array):
+    buf = io.BytesIO()
+    np.save(buf, array)
+    return buf.getvalue()
+
+
+def post_batch(client, *files):
+    return client.post("/predict/batch/", files=[("files", (name, data)) for name, data in files])
+
+
+def test_predict_and_metrics(client):
+    response = client.post("/predict/", files={"file": ("cat.png", png(0))})
+    assert response.status_code == 200
+    assert 0 <= response.json()["confidence"] <= 1
+    metrics = client.get("/metrics").json()
+    assert metrics["runtime"] == "numpy"
+    assert metrics["model_version"].startswith("numpy-")
+
+
+def test_batch_mixes_images_archives_and_tensors(client):
+    response = post_batch(
+        client,
+        ("a.png", png(1)),
+        ("set.zip", zip_of({"b.png": png(2), "__MACOSX/._b.png": b"junk"})),
+        ("set.tar.gz", tar_of({"c.png": png(3)})),
+        ("x.npy", npy(np.zeros((2, 32, 32, 3), dtype=np.uint8))),
+    )
+    assert response.status_code == 200
+    names = [r["name"] for r in response.json()["results"]]
+    assert names == ["a.png", "set.zip/b.png", "set.tar.gz/c.png", "x.npy[0]", "x.npy[1]"]
+
+
+def test_batch_keeps_upload_order_across_images_and_tensors(client):
+    tensor = np.stack([np.asarray(Image.open(io.BytesIO(png(seed)))) for seed in (5, 6)])
+    response = post_batch(
+        client,
+        ("first.npy", npy(tensor[:1])),
+        ("a.png", png(5)),
+        ("second.npy", npy(tensor[1:])),
+        ("b.png", png(6)),
+    )
+    results = response.json()["results"]
+    assert [r["name"] for r in results] == ["first.npy[0]", "a.png", "second.npy[0]", "b.png"]
+    # Each .npy holds the same pixels as the image after it
+    for tensor_result, image_result in (results[0:2], results[2:4]):
+        assert [c["class"] for c in tensor_result["top_k"]] == [c["class"] for c in image_result["top_k"]]
+        assert tensor_result["top_k"][0]["confidence"] == pytest.approx(image_result["top_k"][0]["confidence"], abs=1e-4)
+
+
+@pytest.mark.parametrize("name, data, detail", [
+    ("set.zip", b"PK\x03\x04 not really a zip", "set.zip"),
+    ("set.tar.gz", b"\x1f\x8b not really a tarball", "set.tar.gz"),
+    ("x.npy", b"\x93NUMPY garbage", "x.npy"),
+    ("x.npy", npy(np.zeros((2, 28, 28), dtype=np.uint8)), "x.npy"),
+], ids=["zip", "tar", "npy-garbage", "npy-shape"])
+def test_batch_rejects_unreadable_uploads(client, name, data, detail):
+    response = post_batch(client, ("ok.png", png(0)), (name, data))
+    assert response.status_code == 400
+    assert detail in response.json()["detail"]
+
+
+def test_batch_names_corrupt_zip_member(client):
+    data = bytearray(zip_of({"good.png": png(0), "bad.png": png(1)}))
+    # Flip a byte inside bad.png's stored data so its CRC check fails
+    offset = data.index(png(1)) + 100
+    data[offset] ^= 0xFF
+    response = post_batch(client, ("set.zip", bytes(data)))
+    assert response.status_code == 400
+    assert "set.zip/bad.png" in response.json()["detail"]
+
+
+def test_batch_caps_archive_members_and_size(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, "MAX_ARCHIVE_MEMBERS", 2)
+    response = post_batch(client, ("set.zip", zip_of({f"{i}.png": png(i) for i in range(3)})))
+    assert response.status_code == 413
+
+    monkeypatch.setattr(backend, "MAX_ARCHIVE_MEMBERS", 100)
+    monkeypatch.setattr(backend, "MAX_UNPACKED_BYTES", 1000)
+    # A highly compressible member: a small upload that unpacks past the limit
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("zeros.png", bytes(10_000))
+    response = post_batch(client, ("bomb.zip", buf.getvalue()))
+    assert response.status_code == 413
+    assert "bomb.zip/zeros.png" in response.json()["detail"]
@@ -0,0 +1,72 @@
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+LOAN = Path(__file__).resolve().parents[1] / "ML/LoanTask"
+
+
+@pytest.fixture
+def compiled_pipeline(load_script):
+    return load_script("ML/LoanTask/compiled_pipeline.py")
+
+
+@pytest.fixture
+def fitted(compiled_pipeline):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # pickled with an older sklearn
+        pipeline = joblib.load(LOAN / "loan_pretrained.pkl")
+    compiled = compiled_pipeline.compile_pipeline(pipeline)
+    df = pd.read_csv(LOAN / "final_to_train.csv")[compiled.numeric_columns + compiled.categorical_columns]
+    return pipeline, compiled, df
+
+
+def test_bit_for_bit_parity(compiled_pipeline, fitted):
+    pipeline, compiled, df = fitted
+    assert compiled_pipeline.verify(pipeline, compiled, df)
+
+
+def test_missing_column_raises_like_sklearn(fitted):
+    pipeline, compiled, df = fitted
+    rows = df.drop(columns=["Property_Area"]).head(3)
+    with pytest.raises(ValueError, match="columns are missing: {'Property_Area'}") as sklearn_error:
+        pipeline.predict(rows)
+    with pytest.raises(ValueError) as compiled_error:
+        compiled.predict(rows.to_dict(orient="records"))
+    assert str(compiled_error.value) == str(sklearn_error.value)
+    with pytest.raises(ValueError, match="Property_Area"):
+        compiled.predict(rows.to_records(index=False))
+
+
+def test_field_missing_from_some_records_is_imputed(fitted):
+    pipeline, compiled, df = fitted
+    rows = df.head(3).to_dict(orient="records")
+    del rows[1]["LoanAmount"]
+    expected = pipeline.predict(pd.DataFrame.from_records(rows))
+    assert np.array_equal(compiled.predict(rows), expected)
+
+
+def test_unsupported_pipelines(compiled_pipeline):
+    X = pd.DataFrame({"a": [0.0, 1.0, 2.0, 3.0], "c": ["x", "y", "x", "y"]})
+    y = [0, 1, 0, 1]
+
+    scaled = Pipeline([("preprocess", ColumnTransformer([("num", MinMaxScaler(), ["a"])])), ("model", LogisticRegression())])
+    with pytest.raises(TypeError, match="MinMaxScaler"):
+        compiled_pipeline.compile_pipeline(scaled.fit(X, y))
+
+    dropped = Pipeline([
+        ("preprocess", ColumnTransformer([("cat", OneHotEncoder(drop="first"), ["c"])])),
+        ("model", LogisticRegression()),
+    ])
+    with pytest.raises(ValueError, match="drop"):
+        compiled_pipeline.compile_pipeline(dropped.fit(X, y))
+
+    with pytest.raises(TypeError, match="ColumnTransformer"):
+        compiled_pipeline.compile_pipeline(Pipeline([("model", LogisticRegression())]).fit(X[["a"]], y))
@@ -0,0 +1,110 @@
+import io
+import sqlite3
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.linear_model import LinearRegression, LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+HOUSE = "ML/Unsupervised Learning/HousePriceAndSalePrediction"
+CSV = "house_sales_data.csv"
+DATA = Path(__file__).resolve().parents[1] / HOUSE / CSV
+TARGETS = ["Price", "Sold_Within_Week"]
+
+
+def houses(n):
+    return pd.read_csv(DATA).drop(columns=TARGETS).dropna().head(n).to_dict("records")
+
+
+@pytest.fixture
+def backend(load_script, tmp_path, monkeypatch):
+    """The house backend with both pipelines trained behind one fitted ColumnTransformer."""
+    df = pd.read_csv(DATA).dropna()
+    X = df.drop(columns=TARGETS)
+    numeric = [c for c in X.columns if c != "Location_Type"]
+    preprocess = ColumnTransformer([
+        ("num", StandardScaler(), numeric),
+        ("cat", OneHotEncoder(handle_unknown="ignore"), ["Location_Type"]),
+    ]).fit(X)
+    features = preprocess.transform(X)
+    price = Pipeline([("preprocess", preprocess), ("model", LinearRegression().fit(features, df["Price"]))])
+    sales = Pipeline([("preprocess", preprocess), ("model", LogisticRegression(max_iter=1000).fit(features, df["Sold_Within_Week"]))])
+    joblib.dump(price, tmp_path / "price_predicter.pkl")
+    joblib.dump(sales, tmp_path / "sales_predicter.pkl")
+
+    monkeypatch.setenv("HOUSE_WRITE_MAX_DELAY_MS", "1")
+    module = load_script(f"{HOUSE}/backend.py", copy=[CSV])
+    yield module
+    module.writer.close()
+
+
+def stored_rows(backend):
+    # Drain the write-behind queue so every prediction is in the table
+    backend.writer.close()
+    conn = sqlite3.connect("housing.db")
+    count = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_predict_scores_both_targets_off_one_pass(backend):
+    client = backend.app.test_client()
+    house = houses(1)[0]
+    single = client.post("/predict", json=house).get_json()
+    assert set(single) == {"Predicted_Price", "Sold_Within_Week"}
+
+    batch = client.post("/predict/batch", json=houses(5)).get_json()
+    assert len(batch) == 5
+    assert batch[0] == single
+    assert client.post("/predict/batch", json={"records": houses(2)}).status_code == 200
+    assert client.post("/predict/batch", json=[{"Bedrooms": 3}]).status_code == 400
+    assert client.get("/metrics").get_json()["shared_preprocessing"] is True
+
+
+def test_predictions_are_stored_write_behind(backend):
+    client = backend.app.test_client()
+    client.post("/predict/batch", json=houses(7))
+    client.post("/predict", json=houses(1)[0])
+    assert client.get("/metrics").get_json()["write_behind"]["flush_failures"] == 0
+    assert stored_rows(backend) == 8
+    assert backend.writer.stats()["rows_flushed"] == 8
+
+
+def test_sync_predict_is_stored_before_responding(backend):
+    backend.writer.max_delay = 60  # only the sync flush can write in time
+    client = backend.app.test_client()
+    result = client.post("/predict?sync=1", json=houses(1)[0]).get_json()
+    assert result["stored"] is True
+    rows = client.get("/predictions/columns?columns=id,Predicted_Price&format=json").get_json()
+    assert rows["Predicted_Price"] == [result["Predicted_Price"]]
+    assert "stored" not in client.post("/predict", json=houses(1)[0]).get_json()
+
+
+def test_columnar_dashboard_queries(backend):
+    client = backend.app.test_client()
+    client.post("/predict/batch", json=houses(200))
+    backend.writer.close()
+
+    columns = client.get("/predictions/columns?columns=id,Predicted_Price&limit=10&order=newest&format=json").get_json()
+    assert columns["id"] == list(range(200, 190, -1))
+
+    response = client.get("/predictions/summary")
+    assert response.mimetype == "application/x-npz"
+    assert np.load(io.BytesIO(response.data))["rows"][0] == 200
+    assert client.get("/predictions/summary", headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+
+    sample = client.get("/predictions/sample?max_points=60&format=json").get_json()
+    assert 0 < len(sample["Square_Footage"]) <= 200
+    trend = client.get("/predictions/trend?max_points=20&format=json").get_json()
+    assert len(trend["Distance_To_Center_KM"]) <= 20
+    assert client.get("/predictions/boxplot?format=json").status_code == 200
+    counts = client.get("/predictions/counts?format=json").get_json()
+    assert sum(counts["count"]) == 200
+
+    assert client.get("/predictions/sample?x=nope").status_code == 400
+    assert client.get("/predictions/trend?max_points=2").status_code == 400
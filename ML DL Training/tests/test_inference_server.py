@@ -0,0 +1,84 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def inference_server(load_script):
+    return load_script("DL/Tensorflow/inference_server.py")
+
+
+def mean_per_image(batch):
+    return batch.reshape(len(batch), -1).mean(axis=1, keepdims=True)
+
+
+def test_concurrent_submissions_share_forward_passes(inference_server):
+    calls = []
+
+    def forward(batch):
+        calls.append(len(batch))
+        return mean_per_image(batch)
+
+    server = inference_server.BatchedInferenceServer(None, max_batch_size=16, max_wait_ms=50, forward=forward)
+    images = [np.full((32, 32, 3), i, dtype=np.float32) for i in range(8)]
+    barrier = threading.Barrier(len(images))
+    results = {}
+
+    def submit(i):
+        barrier.wait()
+        results[i] = server.submit(images[i]).result(timeout=5)
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(images))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert {i: float(r[0, 0]) for i, r in results.items()} == {i: float(i) for i in range(8)}
+    assert sum(calls) == 8
+    assert len(calls) < 8
+    assert server.stats()["images"] == 8
+
+
+def test_large_submission_is_chunked(inference_server):
+    calls = []
+
+    def forward(batch):
+        calls.append(len(batch))
+        return mean_per_image(batch)
+
+    server = inference_server.BatchedInferenceServer(None, max_batch_size=4, max_wait_ms=1, forward=forward)
+    images = np.arange(10, dtype=np.float32)[:, None, None, None] * np.ones((10, 32, 32, 3), dtype=np.float32)
+    scores = server.submit(images).result(timeout=5)
+    assert scores.ravel().tolist() == list(range(10))
+    assert max(calls) <= 4
+
+
+def test_forward_errors_reach_every_caller(inference_server):
+    def forward(batch):
+        raise RuntimeError("out of memory")
+
+    server = inference_server.BatchedInferenceServer(None, max_wait_ms=1, forward=forward)
+    with pytest.raises(RuntimeError, match="out of memory"):
+        server.submit(np.zeros((2, 32, 32, 3))).result(timeout=5)
+    with pytest.raises(ValueError):
+        server.submit(np.zeros((28, 28)))
+
+
+def test_cancelled_requests_are_skipped(inference_server):
+    release = threading.Event()
+
+    def forward(batch):
+        release.wait(5)
+        return mean_per_image(batch)
+
+    server = inference_server.BatchedInferenceServer(None, max_wait_ms=1, forward=forward)
+    first = server.submit(np.zeros((32, 32, 3)))
+    time.sleep(0.05)  # the worker is now blocked in forward() on the first request
+    abandoned = server.submit(np.ones((32, 32, 3)))
+    assert abandoned.cancel()
+    release.set()
+    assert first.result(timeout=5).shape == (1, 1)
+    # The worker survived the cancelled request and keeps serving
+    assert float(server.submit(np.full((32, 32, 3), 2.0)).result(timeout=5)[0, 0]) == 2.0
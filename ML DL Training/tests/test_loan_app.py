@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+
+import pytest
+
+APPLICANT = {
+    "Married": "Yes",
+    "Education": "Graduate",
+    "Self_Employed": "No",
+    "ApplicantIncome": 5000,
+    "CoapplicantIncome": 1500,
+    "LoanAmount": 120,
+    "Loan_Amount_Term": 360,
+    "Credit_History": 1,
+    "Property_Area": "Urban",
+}
+
+
+@pytest.fixture
+def app_module(load_script):
+    return load_script("ML/LoanTask/app.py", copy=["loan_pretrained.pkl", "final_to_train.csv"])
+
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_predict_and_metrics(client):
+    first = client.post("/predict", json=APPLICANT).get_json()
+    assert first["predicted_output"] in (0, 1)
+    assert client.post("/predict", json=APPLICANT).get_json() == first
+
+    metrics = client.get("/metrics").get_json()
+    assert metrics["compiled"] is True
+    assert metrics["micro_batching"] is False
+    assert metrics["result_cache"]["hits"] == 1
+
+
+def test_batch_streams_predictions_per_chunk(client):
+    expected = client.post("/predict", json=APPLICANT).get_json()["predicted_output"]
+    body = "\n".join(json.dumps(APPLICANT) for _ in range(5))
+    lines = ndjson(client.post("/predict/batch?chunk_size=2", data=body, content_type="application/x-ndjson"))
+    predictions = [line for line in lines if "index" in line]
+    assert [p["index"] for p in predictions] == list(range(5))
+    assert {p["predicted_output"] for p in predictions} == {expected}
+    assert [line["rows"] for line in lines if "chunk" in line] == [2, 2, 1]
+
+
+@pytest.mark.parametrize("chunk_size", ["0", "-3"])
+def test_batch_rejects_non_positive_chunk_size(client, chunk_size):
+    response = client.post(f"/predict/batch?chunk_size={chunk_size}", json=[APPLICANT])
+    assert response.status_code == 400
+    assert "chunk_size" in response.get_json()["error"]
+
+
+def test_batch_reports_failing_chunk_in_stream(client):
+    records = [APPLICANT, APPLICANT, {**APPLICANT, "ApplicantIncome": "a lot"}, APPLICANT]
+    lines = ndjson(client.post("/predict/batch?chunk_size=2", json=records))
+    assert [line["index"] for line in lines if "predicted_output" in line] == [0, 1]
+    assert lines[-1]["chunk"] == 1
+    assert lines[-1]["index"] == 2
+    assert "error" in lines[-1]
+
+
+def test_micro_batched_predict(load_script, monkeypatch):
+    monkeypatch.setenv("LOAN_MICRO_BATCH", "1")
+    monkeypatch.setenv("LOAN_CACHE_SIZE", "0")
+    module = load_script("ML/LoanTask/app.py", copy=["loan_pretrained.pkl", "final_to_train.csv"])
+    client = module.app.test_client()
+    assert client.post("/predict", json=APPLICANT).get_json()["predicted_output"] in (0, 1)
+
+    metrics = client.get("/metrics").get_json()
+    assert metrics["micro_batching"] is True
+    assert metrics["requests"] == 1
+    assert metrics["batches"] == 1
+
+
+def test_micro_batcher_isolates_failing_rows(load_script):
+    micro_batcher = load_script("ML/LoanTask/micro_batcher.py")
+
+    def score(records):
+        if "bad" in records:
+            raise ValueError("bad row")
+        return [r.upper() for r in records]
+
+    batcher = micro_batcher.MicroBatcher(score, max_wait_ms=50, max_batch_size=8)
+    futures = [batcher.submit(r) for r in ("a", "bad", "c")]
+    assert futures[0].result(timeout=5) == "A"
+    assert futures[2].result(timeout=5) == "C"
+    with pytest.raises(ValueError):
+        futures[1].result(timeout=5)
+
+
+def test_micro_batcher_skips_cancelled_callers(load_script):
+    micro_batcher = load_script("ML/LoanTask/micro_batcher.py")
+    release = threading.Event()
+
+    def score(records):
+        release.wait(5)
+        return [r.upper() for r in records]
+
+    batcher = micro_batcher.MicroBatcher(score, max_wait_ms=1)
+    first = batcher.submit("a")
+    time.sleep(0.05)  # the worker is now blocked scoring the first batch
+    abandoned = batcher.submit("b")
+    assert abandoned.cancel()
+    release.set()
+    assert first.result(timeout=5) == "A"
+    # The worker survived the cancelled caller and keeps serving
+    assert batcher.predict("c", timeout=5) == "C"
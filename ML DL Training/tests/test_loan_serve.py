@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("gunicorn")
+from gunicorn.app.base import BaseApplication
+
+
+@pytest.fixture
+def serve(load_script, monkeypatch):
+    monkeypatch.setenv("LOAN_MODEL_POLL_SECONDS", "2")
+    return load_script("ML/LoanTask/serve.py", copy=["loan_pretrained.pkl", "final_to_train.csv"])
+
+
+def test_reload_refreshes_without_starting_the_watcher(serve, monkeypatch):
+    loan_app = serve.loan_app
+    server = serve.LoanServer({"bind": "127.0.0.1:0", "workers": 2, "preload_app": True})
+    assert server.load() is loan_app.app
+
+    monkeypatch.setattr(BaseApplication, "reload", lambda self: None)
+    server.reload()
+    assert loan_app.models.current is not None
+    assert not loan_app.models._watcher.created()
@@ -0,0 +1,38 @@
+import os
+
+import joblib
+import numpy as np
+
+from common.mmap_artifacts import export_pickle, load_artifact, load_npy_bundle, mmap_path
+
+
+def test_export_is_memory_mapped(tmp_path):
+    source = tmp_path / "model.pkl"
+    joblib.dump({"weights": np.arange(1000.0)}, source, compress=3)
+    assert not isinstance(load_artifact(source)["weights"], np.memmap)
+
+    exported = export_pickle(source)
+    assert exported == mmap_path(source) == tmp_path / "model.mmap.pkl"
+    weights = load_artifact(source)["weights"]
+    assert isinstance(weights, np.memmap)
+    assert not weights.flags.writeable
+    assert np.array_equal(weights, np.arange(1000.0))
+
+
+def test_stale_export_is_ignored(tmp_path):
+    source = tmp_path / "model.pkl"
+    joblib.dump({"weights": np.zeros(10)}, source)
+    export_pickle(source)
+    joblib.dump({"weights": np.ones(10)}, source)
+    stamp = mmap_path(source).stat().st_mtime_ns
+    os.utime(source, ns=(stamp + 1_000_000, stamp + 1_000_000))
+    assert np.array_equal(load_artifact(source)["weights"], np.ones(10))
+
+
+def test_npy_bundle_round_trip(tmp_path):
+    np.save(tmp_path / "000.npy", np.eye(3, dtype=np.float32))
+    (tmp_path / "manifest.json").write_text('{"weights": [{"file": "000.npy", "name": "dense/kernel", "shape": [3, 3]}]}')
+    [(name, array)] = load_npy_bundle(tmp_path)
+    assert name == "dense/kernel"
+    assert isinstance(array, np.memmap)
+    assert np.array_equal(array, np.eye(3))
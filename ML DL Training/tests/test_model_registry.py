@@ -0,0 +1,68 @@
+import multiprocessing
+import sys
+import threading
+
+import pytest
+
+from common.model_registry import HotModel, ModelRegistry
+
+
+def register_many(root, path, count):
+    registry = ModelRegistry(root)
+    for _ in range(count):
+        registry.register("demo", {"model": path})
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="the cross-process lock needs fcntl")
+def test_concurrent_processes_register_distinct_versions(tmp_path):
+    artifact = tmp_path / "model.bin"
+    artifact.write_bytes(b"weights")
+    root = tmp_path / "registry"
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=register_many, args=(root, artifact, 5)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert all(w.exitcode == 0 for w in workers)
+    # Every registration survived: no process overwrote another's index update
+    assert sorted(ModelRegistry(root).versions("demo"), key=int) == [str(v) for v in range(1, 21)]
+
+
+def test_watcher_starts_once_under_concurrent_get(tmp_path, monkeypatch):
+    artifact = tmp_path / "model.bin"
+    artifact.write_bytes(b"weights")
+    model = HotModel("demo", lambda paths: paths["model"], {"model": artifact},
+                     registry=ModelRegistry(tmp_path / "registry"), poll_interval=60)
+    started = []
+    real_start = threading.Thread.start
+
+    def counting_start(thread):
+        if thread.name == "hot-model-demo":
+            started.append(thread)
+        real_start(thread)
+
+    monkeypatch.setattr(threading.Thread, "start", counting_start)
+    barrier = threading.Barrier(16)
+
+    def first_request():
+        barrier.wait()
+        model.get()
+
+    callers = [threading.Thread(target=first_request) for _ in range(16)]
+    for c in callers:
+        c.start()
+    for c in callers:
+        c.join()
+    assert len(started) == 1
+
+
+def test_current_does_not_start_watcher(tmp_path):
+    artifact = tmp_path / "model.bin"
+    artifact.write_bytes(b"weights")
+    model = HotModel("demo", lambda paths: paths["model"], {"model": artifact},
+                     registry=ModelRegistry(tmp_path / "registry"), poll_interval=60)
+    assert model.current.value == artifact
+    assert not model._watcher.created()
+    model.get()
+    assert model._watcher.created()
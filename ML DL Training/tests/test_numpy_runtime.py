@@ -0,0 +1,90 @@
+import json
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def runtime(load_script):
+    return load_script("DL/Tensorflow/numpy_runtime.py")
+
+
+def naive_conv(x, kernel, bias, stride):
+    kh, kw, _, cout = kernel.shape
+    n, h, w, _ = x.shape
+    out = np.zeros((n, (h - kh) // stride + 1, (w - kw) // stride + 1, cout), dtype=np.float32)
+    for i in range(out.shape[1]):
+        for j in range(out.shape[2]):
+            patch = x[:, i * stride:i * stride + kh, j * stride:j * stride + kw]
+            out[:, i, j] = np.tensordot(patch, kernel, axes=3) + bias
+    return out
+
+
+def write_bundle(path, layers, weights, parity=True):
+    path.mkdir()
+    manifest = {"weights": [], "input_shape": [8, 8, 3], "layers": layers}
+    for i, array in enumerate(weights):
+        np.save(path / f"{i:03d}.npy", array)
+        manifest["weights"].append({"file": f"{i:03d}.npy", "name": f"w{i}", "shape": list(array.shape)})
+    if parity is not None:
+        manifest["parity"] = {"passed": parity}
+    (path / "manifest.json").write_text(json.dumps(manifest))
+    return path
+
+
+def test_conv_and_pool_match_a_direct_loop(runtime):
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal((2, 9, 9, 3), dtype=np.float32)
+    kernel = rng.standard_normal((3, 3, 3, 4), dtype=np.float32)
+    bias = rng.standard_normal(4, dtype=np.float32)
+
+    for stride in (1, 2):
+        conv = runtime.Conv2D({"strides": [stride, stride], "padding": "valid", "activation": "linear"}, kernel, bias)
+        assert np.allclose(conv(x), naive_conv(x, kernel, bias, stride), atol=1e-4)
+
+    same = runtime.Conv2D({"strides": [2, 2], "padding": "same", "activation": "relu"}, kernel, bias)
+    assert same(x).shape == (2, 5, 5, 4)
+    assert same(x).min() >= 0
+
+    pool = runtime.Pool2D({"pool_size": [2, 2], "strides": None, "padding": "valid"}, np.max)
+    expected = x[:, :8, :8].reshape(2, 4, 2, 4, 2, 3).max(axis=(2, 4))
+    assert np.array_equal(pool(x), expected)
+
+
+def test_load_refuses_unverified_bundles(runtime, tmp_path):
+    dense = [{"name": "flatten", "class": "Flatten", "config": {}, "weights": []},
+             {"name": "dense", "class": "Dense", "config": {"activation": "softmax"}, "weights": [0, 1]}]
+    weights = [np.ones((192, 10), dtype=np.float32), np.zeros(10, dtype=np.float32)]
+
+    verified = runtime.NumpyModel.load(write_bundle(tmp_path / "ok", dense, weights))
+    scores = verified.predict(np.zeros((3, 8, 8, 3)))
+    assert scores.shape == (3, 10)
+    assert np.allclose(scores.sum(axis=1), 1)
+
+    failed = write_bundle(tmp_path / "failed", dense, weights, parity=False)
+    with pytest.raises(ValueError, match="parity"):
+        runtime.NumpyModel.load(failed)
+    assert runtime.NumpyModel.load(failed, allow_unverified=True).input_shape == (8, 8, 3)
+
+    plain = tmp_path / "plain"
+    plain.mkdir()
+    (plain / "manifest.json").write_text('{"weights": []}')
+    with pytest.raises(ValueError, match="plain weights bundle"):
+        runtime.NumpyModel.load(plain)
+
+
+def fake_layer(kind, **config):
+    """A stand-in for a Keras layer of class `kind`: layer_spec only reads its type name, name, weights and config."""
+    return type(kind, (), {"name": kind.lower(), "weights": [], "get_config": lambda self: config})()
+
+
+def test_layer_spec_rejects_unsupported_layers(runtime):
+    spec = runtime.layer_spec(fake_layer("Conv2D", activation="relu", strides=[1, 1], padding="same"), 3)
+    assert spec["class"] == "Conv2D"
+    with pytest.raises(TypeError, match="LSTM"):
+        runtime.layer_spec(fake_layer("LSTM"), 0)
+    for config in ({"data_format": "channels_first"}, {"dilation_rate": [2, 2]}, {"groups": 2}, {"activation": "gelu"}):
+        with pytest.raises(ValueError):
+            runtime.layer_spec(fake_layer("Conv2D", **config), 0)
+    with pytest.raises(ValueError, match="average pooling"):
+        runtime.layer_spec(fake_layer("AveragePooling2D", padding="same"), 0)
@@ -0,0 +1,40 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+
+@pytest.fixture
+def preprocessing(load_script):
+    return load_script("DL/Tensorflow/preprocessing.py")
+
+
+def encode(img, fmt="PNG"):
+    buf = io.BytesIO()
+    img.save(buf, format=fmt)
+    return buf.getvalue()
+
+
+def test_png_matches_the_legacy_path(preprocessing):
+    pixels = np.random.default_rng(0).integers(0, 256, (64, 48, 3), dtype=np.uint8)
+    data = encode(Image.fromarray(pixels))
+    legacy = preprocessing.legacy_prepare(Image.open(io.BytesIO(data))).astype(np.float32)
+    batch = preprocessing.prepare_batch([data])
+    assert batch.dtype == np.float32
+    assert np.array_equal(batch, legacy)
+
+
+@pytest.mark.parametrize("mode", ["RGBA", "L", "P", "CMYK"])
+def test_every_mode_becomes_rgb(preprocessing, mode):
+    img = Image.new("RGB", (40, 40), (10, 200, 30)).convert(mode)
+    out = np.empty((2, 32, 32, 3), dtype=np.float32)
+    preprocessing.prepare_into(encode(img, "JPEG" if mode == "CMYK" else "PNG"), out[1])
+    assert out[1].shape == (32, 32, 3)
+    assert 0.0 <= out[1].min() and out[1].max() <= 1.0
+
+
+def test_large_jpeg_is_draft_decoded(preprocessing):
+    data = encode(Image.new("RGB", (4000, 3000), (255, 0, 0)), "JPEG")
+    result = preprocessing.prepare_batch([data])[0]
+    assert np.allclose(result[..., 0], 254 / 255, atol=2 / 255)
@@ -0,0 +1,42 @@
+import multiprocessing
+import threading
+
+from common.process_local import ProcessLocal
+
+
+def test_factory_runs_once_per_process():
+    calls = []
+    local = ProcessLocal(lambda: calls.append(1) or object())
+    assert not local.created()
+
+    barrier = threading.Barrier(8)
+    values = []
+
+    def first_use():
+        barrier.wait()
+        values.append(local.get())
+
+    threads = [threading.Thread(target=first_use) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len({id(v) for v in values}) == 1
+    assert local.created()
+
+
+def report_in_child(local, parent_value, results):
+    results.put((local.created(), local.get() is parent_value))
+
+
+def test_forked_child_gets_its_own_value():
+    local = ProcessLocal(object)
+    parent_value = local.get()
+    ctx = multiprocessing.get_context("fork")
+    results = ctx.Queue()
+    child = ctx.Process(target=report_in_child, args=(local, parent_value, results))
+    child.start()
+    child.join()
+    assert results.get(timeout=5) == (False, False)
+    assert local.get() is parent_value
@@ -0,0 +1,51 @@
+import pytest
+
+from common import result_cache
+from common.result_cache import ResultCache, bytes_key, json_key
+
+
+def test_keys_are_canonical_and_versioned():
+    assert json_key({"a": 3, "b": [1, 2]}) == json_key({"b": [1.0, 2.0], "a": 3.0})
+    assert json_key({"a": True}) != json_key({"a": 1})
+    assert json_key({"a": 3}, "v1") != json_key({"a": 3}, "v2")
+    assert bytes_key(b"image", "v1") != bytes_key(b"image", "v2")
+
+
+def test_memory_lru_and_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    cache = ResultCache(max_entries=2, ttl=10)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)  # evicts b, the least recently used
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+    now[0] += 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"], stats["evictions"], stats["expired"]) == (2, 2, 1, 1)
+
+
+def test_disk_layer_is_shared_and_survives_restarts(tmp_path):
+    path = str(tmp_path / "results.db")
+    ResultCache(max_entries=10, disk_path=path).put("k", {"label": "cat"})
+
+    cache = ResultCache(max_entries=10, disk_path=path)
+    assert cache.get("k") == {"label": "cat"}
+    assert cache.get("k") == {"label": "cat"}
+    assert (cache.stats()["disk_hits"], cache.stats()["memory_hits"]) == (1, 1)
+
+    cache.clear()
+    assert ResultCache(disk_path=path).get("k") is None
+
+
+@pytest.mark.parametrize("size, enabled", [("0", False), ("5", True)])
+def test_from_env(monkeypatch, size, enabled):
+    monkeypatch.setenv("CIFAR_CACHE_SIZE", size)
+    monkeypatch.setenv("CIFAR_CACHE_TTL", "0")
+    monkeypatch.delenv("CIFAR_CACHE_DB", raising=False)
+    cache = result_cache.from_env("CIFAR")
+    assert cache.enabled is enabled
+    assert cache.ttl is None
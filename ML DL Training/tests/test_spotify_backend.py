@@ -0,0 +1,192 @@
+import io
+import json
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+SPOTIFY = "ML/Unsupervised Learning/Spotify"
+CSV = "spotify_tracks_with_metadata_10000.csv"
+CATALOG = Path(__file__).resolve().parents[1] / SPOTIFY / CSV
+FEATURES = ["danceability", "energy", "valence", "tempo", "duration_ms", "popularity"]
+TRACK = {"danceability": 0.5, "energy": 0.7, "valence": 0.4, "tempo": 120.0, "duration_ms": 210000, "popularity": 60}
+
+
+@pytest.fixture
+def backend(load_script, tmp_path):
+    """The Spotify backend with a freshly trained 4-cluster pair and an initialised database."""
+    X = pd.read_csv(CATALOG)[FEATURES]
+    scaler = StandardScaler().fit(X)
+    joblib.dump(scaler, tmp_path / "scaler.pkl")
+    joblib.dump(KMeans(n_clusters=4, n_init=1, random_state=0).fit(scaler.transform(X)), tmp_path / "spotify_predictor.pkl")
+    module = load_script(f"{SPOTIFY}/backend.py", copy=[CSV])
+    module.init_db()
+    return module
+
+
+def run_recluster(load_script, monkeypatch, *args):
+    recluster = load_script(f"{SPOTIFY}/recluster.py")
+    monkeypatch.setattr(sys, "argv", ["recluster.py", "--chunk-rows", "5000", "--epochs", "1", *args])
+    recluster.main()
+
+
+def load_state(backend):
+    conn = backend.get_db_connection()
+    row = conn.execute("SELECT source_hash, model_version FROM load_state WHERE name = 'tracks'").fetchone()
+    conn.close()
+    return tuple(row)
+
+
+def test_init_db_loads_catalog_once(backend):
+    conn = backend.get_db_connection()
+    rows = conn.execute("SELECT COUNT(*), MIN(id), MAX(id) FROM tracks").fetchone()
+    assert tuple(rows) == (len(pd.read_csv(CSV)), 1, len(pd.read_csv(CSV)))
+    version = backend.tracks_version(conn)
+    backend.init_db()
+    assert backend.tracks_version(conn) == version
+    # A smaller chunk size gives the same clusters
+    conn.execute("DELETE FROM load_state")
+    conn.commit()
+    before = cluster_column(backend)
+    backend.init_db(chunk_rows=777)
+    assert cluster_column(backend) == before
+    conn.close()
+
+
+def test_predict_pages_through_cluster(backend):
+    client = backend.app.test_client()
+    first = client.post("/predict?limit=10", json=TRACK).get_json()
+    assert len(first["tracks"]) == 10
+    assert first["next_cursor"] == first["tracks"][-1]["id"]
+    second = client.post(f"/predict?limit=10&cursor={first['next_cursor']}", json=TRACK).get_json()
+    assert second["tracks"][0]["id"] > first["next_cursor"]
+    assert {t["cluster"] for t in first["tracks"] + second["tracks"]} == {first["predicted_cluster"]}
+
+
+def test_recluster_publishes_pair_through_registry(backend, load_script, monkeypatch):
+    before = backend.models.get()
+    run_recluster(load_script, monkeypatch)
+
+    assert backend.models.refresh()
+    after = backend.models.get()
+    assert after.version == "1"
+    # Both pickles come from the same registry version, and load_state names that pair
+    paths = backend.models.registry.active("spotify")["paths"]
+    assert after.value.fingerprint == backend.model_version((paths["kmeans"], paths["scaler"]))
+    assert after.value.fingerprint != before.value.fingerprint
+    assert load_state(backend)[1] == after.value.fingerprint
+
+
+def test_nearest_after_recluster(backend, load_script, monkeypatch):
+    client = backend.app.test_client()
+    assert client.post("/predict?mode=nearest&k=5", json=TRACK).status_code == 200
+
+    run_recluster(load_script, monkeypatch)
+    client.post("/admin/reload")
+    assert backend.models.get().value.neighbors is not None
+    response = client.post("/predict?mode=nearest&k=5", json=TRACK)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body["tracks"]) == 5
+    assert {t["cluster"] for t in body["tracks"]} == {body["predicted_cluster"]}
+
+    # The published pair already has its index, so a restart does not reload the table
+    conn = backend.get_db_connection()
+    version = backend.tracks_version(conn)
+    backend.init_db()
+    assert backend.tracks_version(conn) == version
+    conn.close()
+
+
+def cluster_column(backend):
+    conn = backend.get_db_connection()
+    clusters = [r[0] for r in conn.execute("SELECT cluster FROM tracks ORDER BY id")]
+    conn.close()
+    return clusters
+
+
+def test_recluster_refuses_other_catalog(backend, load_script, monkeypatch, tmp_path):
+    pd.read_csv(CSV).iloc[::-1].to_csv(tmp_path / "shuffled.csv", index=False)
+    before = cluster_column(backend)
+    with pytest.raises(SystemExit, match="not the catalog"):
+        run_recluster(load_script, monkeypatch, "--csv", "shuffled.csv")
+    assert cluster_column(backend) == before
+    assert backend.models.registry.active("spotify") is None
+
+
+def test_relabel_rolls_back_on_row_mismatch(backend, load_script):
+    recluster = load_script(f"{SPOTIFY}/recluster.py")
+    conn = backend.get_db_connection()
+    with conn:
+        conn.execute("DELETE FROM tracks WHERE id = 1")
+    conn.close()
+    before = cluster_column(backend)
+    scaler = backend.models.get().value.scaler
+    kmeans = KMeans(n_clusters=3, n_init=1, random_state=1).fit(scaler.transform(pd.read_csv(CSV)[FEATURES]))
+    with pytest.raises(ValueError, match="nothing relabelled"):
+        recluster.relabel_tracks("spotify_clusters.db", CSV, 5000, scaler, kmeans)
+    assert cluster_column(backend) == before
+
+
+def test_relabel_builds_neighbour_index_from_spilled_clusters(backend, load_script):
+    recluster = load_script(f"{SPOTIFY}/recluster.py")
+    scaler = backend.models.get().value.scaler
+    X_scaled = scaler.transform(pd.read_csv(CSV)[FEATURES])
+    kmeans = KMeans(n_clusters=3, n_init=1, random_state=1).fit(X_scaled)
+    _, index = recluster.relabel_tracks("spotify_clusters.db", CSV, 777, scaler, kmeans)
+
+    expected = recluster.NeighborIndex.build(np.arange(1, len(X_scaled) + 1), kmeans.labels_, X_scaled)
+    assert sorted(index.ids) == sorted(expected.ids) == [0, 1, 2]
+    for cluster in expected.ids:
+        assert np.array_equal(index.ids[cluster], expected.ids[cluster])
+        ids, _ = index.query(cluster, X_scaled[0], k=5)
+        assert np.array_equal(ids, expected.query(cluster, X_scaled[0], k=5)[0])
+
+
+def npy_body(array):
+    buf = io.BytesIO()
+    np.save(buf, array)
+    return buf.getvalue()
+
+
+def test_batch_assigns_clusters(backend):
+    client = backend.app.test_client()
+    rows = pd.read_csv(CSV)[FEATURES].head(20).to_numpy(dtype="<f8")
+    expected = client.post("/predict/batch", json=rows.tolist()).get_json()["clusters"]
+    assert len(expected) == 20
+    assert client.post("/predict/batch", json=pd.read_csv(CSV)[FEATURES].head(20).to_dict("records")).get_json()["clusters"] == expected
+    assert client.post("/predict/batch", data=npy_body(rows), content_type="application/x-npy").get_json()["clusters"] == expected
+
+    binary = client.post(
+        "/predict/batch", data=rows.tobytes(), content_type="application/octet-stream",
+        headers={"Accept": "application/octet-stream"},
+    )
+    assert np.frombuffer(binary.data, dtype="<i4").tolist() == expected
+    assert client.post("/predict/batch", json=[]).get_json() == {"clusters": []}
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (npy_body(np.ones((len(FEATURES), 4))), "application/x-npy"),
+    (npy_body(np.ones(len(FEATURES) * 2)), "application/x-npy"),
+    (b"not a npy file", "application/x-npy"),
+    (np.full(len(FEATURES), np.inf).tobytes(), "application/octet-stream"),
+    (np.ones(len(FEATURES) + 1).tobytes(), "application/octet-stream"),
+    (json.dumps([[1.0] * len(FEATURES), [float("nan")] * len(FEATURES)]), "application/json"),
+    (json.dumps([1.0] * len(FEATURES)), "application/json"),
+], ids=["npy-transposed", "npy-1d", "npy-garbage", "binary-inf", "binary-ragged", "json-nan", "json-1d"])
+def test_batch_rejects_bad_matrices(backend, body, content_type):
+    response = backend.app.test_client().post("/predict/batch", data=body, content_type=content_type)
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_analysis_etag(backend):
+    client = backend.app.test_client()
+    first = client.get("/analysis")
+    assert sum(r["count"] for r in first.get_json()) == len(pd.read_csv(CSV))
+    assert client.get("/analysis", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
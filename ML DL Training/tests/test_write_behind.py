@@ -0,0 +1,94 @@
+import json
+import multiprocessing
+import time
+
+import pytest
+
+HOUSE = "ML/Unsupervised Learning/HousePriceAndSalePrediction"
+
+
+@pytest.fixture
+def write_behind(load_script):
+    return load_script(f"{HOUSE}/write_behind.py")
+
+
+def append_rows(path, delay=0.0):
+    def write_rows(rows):
+        time.sleep(delay)  # a slow transaction keeps the other workers' window open
+        with open(path, "a") as f:
+            f.writelines(json.dumps(list(row)) + "\n" for row in rows)
+    return write_rows
+
+
+def test_close_spills_and_replay_writes_back(write_behind, tmp_path):
+    def failing(rows):
+        raise OSError("database is locked")
+
+    queue = write_behind.WriteBehindQueue(failing, max_delay_ms=1, spill_path=str(tmp_path / "spill.jsonl"),
+                                          shutdown_timeout=0.2)
+    queue.put_many([(1, "a"), (2, "b")])
+    queue.close()
+    assert queue.stats()["rows_spilled"] == 2
+
+    out = tmp_path / "out.jsonl"
+    replay = write_behind.WriteBehindQueue(append_rows(out), spill_path=str(tmp_path / "spill.jsonl"))
+    assert replay.replay_spill() == 2
+    assert out.read_text().splitlines() == ['[1, "a"]', '[2, "b"]']
+    assert not (tmp_path / "spill.jsonl").exists()
+    assert replay.replay_spill() == 0
+
+
+def replay_in_worker(module, spill, out, barrier, results):
+    barrier.wait()
+    results.put(module.WriteBehindQueue(append_rows(out, delay=0.2), spill_path=spill).replay_spill())
+
+
+def test_concurrent_workers_replay_spill_once(write_behind, tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    spill.write_text("".join(json.dumps([i]) + "\n" for i in range(100)))
+    out = tmp_path / "out.jsonl"
+
+    ctx = multiprocessing.get_context("fork")
+    barrier, results = ctx.Barrier(4), ctx.Queue()
+    workers = [ctx.Process(target=replay_in_worker, args=(write_behind, str(spill), out, barrier, results))
+               for _ in range(4)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert sorted(results.get(timeout=5) for _ in workers) == [0, 0, 0, 100]
+    assert len(out.read_text().splitlines()) == 100
+
+
+def test_failed_replay_keeps_rows(write_behind, tmp_path):
+    spill = tmp_path / "spill.jsonl"
+    spill.write_text('[1]\n[2]\n')
+
+    def failing(rows):
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        write_behind.WriteBehindQueue(failing, spill_path=str(spill)).replay_spill()
+    assert spill.read_text().splitlines() == ["[1]", "[2]"]
+    assert list(tmp_path.glob("spill.jsonl.replay-*")) == []
+
+
+def test_flush_writes_queued_rows_before_the_deadline(write_behind, tmp_path):
+    out = tmp_path / "out.jsonl"
+    queue = write_behind.WriteBehindQueue(append_rows(out), max_delay_ms=60_000)
+    assert queue.flush(timeout=1)  # nothing queued yet
+    queue.put_many([(1, "a"), (2, "b")])
+    assert queue.flush(timeout=5)
+    assert out.read_text().splitlines() == ['[1, "a"]', '[2, "b"]']
+    queue.close()
+
+
+def test_flush_times_out_while_writes_fail(write_behind):
+    def failing(rows):
+        raise OSError("database is locked")
+
+    queue = write_behind.WriteBehindQueue(failing, max_delay_ms=60_000, shutdown_timeout=0.1)
+    queue.put(("a",))
+    assert not queue.flush(timeout=0.2)
+    assert queue.stats()["queue_depth"] == 1
+    queue.close()